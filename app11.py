@@ -1,476 +1,794 @@
-from flask import Flask, request, jsonify
-import logging
-from be11 import SmartRecipeBot
-import ssl
-import json
-import re
-import os
-import time
-
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-app = Flask(__name__)
-
-class AutoReloadRecipeBot:
-    def __init__(self, recipe_file):
-        self.recipe_file = recipe_file
-        self.bot = None
-        self.last_modified = 0
-        self.load_recipes()
-    
-    def load_recipes(self):
-        """Загружает или перезагружает рецепты если файл изменился"""
-        try:
-            if os.path.exists(self.recipe_file):
-                current_modified = os.path.getmtime(self.recipe_file)
-                if current_modified > self.last_modified or self.bot is None:
-                    self.bot = SmartRecipeBot(self.recipe_file)
-                    self.last_modified = current_modified
-                    logger.info("Recipes loaded/reloaded successfully")
-                    return True
-            else:
-                logger.error(f"Recipe file {self.recipe_file} not found")
-        except Exception as e:
-            logger.error(f"Error loading recipes: {e}")
-        return False
-    
-    def process_message(self, message):
-        """Проверяет актуальность данных перед обработкой"""
-        self.load_recipes()
-        if self.bot:
-            return self.bot.process_message(message)
-        else:
-            return "Извините, не удалось загрузить рецепты. Проверьте файл с рецептами."
-
-# Инициализируем бота с автоперезагрузкой
-bot = AutoReloadRecipeBot("recipes.json")
-
-# Временное хранилище для частей рецептов (в памяти)
-recipe_parts_store = {}
-
-# Стартовое сообщение с инструкцией
-START_MESSAGE = """Привет! Я ваш кулинарный помощник. 
-
-Для поиска рецептов используйте команды:
-• "Найди рецепт пиццы"
-• "Найди блюда с курицей и картошкой" 
-
-При выборе из списка можно сказать:
-• "Первое", "Второе", "Третье"
-• "Покажи еще" - следующая страница
-• "Другой рецепт" - новый поиск
-
-Что хотите приготовить?"""
-
-def split_by_sentences(text, max_length=1000):
-    """Разбивает текст на части по предложениям, не превышая max_length"""
-    if len(text) <= max_length:
-        return [text]
-    
-    # Разделяем текст на предложения, но игнорируем точки после цифр (например, "1.")
-    # Используем негативный просмотр назад, чтобы исключить цифры перед точкой
-    sentences = re.split(r'(?<!\d)\.\s+(?=[А-ЯA-Z])|\!\s+|\?\s+', text)
-    
-    parts = []
-    current_part = ""
-    
-    for sentence in sentences:
-        # Восстанавливаем знак препинания в конце предложения
-        # Находим какой знак был использован для разделения
-        if current_part:
-            # Добавляем точку к предыдущему предложению (кроме первого)
-            current_part += "."
-        
-        # Если добавление следующего предложения не превысит лимит
-        if len(current_part) + len(sentence) + 1 <= max_length:
-            if current_part:
-                current_part += " " + sentence
-            else:
-                current_part = sentence
-        else:
-            # Если текущая часть не пустая, сохраняем ее
-            if current_part:
-                parts.append(current_part.strip())
-            
-            # Если одно предложение само по себе длиннее max_length,
-            # разбиваем его по словам
-            if len(sentence) > max_length:
-                words = sentence.split()
-                current_part = ""
-                for word in words:
-                    if len(current_part) + len(word) + 1 <= max_length:
-                        if current_part:
-                            current_part += " " + word
-                        else:
-                            current_part = word
-                    else:
-                        if current_part:
-                            parts.append(current_part.strip())
-                        current_part = word
-            else:
-                current_part = sentence
-    
-    # Добавляем последнюю часть
-    if current_part:
-        parts.append(current_part.strip())
-    
-    return parts
-
-def split_long_response(text):
-    """Разбивает длинный текст на части по предложениям"""
-    if len(text) <= 1024:
-        return [text]
-    
-    # Сначала пробуем разбить по предложениям
-    parts = split_by_sentences(text, 1000)
-    
-    # Если все равно есть слишком длинные части, разбиваем принудительно
-    final_parts = []
-    for part in parts:
-        if len(part) > 1024:
-            # Принудительно разбиваем на части по 1000 символов, но стараясь по словам
-            words = part.split()
-            current_chunk = ""
-            for word in words:
-                if len(current_chunk) + len(word) + 1 <= 1000:
-                    if current_chunk:
-                        current_chunk += " " + word
-                    else:
-                        current_chunk = word
-                else:
-                    if current_chunk:
-                        final_parts.append(current_chunk.strip())
-                    current_chunk = word
-            if current_chunk:
-                final_parts.append(current_chunk.strip())
-        else:
-            final_parts.append(part)
-    
-    return final_parts
-
-def create_alice_response(text, tts=None, buttons=None, end_session=False, session_state=None):
-    """Создает ответ для Яндекс Алисы с гарантированной длиной до 1024 символов"""
-    # ГАРАНТИРУЕМ что текст не превышает 1024 символа
-    text = text[:1024]
-    
-    response = {
-        "response": {
-            "text": text,
-            "end_session": end_session
-        },
-        "version": "1.0"
-    }
-    
-    if tts:
-        response["response"]["tts"] = tts
-    
-    if buttons:
-        response["response"]["buttons"] = buttons
-    
-    if session_state:
-        response["session_state"] = session_state
-    
-    return response
-
-@app.route('/')
-def index():
-    return "Кулинарный помощник для Яндекс Алисы работает!"
-
-@app.route('/reload-recipes', methods=['POST'])
-def reload_recipes():
-    """Принудительная перезагрузка рецептов"""
-    try:
-        if bot.load_recipes():
-            return jsonify({"status": "success", "message": "Recipes reloaded successfully"})
-        else:
-            return jsonify({"status": "error", "message": "Failed to reload recipes"}), 500
-    except Exception as e:
-        logger.error(f"Error reloading recipes: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
-
-@app.route('/webhook', methods=['POST'])
-def webhook():
-    try:
-        data = request.get_json()
-        logger.info(f"Received data: {data}")
-        
-        # Проверяем, что это запрос от Алисы
-        if not data or 'request' not in data:
-            return jsonify(create_alice_response("Произошла ошибка", end_session=True))
-        
-        request_data = data['request']
-        session = data.get('session', {})
-        session_id = session.get('session_id', 'default')
-        
-        # Получаем состояние сессии
-        state = data.get('state', {})
-        session_state = state.get('session', {}) if state else {}
-        
-        logger.info(f"Session ID: {session_id}")
-        
-        # Обрабатываем начало сессии
-        if request_data.get('type') == 'SimpleUtterance' and 'марку' in request_data.get('command', '').lower():
-            return jsonify(create_alice_response(
-                "Это кулинарный помощник! " + START_MESSAGE,
-                buttons=[
-                    {"title": "Найди рецепт пиццы", "hide": True},
-                    {"title": "Найди блюда с курицей", "hide": True},
-                    {"title": "Найди десерты", "hide": True}
-                ]
-            ))
-        
-        # Новый сеанс или команда "Помощь"
-        if (session.get('new') or 
-            request_data.get('command', '').lower() in ['помощь', 'что ты умеешь', 'help']):
-            # Очищаем сохраненные части при новом сеансе
-            if session_id in recipe_parts_store:
-                del recipe_parts_store[session_id]
-                
-            return jsonify(create_alice_response(
-                START_MESSAGE,
-                buttons=[
-                    {"title": "Найди рецепт пиццы", "hide": True},
-                    {"title": "Найди блюда с курицей", "hide": True},
-                    {"title": "Найди десерты", "hide": True}
-                ]
-            ))
-        
-        # Выход
-        if request_data.get('command', '').lower() in ['пока', 'выход', 'закончить']:
-            # Очищаем сохраненные части при выходе
-            if session_id in recipe_parts_store:
-                del recipe_parts_store[session_id]
-            return jsonify(create_alice_response("До свидания! Приятного аппетита!", end_session=True))
-        
-        # Обрабатываем команду пользователя
-        user_message = request_data.get('command', '').strip()
-        
-        if not user_message:
-            return jsonify(create_alice_response(
-                "Что вы хотите приготовить?",
-                buttons=[
-                    {"title": "Найди рецепт пиццы", "hide": True},
-                    {"title": "Найди блюда с курицей", "hide": True},
-                    {"title": "Найди помощь", "hide": True}
-                ]
-            ))
-        
-        user_message_lower = user_message.lower()
-        
-        # Обрабатываем команду "другой рецепт" - сбрасываем состояние
-        if user_message_lower in ['другой рецепт', 'новый поиск', 'сброс']:
-            # Очищаем сохраненные части
-            if session_id in recipe_parts_store:
-                del recipe_parts_store[session_id]
-            
-            return jsonify(create_alice_response(
-                "Хорошо, начинаем новый поиск. Что вы хотите приготовить?",
-                buttons=[
-                    {"title": "Найди рецепт пиццы", "hide": True},
-                    {"title": "Найди блюда с курицей", "hide": True},
-                    {"title": "Помощь", "hide": True}
-                ]
-            ))
-        
-        # Обрабатываем команду "далее" для продолжения чтения рецепта
-        if user_message_lower in ['далее', 'продолжи', 'следующая часть']:
-            logger.info(f"Processing 'next' command for session: {session_id}")
-            
-            # Проверяем есть ли сохраненные части для этой сессии
-            if session_id in recipe_parts_store and recipe_parts_store[session_id]:
-                remaining_parts = recipe_parts_store[session_id]
-                logger.info(f"Found {len(remaining_parts)} remaining parts")
-                
-                if remaining_parts:
-                    next_part = remaining_parts[0]
-                    new_remaining_parts = remaining_parts[1:]
-                    
-                    # Обновляем хранилище
-                    recipe_parts_store[session_id] = new_remaining_parts
-                    
-                    # Добавляем подсказку для продолжения, если есть еще части
-                    if new_remaining_parts:
-                        # Обрезаем часть и добавляем короткое сообщение
-                        if len(next_part) > 1000:
-                            next_part = next_part[:1000]
-                        next_part += "\n\n(Скажите 'далее' для продолжения)"
-                        buttons = [
-                            {"title": "Далее", "hide": True},
-                            {"title": "Другой рецепт", "hide": True},
-                            {"title": "Помощь", "hide": True}
-                        ]
-                    else:
-                        # Последняя часть
-                        if len(next_part) > 1000:
-                            next_part = next_part[:1000]
-                        next_part += "\n\nПриятного аппетита"
-                        buttons = [
-                            {"title": "Другой рецепт", "hide": True},
-                            {"title": "Помощь", "hide": True}
-                        ]
-                    
-                    logger.info(f"Sending part, remaining: {len(new_remaining_parts)}")
-                    
-                    return jsonify(create_alice_response(
-                        next_part,
-                        buttons=buttons
-                    ))
-            
-            # Если частей нет
-            return jsonify(create_alice_response(
-                "Больше нет частей для продолжения. Начните новый поиск.",
-                buttons=[
-                    {"title": "Найди рецепт пиццы", "hide": True},
-                    {"title": "Найди блюда с курицей", "hide": True},
-                    {"title": "Помощь", "hide": True}
-                ]
-            ))
-        
-        # Обрабатываем команду "покажи еще" для пагинации
-        if user_message_lower in ['покажи еще', 'еще', 'дальше', 'следующие']:
-            # Используем специальную команду для пагинации
-            bot_response = bot.process_message("покажи еще")
-            
-            # ВАЖНО: Проверяем длину ответа даже для пагинации
-            if len(bot_response) > 1024:
-                parts = split_long_response(bot_response)
-                if len(parts) > 1:
-                    first_part = parts[0]
-                    remaining_parts = parts[1:]
-                    recipe_parts_store[session_id] = remaining_parts
-                    
-                    # Обрезаем и добавляем короткое сообщение
-                    if len(first_part) > 1000:
-                        first_part = first_part[:1000]
-                    first_part += "\n\n(Скажите 'далее' для продолжения)"
-                    
-                    return jsonify(create_alice_response(
-                        first_part,
-                        buttons=[
-                            {"title": "Далее", "hide": True},
-                            {"title": "Другой рецепт", "hide": True}
-                        ]
-                    ))
-            
-            buttons = []
-            if "Нашла" in bot_response and "рецептов" in bot_response:
-                buttons.extend([
-                    {"title": "Покажи еще", "hide": True},
-                    {"title": "Другой рецепт", "hide": True}
-                ])
-            
-            else:
-                buttons.extend([
-                    {"title": "Найди рецепт пиццы", "hide": True},
-                    {"title": "Найди блюда с курицей", "hide": True},
-                    {"title": "Помощь", "hide": True}
-                ])
-            
-            return jsonify(create_alice_response(
-                bot_response,
-                buttons=buttons
-            ))
-        
-        # Обрабатываем сообщение через бота
-        bot_response = bot.process_message(user_message)
-        logger.info(f"Bot response length: {len(bot_response)}")
-        
-        # ВАЖНО: Проверяем длину ВСЕХ ответов от бота, включая выбор рецепта по номеру
-        if len(bot_response) > 1024:
-            parts = split_long_response(bot_response)
-            logger.info(f"Split into {len(parts)} parts")
-            
-            # Если ответ разбит на части, отправляем первую часть
-            # и сохраняем остальные в нашем хранилище
-            if len(parts) > 1:
-                first_part = parts[0]
-                remaining_parts = parts[1:]
-                
-                # Сохраняем оставшиеся части в хранилище
-                recipe_parts_store[session_id] = remaining_parts
-                
-                # Обрезаем первую часть и добавляем подсказку
-                if len(first_part) > 1000:
-                    first_part = first_part[:1000]
-                first_part += "\n\n(Скажите 'далее' для продолжения)"
-                
-                buttons = [
-                    {"title": "Далее", "hide": True},
-                    {"title": "Другой рецепт", "hide": True},
-                    {"title": "Помощь", "hide": True}
-                ]
-                
-                logger.info(f"Saving {len(remaining_parts)} remaining parts for session: {session_id}")
-                
-                return jsonify(create_alice_response(
-                    first_part,
-                    buttons=buttons
-                ))
-        
-        # Обычная обработка для коротких ответов
-        buttons = []
-        if "Нашла" in bot_response and "рецептов" in bot_response:
-            # Если показан список рецептов
-            buttons.extend([
-                {"title": "Покажи еще", "hide": True},
-                {"title": "Другой рецепт", "hide": True}
-            ])
-        
-        else:
-            # Обычное состояние (полный рецепт или другой ответ)
-            buttons.extend([
-                {"title": "Другой рецепт", "hide": True},
-                {"title": "Помощь", "hide": True}
-            ])
-        
-        return jsonify(create_alice_response(
-            bot_response,
-            buttons=buttons
-        ))
-        
-    except Exception as e:
-        logger.error(f"Error processing request: {e}")
-        return jsonify(create_alice_response(
-            "Извините, произошла ошибка. Попробуйте еще раз.",
-            end_session=True
-        ))
-
-if __name__ == '__main__':
-    # Запуск с улучшенными настройками
-    import socket
-    
-    # Устанавливаем таймауты сокета
-    socket.setdefaulttimeout(120)  # 120 секунд для Яндекс Диалогов
-    
-    # Запуск с SSL для HTTPS
-    context = ssl.SSLContext(ssl.PROTOCOL_TLSv1_2)
-    
-    # Укажите пути к вашим сертификатам
-    try:
-        context.load_cert_chain('cert.pem', 'key.pem')
-        logger.info("SSL certificates loaded successfully")
-        
-        # Улучшенный запуск Flask
-        app.run(
-            host='0.0.0.0',
-            port=5000,
-            ssl_context=context,
-            debug=False,
-            threaded=True,      # Включаем многопоточность
-            processes=1,        # Один процесс
-            use_reloader=False  # Отключаем релоад в продакшене
-        )
-    except FileNotFoundError:
-        logger.warning("SSL certificates not found, running without HTTPS")
-        
-        # Без SSL
-        app.run(
-            host='0.0.0.0',
-            port=5000,
-            debug=False,
-            threaded=True,      # Включаем многопоточность
-            processes=1,        # Один процесс
-            use_reloader=False  # Отключаем релоад в продакшене
+from flask import Flask, Response, g, request, jsonify
+import logging
+from be11 import SmartRecipeBot, SessionStore, BUILD_STAGES, LEMMA_CACHE, QUERY_CACHE
+from recipe_watcher import RecipeFileWatcher
+from morphology import morph_stats, current_rss_bytes
+from metrics import (REGISTRY, RELOAD_BUCKETS, STAGE_SECONDS, CallbackMetric, Counter, Histogram,
+                     gauge)
+from async_logging import log_event, logging_stats, setup_logging
+from request_capture import RequestCapture
+import ssl
+import json
+import re
+import os
+import signal
+import time
+import threading
+
+# Настройка логирования: запись в stdout идет из отдельного потока, не из потока запроса
+setup_logging()
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+
+# Метрики процесса; при нескольких воркерах каждый отдает свои
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'recipe_bot_request_seconds', 'Request latency by endpoint and intent', ('endpoint', 'intent')))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    'recipe_bot_requests_total', 'Requests by endpoint, intent and status', ('endpoint', 'intent', 'status')))
+RELOAD_SECONDS = REGISTRY.register(Histogram(
+    'recipe_bot_reload_seconds', 'Duration of successful index rebuilds', buckets=RELOAD_BUCKETS))
+
+# Запись запросов вебхука для loadtest.py - только если задан RECIPE_CAPTURE_FILE
+CAPTURE = RequestCapture.from_env()
+
+class AutoReloadRecipeBot:
+    def __init__(self, recipe_file):
+        self.recipe_file = recipe_file
+        # Сессии пользователей переживают перезагрузку рецептов
+        self.sessions = SessionStore()
+        self.bot = None
+        self.last_modified = 0
+        self.requested_modified = 0
+        self.reload_thread = None
+        self.reload_lock = threading.Lock()
+        # pid главного процесса run_waitress, если это воркер
+        self.master_pid = None
+        self.reload_stats = {
+            'reloads': 0,
+            'failures': 0,
+            'in_progress': False,
+            'last_duration_sec': None,
+            'total_duration_sec': 0.0,
+            'last_reload_at': None,
+            'last_error': None
+        }
+        self.build_progress = {'stage': None, 'progress': 0.0, 'started_at': None, 'stage_started_at': None}
+        # Индекс строится в фоне: сервер принимает соединения сразу, а до готовности
+        # вебхук отвечает "загружаюсь"
+        self.load_recipes()
+        # Изменения файла ловит отдельный поток, запросы файловую систему не трогают
+        self.watcher = RecipeFileWatcher(self.recipe_file, self.start_reload).start()
+    
+    def load_recipes(self, wait=False):
+        """Запускает фоновую перезагрузку рецептов, если файл изменился.
+        
+        Файл проверяет поток перезагрузки при разборе. С wait=True дожидается окончания
+        перестройки и возвращает, удалась ли она.
+        """
+        try:
+            if os.path.exists(self.recipe_file):
+                current_modified = os.path.getmtime(self.recipe_file)
+                if current_modified > self.last_modified or self.bot is None:
+                    return self.start_reload(current_modified, wait)
+            else:
+                # Ошибка видна в /ready; появление файла заметит наблюдатель
+                self.reload_stats['last_error'] = f"Recipe file {self.recipe_file} not found"
+                logger.error(self.reload_stats['last_error'])
+        except Exception as e:
+            self.reload_stats['last_error'] = str(e)
+            logger.error(f"Error loading recipes: {e}")
+        return False
+    
+    def start_reload(self, modified, wait=False):
+        """Запускает перестройку индекса в фоновом потоке (не больше одной одновременно).
+        
+        Изменение, пришедшее во время перестройки, подхватит тот же поток следующим проходом.
+        """
+        with self.reload_lock:
+            self.requested_modified = max(self.requested_modified, modified)
+            if self.reload_thread is None:
+                self.reload_thread = threading.Thread(target=self.rebuild, name="recipe-reload", daemon=True)
+                self.reload_stats['in_progress'] = True
+                self.reload_thread.start()
+            thread = self.reload_thread
+        if wait:
+            thread.join()
+            return self.last_modified >= modified and self.reload_stats['last_error'] is None
+        return True
+    
+    def rebuild(self):
+        """Строит новые индексы, пока есть незагруженные изменения файла"""
+        while True:
+            with self.reload_lock:
+                modified = self.requested_modified
+                if modified <= self.last_modified:
+                    self.reload_thread = None
+                    self.reload_stats['in_progress'] = False
+                    return
+            self.rebuild_once(modified)
+    
+    @property
+    def ready(self):
+        """Есть ли опубликованный индекс для ответов"""
+        return self.bot is not None
+    
+    @property
+    def loading(self):
+        """Индекса еще нет, но он строится. Если построить не удалось, это уже не загрузка:
+        process_message ответит, что рецепты не загрузились."""
+        return self.bot is None and self.reload_stats['in_progress']
+    
+    def report_progress(self, stage):
+        """Принимает этапы построения от SmartRecipeBot"""
+        self.build_progress.update({
+            'stage': stage,
+            'progress': round(BUILD_STAGES.index(stage) / (len(BUILD_STAGES) - 1), 2),
+            'stage_started_at': time.time()
+        })
+    
+    def rebuild_once(self, modified):
+        """Строит новый индекс и публикует его заменой ссылки"""
+        start = time.perf_counter()
+        self.build_progress['started_at'] = time.time()
+        try:
+            # strict: недописанный или пустой файл - ошибка, а не пустой индекс
+            new_bot = SmartRecipeBot(self.recipe_file, session_store=self.sessions,
+                                     progress=self.report_progress, strict=True)
+        except Exception as e:
+            # Сломанный файл не перечитываем - ждем следующего изменения, прежний индекс остается
+            self.last_modified = modified
+            self.reload_stats['failures'] += 1
+            self.reload_stats['last_error'] = str(e)
+            logger.error(f"Error loading recipes: {e}")
+            return
+        duration = time.perf_counter() - start
+        RELOAD_SECONDS.observe(duration)
+        
+        # Публикация - одно присваивание: запросы в работе дочитывают старый индекс,
+        # новые берут новый, никто не ждет перестройки
+        self.bot = new_bot
+        self.last_modified = modified
+        self.reload_stats.update({
+            'reloads': self.reload_stats['reloads'] + 1,
+            'last_duration_sec': round(duration, 3),
+            'total_duration_sec': round(self.reload_stats['total_duration_sec'] + duration, 3),
+            'last_reload_at': time.time(),
+            'last_error': None
+        })
+        logger.info(f"Recipes loaded/reloaded successfully in {duration:.2f}s "
+                    f"(generation {new_bot.index_generation})")
+        logger.info(f"Lemma cache: {LEMMA_CACHE.stats()}")
+        logger.info(f"Morphology: {morph_stats()}")
+    
+    def after_fork(self):
+        """Вызывается в процессе-воркере после fork.
+        
+        Потоки наблюдения и перезагрузки остались в главном процессе: он сам перестраивает
+        индекс и заменяет воркеров. Блокировку, захваченную на время fork, пересоздаем.
+        """
+        self.reload_lock = threading.Lock()
+        self.reload_thread = None
+        self.master_pid = os.getppid()
+    
+    def request_reload(self):
+        """Перезагрузка по запросу: в воркере ее выполняет главный процесс.
+        
+        Возвращает None, если запрос передан главному процессу, иначе результат перезагрузки.
+        """
+        if self.master_pid is not None:
+            # Свой индекс воркера устарел бы относительно остальных - строит и заменяет всех главный
+            os.kill(self.master_pid, signal.SIGHUP)
+            return None
+        return self.load_recipes(wait=True)
+    
+    def recipe_parts(self, cursor, part):
+        """Части показанного рецепта начиная с part - по курсору из state.session.
+        
+        Нужны, когда "далее" попало в процесс, который не выдавал первую часть.
+        """
+        current_bot = self.bot
+        if current_bot is None or not cursor or part is None \
+                or cursor.get('ix') != current_bot.cursor_index_id():
+            return None
+        recipe_idx = cursor.get('r')
+        if not isinstance(recipe_idx, int) or not 0 <= recipe_idx < len(current_bot.recipes):
+            return None
+        return split_long_response(current_bot.format_recipe_response(current_bot.recipes[recipe_idx]))[part:]
+    
+    def process_message(self, message, session_id, cursor=None):
+        """Обрабатывает сообщение текущим индексом.
+        
+        Возвращает ответ, курсор поиска для state.session Алисы и намерение сообщения.
+        """
+        # Берем ссылку один раз: весь запрос обрабатывается одним поколением индекса
+        current_bot = self.bot
+        if current_bot:
+            return current_bot.process_alice_message(message, session_id, cursor)
+        else:
+            return "Извините, не удалось загрузить рецепты. Проверьте файл с рецептами.", cursor, 'other'
+
+# Инициализируем бота с автоперезагрузкой
+bot = AutoReloadRecipeBot("recipes.json")
+
+def cache_metrics(field):
+    return lambda: [(('lemma',), LEMMA_CACHE.stats()[field]), (('query',), QUERY_CACHE.stats()[field])]
+
+# Значения, которые и так ведут кэши, хранилище сессий и перезагрузка, читаются только при опросе /metrics
+for field, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'), ('hit_rate', 'gauge')):
+    REGISTRY.register(CallbackMetric(
+        f"recipe_bot_cache_{field}{'_total' if kind == 'counter' else ''}", f"Cache {field.replace('_', ' ')}",
+        kind, cache_metrics(field), ('cache',)))
+gauge('recipe_bot_ready', 'Whether the search index is built', lambda: int(bot.ready))
+gauge('recipe_bot_index_generation', 'Generation of the published search index',
+      lambda: bot.bot.index_generation if bot.bot else None)
+gauge('recipe_bot_recipes', 'Recipes in the published index', lambda: len(bot.bot.recipes) if bot.bot else None)
+gauge('recipe_bot_reload_in_progress', 'Whether an index rebuild is running',
+      lambda: int(bot.reload_stats['in_progress']))
+REGISTRY.register(CallbackMetric('recipe_bot_reloads_total', 'Index rebuilds by result', 'counter',
+                                 lambda: [(('success',), bot.reload_stats['reloads']),
+                                          (('failure',), bot.reload_stats['failures'])], ('result',)))
+gauge('recipe_bot_sessions', 'Sessions in the session store', lambda: len(bot.sessions))
+REGISTRY.register(CallbackMetric('recipe_bot_sessions_removed_total', 'Sessions removed from the store by reason',
+                                 'counter', lambda: [(('expired',), bot.sessions.stats()['expirations']),
+                                                     (('evicted',), bot.sessions.stats()['evictions'])],
+                                 ('reason',)))
+
+# Стартовое сообщение с инструкцией
+START_MESSAGE = """Привет! Я ваш кулинарный помощник. 
+
+Для поиска рецептов используйте команды:
+• "Найди рецепт пиццы"
+• "Найди блюда с курицей и картошкой" 
+
+При выборе из списка можно сказать:
+• "Первое", "Второе", "Третье"
+• "Покажи еще" - следующая страница
+• "Другой рецепт" - новый поиск
+
+Что хотите приготовить?"""
+
+def split_by_sentences(text, max_length=1000):
+    """Разбивает текст на части по предложениям, не превышая max_length"""
+    if len(text) <= max_length:
+        return [text]
+    
+    # Разделяем текст на предложения, но игнорируем точки после цифр (например, "1.")
+    # Используем негативный просмотр назад, чтобы исключить цифры перед точкой
+    sentences = re.split(r'(?<!\d)\.\s+(?=[А-ЯA-Z])|\!\s+|\?\s+', text)
+    
+    parts = []
+    current_part = ""
+    
+    for sentence in sentences:
+        # Восстанавливаем знак препинания в конце предложения
+        # Находим какой знак был использован для разделения
+        if current_part:
+            # Добавляем точку к предыдущему предложению (кроме первого)
+            current_part += "."
+        
+        # Если добавление следующего предложения не превысит лимит
+        if len(current_part) + len(sentence) + 1 <= max_length:
+            if current_part:
+                current_part += " " + sentence
+            else:
+                current_part = sentence
+        else:
+            # Если текущая часть не пустая, сохраняем ее
+            if current_part:
+                parts.append(current_part.strip())
+            
+            # Если одно предложение само по себе длиннее max_length,
+            # разбиваем его по словам
+            if len(sentence) > max_length:
+                words = sentence.split()
+                current_part = ""
+                for word in words:
+                    if len(current_part) + len(word) + 1 <= max_length:
+                        if current_part:
+                            current_part += " " + word
+                        else:
+                            current_part = word
+                    else:
+                        if current_part:
+                            parts.append(current_part.strip())
+                        current_part = word
+            else:
+                current_part = sentence
+    
+    # Добавляем последнюю часть
+    if current_part:
+        parts.append(current_part.strip())
+    
+    return parts
+
+def split_long_response(text):
+    """Разбивает длинный текст на части по предложениям"""
+    if len(text) <= 1024:
+        return [text]
+    
+    # Сначала пробуем разбить по предложениям
+    parts = split_by_sentences(text, 1000)
+    
+    # Если все равно есть слишком длинные части, разбиваем принудительно
+    final_parts = []
+    for part in parts:
+        if len(part) > 1024:
+            # Принудительно разбиваем на части по 1000 символов, но стараясь по словам
+            words = part.split()
+            current_chunk = ""
+            for word in words:
+                if len(current_chunk) + len(word) + 1 <= 1000:
+                    if current_chunk:
+                        current_chunk += " " + word
+                    else:
+                        current_chunk = word
+                else:
+                    if current_chunk:
+                        final_parts.append(current_chunk.strip())
+                    current_chunk = word
+            if current_chunk:
+                final_parts.append(current_chunk.strip())
+        else:
+            final_parts.append(part)
+    
+    return final_parts
+
+def store_pending_parts(session_id, parts):
+    """Запоминает неотправленные части ответа в сессии: их срок жизни и вытеснение - у SessionStore"""
+    session = bot.sessions.get(session_id)
+    with session.lock:
+        session.pending_parts = parts
+
+def split_response(text, intent):
+    """split_long_response с замером этапа для /metrics"""
+    start = time.perf_counter()
+    parts = split_long_response(text)
+    STAGE_SECONDS.observe(time.perf_counter() - start, 'split', intent)
+    return parts
+
+def alice_state(cursor, part=None):
+    """state.session для Алисы: курсор поиска и номер следующей части рецепта"""
+    state = {}
+    if cursor:
+        state["cursor"] = cursor
+    if part is not None:
+        state["part"] = part
+    return state or None
+
+def recipe_shown(intent, cursor):
+    """Показан ли в ответе рецепт: выбор из списка, после которого курсор хранит номер рецепта"""
+    return intent == 'select' and bool(cursor) and 'r' in cursor
+
+def create_alice_response(text, tts=None, buttons=None, end_session=False, session_state=None):
+    """Создает ответ для Яндекс Алисы с гарантированной длиной до 1024 символов"""
+    # ГАРАНТИРУЕМ что текст не превышает 1024 символа
+    text = text[:1024]
+    
+    response = {
+        "response": {
+            "text": text,
+            "end_session": end_session
+        },
+        "version": "1.0"
+    }
+    
+    if tts:
+        response["response"]["tts"] = tts
+    
+    if buttons:
+        response["response"]["buttons"] = buttons
+    
+    if session_state:
+        response["session_state"] = session_state
+    
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Время и число запросов и выборочная запись вебхука; намерение выставляет вебхук в g.intent"""
+    start = g.get('request_start')
+    if start is not None:
+        endpoint = request.endpoint or 'unknown'
+        intent = g.get('intent', 'other')
+        elapsed = time.perf_counter() - start
+        REQUEST_SECONDS.observe(elapsed, endpoint, intent)
+        REQUESTS_TOTAL.inc(endpoint, intent, str(response.status_code))
+        # Вместо полного тела запроса - короткая выборочная запись
+        log_event(logger, 'webhook.request', "%s %s %d %.1f ms", endpoint, intent, response.status_code,
+                  elapsed * 1000, endpoint=endpoint, intent=intent, status=response.status_code,
+                  latency_ms=round(elapsed * 1000, 2))
+        if CAPTURE is not None and endpoint == 'webhook' and CAPTURE.sampled():
+            # Тело запроса уже разобрано Flask, ответ передаем байтами: разбор - в потоке записи
+            CAPTURE.record(time.time(), elapsed, intent, response.status_code,
+                           request.get_json(silent=True), response.get_data())
+    return response
+
+@app.route('/')
+def index():
+    return "Кулинарный помощник для Яндекс Алисы работает!"
+
+@app.route('/reload-recipes', methods=['POST'])
+def reload_recipes():
+    """Принудительная перезагрузка рецептов"""
+    try:
+        reloaded = bot.request_reload()
+        if reloaded is None:
+            return jsonify({"status": "accepted", "message": "Reload requested from the master process"}), 202
+        if reloaded:
+            return jsonify({"status": "success", "message": "Recipes reloaded successfully"})
+        else:
+            return jsonify({"status": "error", "message": "Failed to reload recipes"}), 500
+    except Exception as e:
+        logger.error(f"Error reloading recipes: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/ready')
+def ready():
+    """Готовность к приему запросов: 200 после построения индекса, до этого 503"""
+    current_bot = bot.bot
+    status = {
+        "ready": current_bot is not None,
+        "generation": current_bot.index_generation if current_bot else None,
+        "recipes": len(current_bot.recipes) if current_bot else None,
+        "build": bot.build_progress,
+        "reload_in_progress": bot.reload_stats['in_progress'],
+        "last_error": bot.reload_stats['last_error']
+    }
+    return jsonify(status), 200 if current_bot is not None else 503
+
+def process_memory():
+    """Память процесса: при нескольких воркерах Pss и Shared показывают, сколько страниц
+    индекса остались общими после fork"""
+    memory = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    memory[name.lower() + '_bytes'] = int(value.split()[0]) * 1024
+    except OSError:
+        memory['rss_bytes'] = current_rss_bytes()
+    return memory
+
+@app.route('/stats')
+def stats():
+    """Статистика кэшей для мониторинга"""
+    return jsonify({
+        "lemma_cache": LEMMA_CACHE.stats(),
+        "query_cache": QUERY_CACHE.stats(),
+        "sessions": bot.sessions.stats(),
+        "reload": dict(bot.reload_stats, generation=bot.bot.index_generation if bot.bot else None),
+        "watcher": bot.watcher.stats(),
+        "morphology": morph_stats(),
+        "logging": logging_stats(),
+        "capture": CAPTURE.stats() if CAPTURE else None,
+        "process": dict(process_memory(), pid=os.getpid())
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/webhook', methods=['POST'])
+def webhook():
+    try:
+        data = request.get_json()
+        
+        # Проверяем, что это запрос от Алисы
+        if not data or 'request' not in data:
+            return jsonify(create_alice_response("Произошла ошибка", end_session=True))
+        
+        request_data = data['request']
+        session = data.get('session', {})
+        session_id = session.get('session_id', 'default')
+        
+        # Получаем состояние сессии
+        state = data.get('state', {})
+        session_state = state.get('session', {}) if state else {}
+        # Курсор поиска живет у Алисы, поэтому запрос может обработать любой процесс
+        cursor = session_state.get('cursor')
+        
+        logger.debug("Session ID: %s", session_id)
+        
+        # Обрабатываем начало сессии
+        if request_data.get('type') == 'SimpleUtterance' and 'марку' in request_data.get('command', '').lower():
+            g.intent = 'start'
+            return jsonify(create_alice_response(
+                "Это кулинарный помощник! " + START_MESSAGE,
+                buttons=[
+                    {"title": "Найди рецепт пиццы", "hide": True},
+                    {"title": "Найди блюда с курицей", "hide": True},
+                    {"title": "Найди десерты", "hide": True}
+                ]
+            ))
+        
+        # Новый сеанс или команда "Помощь"
+        if (session.get('new') or 
+            request_data.get('command', '').lower() in ['помощь', 'что ты умеешь', 'help']):
+            g.intent = 'start'
+            # Очищаем сохраненные части при новом сеансе
+            store_pending_parts(session_id, [])
+                
+            return jsonify(create_alice_response(
+                START_MESSAGE,
+                buttons=[
+                    {"title": "Найди рецепт пиццы", "hide": True},
+                    {"title": "Найди блюда с курицей", "hide": True},
+                    {"title": "Найди десерты", "hide": True}
+                ]
+            ))
+        
+        # Выход
+        if request_data.get('command', '').lower() in ['пока', 'выход', 'закончить']:
+            g.intent = 'exit'
+            # Сессия удаляется вместе с сохраненными частями
+            bot.sessions.drop(session_id)
+            return jsonify(create_alice_response("До свидания! Приятного аппетита!", end_session=True))
+        
+        # Обрабатываем команду пользователя
+        user_message = request_data.get('command', '').strip()
+        
+        if not user_message:
+            return jsonify(create_alice_response(
+                "Что вы хотите приготовить?",
+                buttons=[
+                    {"title": "Найди рецепт пиццы", "hide": True},
+                    {"title": "Найди блюда с курицей", "hide": True},
+                    {"title": "Найди помощь", "hide": True}
+                ]
+            ))
+        
+        user_message_lower = user_message.lower()
+        
+        # Обрабатываем команду "другой рецепт" - сбрасываем состояние
+        if user_message_lower in ['другой рецепт', 'новый поиск', 'сброс']:
+            g.intent = 'reset'
+            # Очищаем сохраненные части
+            store_pending_parts(session_id, [])
+            
+            return jsonify(create_alice_response(
+                "Хорошо, начинаем новый поиск. Что вы хотите приготовить?",
+                buttons=[
+                    {"title": "Найди рецепт пиццы", "hide": True},
+                    {"title": "Найди блюда с курицей", "hide": True},
+                    {"title": "Помощь", "hide": True}
+                ]
+            ))
+        
+        # Обрабатываем команду "далее" для продолжения чтения рецепта
+        if user_message_lower in ['далее', 'продолжи', 'следующая часть']:
+            g.intent = 'next'
+            logger.debug("Processing 'next' command for session: %s", session_id)
+            
+            # Номер части пришел в state.session: остаток рецепта строим по курсору.
+            # Локальные части могли отстать - следующие части мог отправить другой процесс.
+            # Если курсор устарел (индекс перезагрузился между частями), дочитываем локальные
+            part = session_state.get('part')
+            restored_parts = bot.recipe_parts(cursor, part)
+            
+            # Берем следующую часть из сессии и сразу убираем ее: параллельный "далее" не повторит ее
+            session = bot.sessions.get(session_id)
+            with session.lock:
+                if restored_parts:
+                    session.pending_parts = restored_parts
+                remaining_parts = session.pending_parts
+                session.pending_parts = remaining_parts[1:]
+            
+            if remaining_parts:
+                logger.debug("Found %d remaining parts", len(remaining_parts))
+                
+                next_part = remaining_parts[0]
+                new_remaining_parts = remaining_parts[1:]
+                
+                # Добавляем подсказку для продолжения, если есть еще части
+                if new_remaining_parts:
+                    # Обрезаем часть и добавляем короткое сообщение
+                    if len(next_part) > 1000:
+                        next_part = next_part[:1000]
+                    next_part += "\n\n(Скажите 'далее' для продолжения)"
+                    buttons = [
+                        {"title": "Далее", "hide": True},
+                        {"title": "Другой рецепт", "hide": True},
+                        {"title": "Помощь", "hide": True}
+                    ]
+                else:
+                    # Последняя часть
+                    if len(next_part) > 1000:
+                        next_part = next_part[:1000]
+                    next_part += "\n\nПриятного аппетита"
+                    buttons = [
+                        {"title": "Другой рецепт", "hide": True},
+                        {"title": "Помощь", "hide": True}
+                    ]
+                    # Номер части есть только у рецепта - к нему можно подобрать похожие
+                    if part is not None:
+                        buttons.insert(0, {"title": "Похожие рецепты", "hide": True})
+                
+                logger.debug("Sending part, remaining: %d", len(new_remaining_parts))
+                
+                return jsonify(create_alice_response(
+                    next_part,
+                    buttons=buttons,
+                    session_state=alice_state(cursor, part + 1 if part is not None and new_remaining_parts else None)
+                ))
+            
+            # Если частей нет
+            return jsonify(create_alice_response(
+                "Больше нет частей для продолжения. Начните новый поиск.",
+                buttons=[
+                    {"title": "Найди рецепт пиццы", "hide": True},
+                    {"title": "Найди блюда с курицей", "hide": True},
+                    {"title": "Помощь", "hide": True}
+                ]
+            ))
+        
+        # Пока индекс строится после запуска, отвечаем сразу, не занимая поток
+        if bot.loading:
+            g.intent = 'loading'
+            return jsonify(create_alice_response(
+                "Загружаюсь, повторите запрос через несколько секунд.",
+                session_state=session_state
+            ))
+        
+        # Обрабатываем команду "покажи еще" для пагинации
+        if user_message_lower in ['покажи еще', 'еще', 'дальше', 'следующие']:
+            # Используем специальную команду для пагинации
+            bot_response, cursor, g.intent = bot.process_message("покажи еще", session_id, cursor)
+            
+            # ВАЖНО: Проверяем длину ответа даже для пагинации
+            if len(bot_response) > 1024:
+                parts = split_response(bot_response, g.intent)
+                if len(parts) > 1:
+                    first_part = parts[0]
+                    remaining_parts = parts[1:]
+                    store_pending_parts(session_id, remaining_parts)
+                    
+                    # Обрезаем и добавляем короткое сообщение
+                    if len(first_part) > 1000:
+                        first_part = first_part[:1000]
+                    first_part += "\n\n(Скажите 'далее' для продолжения)"
+                    
+                    return jsonify(create_alice_response(
+                        first_part,
+                        buttons=[
+                            {"title": "Далее", "hide": True},
+                            {"title": "Другой рецепт", "hide": True}
+                        ],
+                        session_state=alice_state(cursor)
+                    ))
+            
+            buttons = []
+            if "Нашла" in bot_response and "рецептов" in bot_response:
+                buttons.extend([
+                    {"title": "Покажи еще", "hide": True},
+                    {"title": "Другой рецепт", "hide": True}
+                ])
+            
+            else:
+                buttons.extend([
+                    {"title": "Найди рецепт пиццы", "hide": True},
+                    {"title": "Найди блюда с курицей", "hide": True},
+                    {"title": "Помощь", "hide": True}
+                ])
+            
+            return jsonify(create_alice_response(
+                bot_response,
+                buttons=buttons,
+                session_state=alice_state(cursor)
+            ))
+        
+        # Обрабатываем сообщение через бота
+        bot_response, cursor, g.intent = bot.process_message(user_message, session_id, cursor)
+        logger.debug("Bot response length: %d", len(bot_response))
+        
+        # ВАЖНО: Проверяем длину ВСЕХ ответов от бота, включая выбор рецепта по номеру
+        if len(bot_response) > 1024:
+            parts = split_response(bot_response, g.intent)
+            logger.debug("Split into %d parts", len(parts))
+            
+            # Если ответ разбит на части, отправляем первую часть
+            # и сохраняем остальные в нашем хранилище
+            if len(parts) > 1:
+                first_part = parts[0]
+                remaining_parts = parts[1:]
+                
+                # Сохраняем оставшиеся части в сессии пользователя
+                store_pending_parts(session_id, remaining_parts)
+                # Для рецепта номер следующей части уходит в state.session: "далее" сможет
+                # обработать любой процесс
+                next_part_number = 1 if recipe_shown(g.intent, cursor) else None
+                
+                # Обрезаем первую часть и добавляем подсказку
+                if len(first_part) > 1000:
+                    first_part = first_part[:1000]
+                first_part += "\n\n(Скажите 'далее' для продолжения)"
+                
+                buttons = [
+                    {"title": "Далее", "hide": True},
+                    {"title": "Другой рецепт", "hide": True},
+                    {"title": "Помощь", "hide": True}
+                ]
+                
+                logger.debug("Saving %d remaining parts for session: %s", len(remaining_parts), session_id)
+                
+                return jsonify(create_alice_response(
+                    first_part,
+                    buttons=buttons,
+                    session_state=alice_state(cursor, next_part_number)
+                ))
+        
+        # Обычная обработка для коротких ответов
+        buttons = []
+        if "Нашла" in bot_response and "рецептов" in bot_response:
+            # Если показан список рецептов
+            buttons.extend([
+                {"title": "Покажи еще", "hide": True},
+                {"title": "Другой рецепт", "hide": True}
+            ])
+        
+        else:
+            # Обычное состояние (полный рецепт или другой ответ)
+            if recipe_shown(g.intent, cursor):
+                buttons.append({"title": "Похожие рецепты", "hide": True})
+            buttons.extend([
+                {"title": "Другой рецепт", "hide": True},
+                {"title": "Помощь", "hide": True}
+            ])
+        
+        return jsonify(create_alice_response(
+            bot_response,
+            buttons=buttons,
+            session_state=alice_state(cursor)
+        ))
+        
+    except Exception as e:
+        g.intent = 'error'
+        logger.error("Error processing request: %s", e, exc_info=True)
+        return jsonify(create_alice_response(
+            "Извините, произошла ошибка. Попробуйте еще раз.",
+            end_session=True
+        ))
+
+if __name__ == '__main__':
+    # Запуск с улучшенными настройками
+    import socket
+    
+    # Устанавливаем таймауты сокета
+    socket.setdefaulttimeout(120)  # 120 секунд для Яндекс Диалогов
+    
+    # Запуск с SSL для HTTPS
+    context = ssl.SSLContext(ssl.PROTOCOL_TLSv1_2)
+    
+    # Укажите пути к вашим сертификатам
+    try:
+        context.load_cert_chain('cert.pem', 'key.pem')
+        logger.info("SSL certificates loaded successfully")
+        
+        # Улучшенный запуск Flask
+        app.run(
+            host='0.0.0.0',
+            port=5000,
+            ssl_context=context,
+            debug=False,
+            threaded=True,      # Включаем многопоточность
+            processes=1,        # Один процесс
+            use_reloader=False  # Отключаем релоад в продакшене
+        )
+    except FileNotFoundError:
+        logger.warning("SSL certificates not found, running without HTTPS")
+        
+        # Без SSL
+        app.run(
+            host='0.0.0.0',
+            port=5000,
+            debug=False,
+            threaded=True,      # Включаем многопоточность
+            processes=1,        # Один процесс
+            use_reloader=False  # Отключаем релоад в продакшене
         )
\ No newline at end of file
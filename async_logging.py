@@ -0,0 +1,175 @@
+# async_logging.py - асинхронное структурированное логирование с выборкой событий
+"""
+Поток запроса только кладет LogRecord в очередь; форматирование и запись в stdout/journald
+выполняет отдельный поток QueueListener. Сообщения пишутся с аргументами в стиле
+logger.debug("... %s", value), поэтому строка собирается только для записей,
+которые прошли фильтр уровня и выборки.
+
+События помечаются через extra={'event': 'search.terms'} (или функцией log_event)
+и прореживаются по доле из настроек: правило для "search" действует на все "search.*".
+Предупреждения и ошибки не прореживаются.
+
+Настройка через переменные окружения:
+    RECIPE_LOG_LEVEL   уровень, по умолчанию INFO
+    RECIPE_LOG_FORMAT  text (по умолчанию) или json - одна JSON-строка на запись
+    RECIPE_LOG_SAMPLE  доли событий, например "search=0.01,webhook.request=0.1"
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+# Сколько записей может ждать потока записи; при переполнении новые записи отбрасываются,
+# а не задерживают запрос
+LOG_QUEUE_SIZE = 10000
+# Итоговая строка о каждом запросе вебхука нужна выборочно
+DEFAULT_SAMPLE_RATES = {'webhook.request': 0.1}
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Разбирает "search=0.01,webhook.request=0.1" в словарь долей"""
+    rates = {}
+    for item in spec.split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю записей каждого события; записи без события и от WARNING выше - всегда"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self.resolved = {}
+
+    def rate(self, event: str) -> float:
+        rate = self.resolved.get(event)
+        if rate is None:
+            # Ищем самое длинное правило: search.terms -> search
+            name = event
+            while name not in self.rates and '.' in name:
+                name = name.rsplit('.', 1)[0]
+            rate = self.resolved[event] = self.rates.get(name, 1.0)
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(event)
+        return rate >= 1.0 or random.random() < rate
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись в потоке запроса.
+
+    Стандартный prepare() собирает сообщение до постановки в очередь; здесь это делает
+    поток записи. Аргументы диагностики - строки, числа и списки, которые после
+    записи в лог не меняются.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Трейсбек держит кадры стека: переводим его в текст сразу
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись: время, уровень, логгер, событие, сообщение и поля"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'ts': round(record.created, 3), 'level': record.levelname, 'logger': record.name}
+        event = getattr(record, 'event', None)
+        if event is not None:
+            entry['event'] = event
+        entry['msg'] = record.getMessage()
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def log_event(logger: logging.Logger, event: str, message: str, *args, level: int = logging.INFO, **fields):
+    """Пишет событие с полями для JSON-формата; при выключенном уровне ничего не создает"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, *args, extra={'event': event, 'fields': fields})
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                  sample_rates: Optional[Dict[str, float]] = None, stream=None) -> logging.handlers.QueueListener:
+    """Настраивает корневой логгер на асинхронную запись. Повторный вызов ничего не меняет."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        level = (level or os.environ.get('RECIPE_LOG_LEVEL') or 'INFO').upper()
+        fmt = fmt or os.environ.get('RECIPE_LOG_FORMAT') or 'text'
+        if sample_rates is None:
+            sample_rates = dict(DEFAULT_SAMPLE_RATES,
+                                **parse_sample_rates(os.environ.get('RECIPE_LOG_SAMPLE', '')))
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(logging.BASIC_FORMAT))
+
+        _queue_handler = LazyQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _queue_handler.addFilter(SamplingFilter(sample_rates))
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, output)
+        _listener.start()
+        # При выходе дописываем очередь до конца
+        atexit.register(_listener.stop)
+        # Поток записи не переживает fork: воркеру нужны своя очередь и свой поток
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        return _listener
+
+
+def _restart_after_fork():
+    global _listener
+    if _listener is None:
+        return
+    # Очередь родителя могла остаться заблокированной его потоком записи
+    atexit.unregister(_listener.stop)
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Состояние очереди логов для /stats"""
+    if _queue_handler is None:
+        return {'async': False}
+    return {'async': True, 'queued': _queue_handler.queue.qsize(), 'dropped': _queue_handler.dropped}
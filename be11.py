@@ -1,647 +1,2017 @@
-import json
-import re
-import os
-from typing import Dict, List, Any, Optional, Tuple
-import logging
-import random
-NUMBER_WORDS = {
-    'первое': 1, 'первый': 1, 'первую': 1, 'первой': 1,
-    'второе': 2, 'второй': 2, 'вторую': 2, 'второй': 2,
-    'третье': 3, 'третий': 3, 'третью': 3, 'третьей': 3,
-    'четвертое': 4, 'четвертый': 4, 'четвертую': 4, 'четвертой': 4,
-    'пятое': 5, 'пятый': 5, 'пятую': 5, 'пятой': 5,
-    'шестое': 6, 'шестой': 6, 'шестую': 6, 'шестой': 6,
-    'седьмое': 7, 'седьмой': 7, 'седьмую': 7, 'седьмой': 7,
-    'восьмое': 8, 'восьмой': 8, 'восьмую': 8, 'восьмой': 8,
-    'девятое': 9, 'девятый': 9, 'девятую': 9, 'девятой': 9,
-    'десятое': 10, 'десятый': 10, 'десятую': 10, 'десятой': 10,
-    'одиннадцатое': 11, 'одиннадцатый': 11, 'одиннадцатую': 11, 'одиннадцатой': 11,
-    'двенадцатое': 12, 'двенадцатый': 12, 'двенадцатую': 12, 'двенадцатой': 12,
-    'тринадцатое': 13, 'тринадцатый': 13, 'тринадцатую': 13, 'тринадцатой': 13,
-    'четырнадцатое': 14, 'четырнадцатый': 14, 'четырнадцатую': 14, 'четырнадцатой': 14,
-    'пятнадцатое': 15, 'пятнадцатый': 15, 'пятнадцатую': 15, 'пятнадцатой': 15,
-    'шестнадцатое': 16, 'шестнадцатый': 16, 'шестнадцатую': 16, 'шестнадцатой': 16,
-    'семнадцатое': 17, 'семнадцатый': 17, 'семнадцатую': 17, 'семнадцатой': 17,
-    'восемнадцатое': 18, 'восемнадцатый': 18, 'восемнадцатую': 18, 'восемнадцатой': 18,
-    'девятнадцатое': 19, 'девятнадцатый': 19, 'девятнадцатую': 19, 'девятнадцатой': 19,
-    'двадцатое': 20, 'двадцатый': 20, 'двадцатую': 20, 'двадцатой': 20
-}
-try:
-    import pymorphy3
-    MORPH_AVAILABLE = True
-except ImportError:
-    print("pymorphy3 не установлен. Установите: pip install pymorphy3")
-    MORPH_AVAILABLE = False
-
-logging.basicConfig(level=logging.ERROR)
-
-class SmartRecipeBot:
-    def __init__(self, recipes_file: str = "recipes.json"):
-        self.recipes = self.load_recipes(recipes_file)
-        self.last_search_results = []
-        self.last_shown_recipe = None
-        self.conversation_context = []
-        self.session_state = {
-            'previous_recipes': [],
-            'current_intent': None,
-            'search_query': None,
-            'waiting_for_selection': False,
-            'current_page': 0,
-            'all_search_results': []
-        }
-
-        # Инициализация pymorphy3
-        if MORPH_AVAILABLE:
-            self.morph = pymorphy3.MorphAnalyzer()
-            print("pymorphy3 загружен для морфологического анализа")
-        else:
-            self.morph = None
-            print("Использую упрощенный анализ без pymorphy3")
-
-        # Словарь синонимов для основных ингредиентов
-        self.synonyms = {
-            'картофель': ['картошка', 'картошечка', 'картофельный'],
-            'картошка': ['картофель', 'картошечка', 'картофельный'],
-            'гречка': ['гречневая', 'гречневый', 'гречиха'],
-            'гречневая': ['гречка', 'гречневый', 'гречиха'],
-            'рыба': ['рыбный', 'рыбка', 'рыбешка'],
-            'говядина': ['говяжий', 'говядинка'],
-            'свинина': ['свиной', 'свининка'],
-            # Убрали проблемные синонимы для риса
-            'помидор': ['томат', 'томатный'],
-            'огурец': ['огурчик', 'огурцовый'],
-            'морковь': ['морковка', 'морковный'],
-            'лук': ['луковый', 'луковица'],
-            'чеснок': ['чесночный'],
-            'перец': ['перцевый'],
-            'капуста': ['капустный'],
-            'сыр': ['сырный'],
-            'яйцо': ['яичный', 'яйца'],
-            'молоко': ['молочный'],
-            'сметана': ['сметанный'],
-            'творог': ['творожный'],
-            'мука': ['мучной'],
-            'сахар': ['сахарный'],
-            'масло': ['масляный'],
-            'соль': ['соленый'],
-            'шоколад': ['шоколадный'],
-            'мед': ['медовый'],
-            'орех': ['ореховый'],
-            'яблоко': ['яблочный'],
-            'груша': ['грушевый'],
-            'вишня': ['вишневый'],
-            'клубника': ['клубничный'],
-            'малина': ['малиновый'],
-        }
-
-        # Черный список для проблемных комбинаций
-        self.blacklisted_combinations = {
-            'рис': ['рисовый', 'рисовая', 'рисовое', 'рисовом']
-        }
-
-        print("Инициализирую кулинарного помощника...")
-        self.prepare_search_index()
-        print("Помощник готов!")
-
-    def load_recipes(self, file_path: str) -> List[Dict[str, Any]]:
-        """Загружает рецепты из JSON файла"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    print(f"Загружено {len(data)} рецептов")
-                    return data
-                else:
-                    return [data]
-        except Exception as e:
-            print(f"Ошибка загрузки: {e}")
-            return []
-
-    def prepare_search_index(self):
-        """Подготавливает поисковый индекс с нормализованными словами"""
-        print("Анализирую рецепты для поискового индекса...")
-        
-        # Собираем все уникальные слова из рецептов в нормальной форме
-        self.all_recipe_words = set()
-        self.recipe_index = {}
-        self.normalized_recipe_index = {}
-        
-        for i, recipe in enumerate(self.recipes):
-            title = recipe.get('title', '').lower()
-            ingredients = ' '.join([str(ing).lower() for ing in recipe.get('ingredients', [])])
-            tags = ' '.join(recipe.get('tags', [])).lower()
-            description = recipe.get('description', '').lower()
-            
-            # Создаем поисковый текст для рецепта
-            search_text = f"{title} {ingredients} {tags} {description}"
-            self.recipe_index[i] = search_text
-            
-            # Нормализуем слова для поиска
-            normalized_text = self.normalize_text(search_text)
-            self.normalized_recipe_index[i] = normalized_text
-            
-            # Собираем все нормализованные слова из рецептов
-            words = re.findall(r'\b\w+\b', normalized_text)
-            self.all_recipe_words.update(words)
-        
-        # Добавляем синонимы в список слов для поиска
-        for base_word, synonym_list in self.synonyms.items():
-            if base_word in self.all_recipe_words:
-                self.all_recipe_words.update(synonym_list)
-        
-        print(f"Проанализировано {len(self.all_recipe_words)} уникальных нормализованных слов")
-
-    def normalize_text(self, text: str) -> str:
-        """Приводит текст к нормальной форме"""
-        if not self.morph:
-            return text
-            
-        words = re.findall(r'\b\w+\b', text)
-        normalized_words = []
-        
-        for word in words:
-            if len(word) > 2:  # Игнорируем короткие слова
-                parsed = self.morph.parse(word)[0]
-                normal_form = parsed.normal_form
-                normalized_words.append(normal_form)
-        
-        return ' '.join(normalized_words)
-
-    def normalize_word(self, word: str) -> str:
-        """Приводит одно слово к нормальной форме"""
-        if not self.morph or len(word) <= 2:
-            return word
-            
-        try:
-            parsed = self.morph.parse(word)[0]
-            return parsed.normal_form
-        except:
-            return word
-
-    def expand_with_synonyms(self, word: str) -> List[str]:
-        """Расширяет слово синонимами"""
-        normalized_word = self.normalize_word(word)
-        
-        # Для риса возвращаем только само слово, без синонимов
-        if normalized_word == 'рис':
-            return ['рис']  # Только рис, без рисовый
-        
-        synonyms = [normalized_word]
-        
-        # Добавляем синонимы из словаря для других слов
-        if normalized_word in self.synonyms:
-            synonyms.extend(self.synonyms[normalized_word])
-        
-        # Также проверяем обратные связи
-        for base_word, synonym_list in self.synonyms.items():
-            if normalized_word in synonym_list and base_word not in synonyms:
-                synonyms.append(base_word)
-        
-        return list(set(synonyms))
-    def extract_search_terms(self, query: str) -> List[str]:
-        """Извлекает и нормализует поисковые термины с учетом синонимов"""
-        query_lower = query.lower()
-        
-        # Стоп-слова
-        stop_words = {
-            'привет', 'пока', 'спасибо', 'пожалуйста', 'давай', 'хочу', 
-            'найди', 'покажи', 'рецепт', 'сделать', 'приготовить', 'можно',
-            'что', 'как', 'где', 'когда', 'почему', 'это', 'то', 'такой',
-            'чтобы', 'ты', 'мне', 'для', 'меня', 'подскажи', 'чтото', 'что-то',
-            'нибудь', 'что-нибудь', 'найди', 'найти', 'ищи', 'поиск', 'рецепты',
-            'блюда', 'блюдо', 'чего', 'чем', 'чего-нибудь', 'чего-то', 'чтото',
-            'что-то', 'то', 'со', 'из', 'для', 'на', 'в', 'с', 'и', 'или', 'у',
-            'чего', 'чем', 'какой', 'какая', 'какое', 'какие', 'как', 'такой',
-            'грандшеф', 'гранд', 'шеф', 'давай', 'хочу', 'чтото', 'что-то'
-        }
-        
-        # Извлекаем слова из запроса и нормализуем их
-        query_words = re.findall(r'\b\w+\b', query_lower)
-        
-        # Нормализуем слова и фильтруем
-        search_terms = []
-        for word in query_words:
-            if len(word) > 2 and word not in stop_words:
-                normalized_word = self.normalize_word(word)
-                # Расширяем синонимами
-                word_variants = self.expand_with_synonyms(normalized_word)
-                
-                # Проверяем, есть ли хотя бы один вариант в рецептах
-                for variant in word_variants:
-                    if variant in self.all_recipe_words:
-                        search_terms.append(variant)
-                        break
-        
-        print(f"Нормализованные поисковые термины: {search_terms}")
-        return search_terms
-
-    def recipe_matches_search(self, recipe_idx: int, search_terms: List[str]) -> Tuple[bool, int]:
-        """Проверяет, соответствует ли рецепт поисковым терминам (по нормализованному индексу)"""
-        if not search_terms:
-            return False, 0
-            
-        normalized_recipe_text = self.normalized_recipe_index[recipe_idx]
-        recipe_title = self.recipes[recipe_idx].get('title', '').lower()
-        normalized_title = self.normalize_text(recipe_title)
-        
-        # Разбиваем текст рецепта на отдельные слова для точного поиска
-        recipe_words = set(re.findall(r'\b\w+\b', normalized_recipe_text))
-        title_words = set(re.findall(r'\b\w+\b', normalized_title))
-        
-        # Уровни совпадения:
-        # 3 - все термины в названии
-        # 2 - часть терминов в названии + остальные в рецепте
-        # 1 - все термины в рецепте (но не в названии)
-        # 0 - не совпадает
-        
-        title_matches = 0
-        all_terms_in_recipe = True
-        
-        for term in search_terms:
-            # Для риса используем специальную логику
-            if term == 'рис':
-                # Для риса ищем только прямое совпадение "рис", игнорируем "рисовый" и т.д.
-                term_found_in_title = 'рис' in title_words
-                term_found_in_recipe = 'рис' in recipe_words
-            else:
-                # Для других слов используем обычную логику с синонимами
-                term_found_in_title = term in title_words
-                term_found_in_recipe = term in recipe_words
-                
-                if not term_found_in_title:
-                    term_variants = self.expand_with_synonyms(term)
-                    term_found_in_title = any(variant in title_words for variant in term_variants)
-                
-                if not term_found_in_recipe:
-                    term_variants = self.expand_with_synonyms(term)
-                    term_found_in_recipe = any(variant in recipe_words for variant in term_variants)
-            
-            if term_found_in_title:
-                title_matches += 1
-            if not term_found_in_recipe:
-                all_terms_in_recipe = False
-        
-        if not all_terms_in_recipe:
-            return False, 0
-            
-        if title_matches == len(search_terms):
-            return True, 3  # Все термины в названии
-        elif title_matches > 0:
-            return True, 2  # Часть терминов в названии
-        else:
-            return True, 1  # Все термины только в рецепте
-
-    def find_matching_recipes(self, search_terms: List[str]) -> List[Tuple[Dict[str, Any], float]]:
-        """Находит рецепты, соответствующие поисковым терминам с правильной сортировкой"""
-        results = []
-        
-        print(f"Ищу рецепты с точными словами: {search_terms}")
-        
-        for recipe_idx in range(len(self.recipes)):
-            recipe = self.recipes[recipe_idx]
-            
-            # Проверяем соответствие поисковым терминам и получаем уровень совпадения
-            matches, match_level = self.recipe_matches_search(recipe_idx, search_terms)
-            
-            if matches:
-                # Базовый score в зависимости от уровня совпадения
-                if match_level == 3:
-                    score = 1.0  # Максимальный score для совпадения в названии
-                elif match_level == 2:
-                    score = 0.8  # Высокий score для частичного совпадения в названии
-                else:
-                    score = 0.6  # Базовый score для совпадения только в рецепте
-                
-                results.append((recipe, score))
-        
-        # Сортируем по релевантности (score)
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results
-
-    def smart_search(self, query: str) -> List[Tuple[Dict[str, Any], float]]:
-        """Умный поиск рецептов с морфологическим анализом"""
-        print(f"Анализирую запрос: '{query}'")
-
-        search_terms = self.extract_search_terms(query)
-        print(f"Поисковые термины: {search_terms}")
-
-        self.session_state['search_query'] = query
-        self.session_state['waiting_for_selection'] = False
-
-        # Обработка смены темы
-        if any(word in query.lower() for word in ['еще', 'дальше', 'следующие', 'покажи еще']):
-            if self.session_state['all_search_results']:
-                self.session_state['current_page'] += 1
-                current_page = self.session_state['current_page']
-                all_results = self.session_state['all_search_results']
-                
-                start_idx = current_page * 5
-                end_idx = start_idx + 5
-                
-                if start_idx < len(all_results):
-                    page_results = all_results[start_idx:end_idx]
-                    print(f"Показываю страницу {current_page + 1}")
-                    return page_results
-                else:
-                    print("Больше нет результатов")
-                    return []
-            else:
-                return []
-
-        # Новый поиск
-        results = self.find_matching_recipes(search_terms)
-        
-        # Сохраняем все результаты для пагинации
-        self.session_state['all_search_results'] = results
-        self.session_state['current_page'] = 0
-
-        print(f"Найдено {len(results)} рецептов")
-        return results[:5] if results else []
-
-    def generate_response(self, query: str, found_recipes: List[Tuple[Dict[str, Any], float]]) -> str:
-        """Генерирует ответ"""
-        self.last_search_results = found_recipes
-
-        if not found_recipes:
-            search_terms = self.extract_search_terms(query)
-            if search_terms:
-                return f"Не нашла рецептов, содержащих: {', '.join(search_terms)}"
-            else:
-                return "Не нашла подходящих рецептов. Попробуйте другие слова."
-
-        # Всегда показываем список, даже если один рецепт
-        total_results = len(self.session_state['all_search_results'])
-        current_page = self.session_state['current_page']
-        shown_count = len(found_recipes)
-        
-        # ПРАВИЛЬНО вычисляем номера для текущей страницы
-        start_number = current_page * 5 + 1
-        end_number = start_number + shown_count - 1
-        
-        return f"Нашла {total_results} рецептов (показано {start_number}-{end_number}):"
-
-    def format_recipe_response(self, recipe: Dict[str, Any]) -> str:
-        """Форматирует полный рецепт"""
-        response = f"\n\n{recipe.get('title', 'Рецепт')}\n"
-
-        if recipe.get('description'):
-            response += f"{recipe['description']}\n\n"
-
-        if recipe.get('temperature'):
-            response += f"Температура: {recipe['temperature']}\n"
-        if recipe.get('time'):
-            response += f"Время: {recipe['time']}\n"
-
-        if recipe.get('ingredients'):
-            response += "\nИнгредиенты:\n"
-            for ingredient in recipe['ingredients']:
-                response += f"  - {ingredient}\n"
-
-        if recipe.get('steps'):
-            response += "\nПриготовление:\n"
-            for i, step in enumerate(recipe['steps'], 1):
-                clean_step = re.sub(r'[▪️️♨️🔥]', '', step).strip()
-                if clean_step:
-                    response += f"  {i}. {clean_step}\n"
-
-        if recipe.get('tags'):
-            response += f"\nКатегории: {', '.join(recipe['tags'])}\n"
-        return response
-
-    def format_recipe_list(self, recipes: List[Tuple[Dict[str, Any], float]]) -> str:
-        """Форматирует список рецептов"""
-        if not recipes:
-            return ""
-
-        # Если только один рецепт, все равно показываем список для выбора
-        recipes_to_show = recipes
-        self.session_state['waiting_for_selection'] = True
-        current_page = self.session_state['current_page']
-        
-        response = []
-        for i, (recipe, score) in enumerate(recipes_to_show, 1):
-            title = recipe.get('title', 'Рецепт без названия')
-            time_info = f" ({recipe['time']})" if recipe.get('time') else ""
-            
-            # ВАЖНО: Используем глобальный номер, а не локальный для страницы
-            global_index = i + 5 * current_page
-            response.append(f"{global_index}. {title}{time_info}")
-
-        total_results = len(self.session_state['all_search_results'])
-        
-        pagination_info = f"\n\nСтраница {current_page + 1} из {((total_results - 1) // 5) + 1}"
-        navigation_info = "\nУкажите номер рецепта 1, 2, 3... или название для выбора. Напишите 'другой рецепт' для нового поиска."
-        
-        return "\n" + "\n".join(response) + pagination_info + navigation_info
-
-    def is_selection_from_list(self, message: str) -> bool:
-        """Проверяет, является ли сообщение выбором из списка"""
-        if not self.last_search_results or not self.session_state['waiting_for_selection']:
-            return False
-            
-        message_lower = message.lower().strip()
-        
-        # Игнорируем команды поиска при выборе из списка
-        search_commands = ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']
-        if any(message_lower.startswith(cmd) for cmd in search_commands):
-            return False
-            
-        # Убираем мешающие слова типа "давай", "покажи", "хочу" и т.д.
-        filter_words = ['давай', 'покажи', 'хочу', 'выбери', 'можно']
-        clean_message = message_lower
-        for word in filter_words:
-            clean_message = clean_message.replace(word, '').strip()
-        
-        # Если после очистки сообщение пустое, используем оригинальное
-        if not clean_message:
-            clean_message = message_lower
-            
-        # Получаем все результаты для проверки глобальных номеров
-        all_results = self.session_state['all_search_results']
-        
-        # Проверяем номер (цифры) - теперь проверяем глобальные номера
-        if clean_message.isdigit():
-            number = int(clean_message)
-            return 1 <= number <= len(all_results)
-        
-        # Проверяем словесные обозначения номеров (локальные на странице)
-        number_words = NUMBER_WORDS
-        
-        if clean_message in number_words:
-            number = number_words[clean_message]
-            return 1 <= number <= len(self.last_search_results)
-            
-        # Проверяем по названию (среди всех результатов)
-        for recipe, score in all_results:
-            title = recipe.get('title', '').lower()
-            
-            # Точное совпадение или частичное
-            if clean_message == title or clean_message in title:
-                return True
-                
-        return False
-
-    def select_recipe(self, selection: str) -> Optional[Dict[str, Any]]:
-        """Выбирает рецепт по номеру или названию"""
-        if not self.last_search_results:
-            return None
-
-        selection_lower = selection.lower().strip()
-
-        # Убираем мешающие слова типа "давай", "покажи", "хочу" и т.д.
-        filter_words = ['давай', 'покажи', 'хочу', 'выбери', 'можно']
-        clean_selection = selection_lower
-        for word in filter_words:
-            clean_selection = clean_selection.replace(word, '').strip()
-        
-        # Если после очистки сообщение пустое, используем оригинальное
-        if not clean_selection:
-            clean_selection = selection_lower
-
-        # Словарь словесных обозначений номеров
-        number_words = NUMBER_WORDS
-
-        # Получаем все результаты поиска и текущую страницу
-        all_results = self.session_state['all_search_results']
-        current_page = self.session_state['current_page']
-        
-        # Выбор по номеру (цифры) - теперь работаем с глобальными номерами
-        if clean_selection.isdigit():
-            selected_number = int(clean_selection)
-            
-            # Проверяем, что номер в пределах общего количества результатов
-            if 1 <= selected_number <= len(all_results):
-                # Находим рецепт по глобальному номеру
-                recipe, score = all_results[selected_number - 1]
-                self.session_state['previous_recipes'].append(recipe.get('title'))
-                self.session_state['waiting_for_selection'] = False
-                return recipe
-
-        # Выбор по словесному номеру - теперь работаем с локальными номерами на странице
-        if clean_selection in number_words:
-            local_number = number_words[clean_selection]
-            # Проверяем, что локальный номер в пределах текущей страницы
-            if 1 <= local_number <= len(self.last_search_results):
-                recipe, score = self.last_search_results[local_number - 1]
-                self.session_state['previous_recipes'].append(recipe.get('title'))
-                self.session_state['waiting_for_selection'] = False
-                return recipe
-
-        # Выбор по названию (ищем среди всех результатов)
-        for recipe, score in all_results:
-            title = recipe.get('title', '').lower()
-            
-            # Точное совпадение или частичное
-            if clean_selection == title or clean_selection in title:
-                self.session_state['previous_recipes'].append(recipe.get('title'))
-                self.session_state['waiting_for_selection'] = False
-                return recipe
-
-        return None
-
-    def process_message(self, message: str) -> str:
-        """Обрабатывает сообщение пользователя"""
-        if not message.strip():
-            return "Пожалуйста, опишите, что вы хотите приготовить."
-
-        message_lower = message.lower().strip()
-
-        # Выход из режима выбора по фразе "другой рецепт"
-        if self.session_state['waiting_for_selection'] and any(word in message_lower for word in ['другой', 'новый', 'искать', 'поиск', 'найди']):
-            self.session_state['waiting_for_selection'] = False
-            self.session_state['all_search_results'] = []
-            # Если начинается с команды поиска - выполняем поиск
-            if any(message_lower.startswith(cmd) for cmd in ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']):
-                clean_query = message_lower
-                for cmd in ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']:
-                    clean_query = clean_query.replace(cmd, '').strip()
-                
-                recipes = self.smart_search(clean_query)
-                if recipes:
-                    main_response = self.generate_response(clean_query, recipes)
-                    recipes_formatted = self.format_recipe_list(recipes)
-                    return f"{main_response}{recipes_formatted}"
-                else:
-                    return "Не нашла подходящих рецептов. Попробуйте другие слова."
-            else:
-                return "Хорошо, давайте поищем другой рецепт. Напишите что вы хотите приготовить."
-
-        # Если в режиме выбора - проверяем выбор
-        if self.session_state['waiting_for_selection'] and self.is_selection_from_list(message):
-            selected_recipe = self.select_recipe(message)
-            if selected_recipe:
-                self.last_shown_recipe = selected_recipe.get('title')
-                return self.format_recipe_response(selected_recipe)
-            else:
-                return "Рецепт не найден. Выберите номер или название из списка."
-
-        # Простые команды
-        if message_lower in ['привет', 'здравствуйте', 'начать']:
-            return "Привет! Я ваш кулинарный помощник. Для поиска рецептов начните сообщение со слов: найди, грандшеф найди, или просто укажите что вы хотите приготовить."
-        
-        if message_lower in ['пока', 'выход', 'до свидания']:
-            return "До свидания! Приятного аппетита!"
-
-        # Проверяем, содержит ли запрос команду для поиска
-        search_commands = ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']
-        has_search_command = any(message_lower.startswith(cmd) for cmd in search_commands)
-        
-        # Если нет команды поиска и не в режиме выбора - подсказка
-        if not has_search_command and not self.session_state['waiting_for_selection']:
-            return "Для поиска рецептов начните сообщение со слов: 'найди', 'грандшеф найди' или укажите что вы хотите приготовить."
-
-        # Убираем команды поиска из запроса для чистого анализа
-        clean_query = message_lower
-        for cmd in search_commands:
-            clean_query = clean_query.replace(cmd, '').strip()
-
-        # Поиск рецептов
-        recipes = self.smart_search(clean_query)
-        if recipes:
-            main_response = self.generate_response(clean_query, recipes)
-            recipes_formatted = self.format_recipe_list(recipes)
-            return f"{main_response}{recipes_formatted}"
-        else:
-            return "Не нашла подходящих рецептов. Попробуйте другие слова."
-
-    def run_chat(self):
-        """Запускает интерактивный чат"""
-        print("\n" + "=" * 60)
-        print("КУЛИНАРНЫЙ ПОМОЩНИК - УМНЫЙ ПОИСК РЕЦЕПТОВ")
-        print("=" * 60)
-        print(f"Загружено рецептов: {len(self.recipes)}")
-        if MORPH_AVAILABLE:
-            print("Использую морфологический анализ для поиска")
-            print("Понимает разные формы слов: курицу, курицей, курочка -> курица")
-        print("\nИНСТРУКЦИЯ:")
-        print("1. Для поиска начните сообщение с: 'найди', 'грандшеф найди'")
-        print("2. Примеры: 'найди курицу с картошкой', 'грандшеф найди шоколадный торт'")
-        print("3. При выборе из списка можно:")
-        print("   - Указать номер рецепта (1, 2, 3...)")
-        print("   - Написать название рецепта (без 'найди')")
-        print("   - Написать 'другой рецепт' или 'найди ...' для нового поиска")
-        print("4. Для продолжения поиска: 'покажи еще'")
-        print("=" * 60)
-        print("Начните с команды 'найди' и укажите что хотите приготовить...")
-
-        while True:
-            try:
-                user_input = input("\nВы: ").strip()
-
-                if user_input.lower() in ['пока', 'выход', 'до свидания', 'закончить']:
-                    print(f"\nБот: До свидания! Приятного аппетита!")
-                    break
-
-                response = self.process_message(user_input)
-                print(f"\nБот: {response}")
-
-            except KeyboardInterrupt:
-                print(f"\nБот: До свидания! Приятного аппетита!")
-                break
-            except Exception as e:
-                print(f"\nБот: Извините, произошла ошибка. Попробуйте еще раз.")
-                logging.error(f"Error: {e}")
-
-if __name__ == "__main__":
-    bot = SmartRecipeBot("recipes.json")
+import json
+import re
+import os
+import hashlib
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import logging
+import random
+import itertools
+import math
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+import numpy as np
+NUMBER_WORDS = {
+    'первое': 1, 'первый': 1, 'первую': 1, 'первой': 1,
+    'второе': 2, 'второй': 2, 'вторую': 2, 'второй': 2,
+    'третье': 3, 'третий': 3, 'третью': 3, 'третьей': 3,
+    'четвертое': 4, 'четвертый': 4, 'четвертую': 4, 'четвертой': 4,
+    'пятое': 5, 'пятый': 5, 'пятую': 5, 'пятой': 5,
+    'шестое': 6, 'шестой': 6, 'шестую': 6, 'шестой': 6,
+    'седьмое': 7, 'седьмой': 7, 'седьмую': 7, 'седьмой': 7,
+    'восьмое': 8, 'восьмой': 8, 'восьмую': 8, 'восьмой': 8,
+    'девятое': 9, 'девятый': 9, 'девятую': 9, 'девятой': 9,
+    'десятое': 10, 'десятый': 10, 'десятую': 10, 'десятой': 10,
+    'одиннадцатое': 11, 'одиннадцатый': 11, 'одиннадцатую': 11, 'одиннадцатой': 11,
+    'двенадцатое': 12, 'двенадцатый': 12, 'двенадцатую': 12, 'двенадцатой': 12,
+    'тринадцатое': 13, 'тринадцатый': 13, 'тринадцатую': 13, 'тринадцатой': 13,
+    'четырнадцатое': 14, 'четырнадцатый': 14, 'четырнадцатую': 14, 'четырнадцатой': 14,
+    'пятнадцатое': 15, 'пятнадцатый': 15, 'пятнадцатую': 15, 'пятнадцатой': 15,
+    'шестнадцатое': 16, 'шестнадцатый': 16, 'шестнадцатую': 16, 'шестнадцатой': 16,
+    'семнадцатое': 17, 'семнадцатый': 17, 'семнадцатую': 17, 'семнадцатой': 17,
+    'восемнадцатое': 18, 'восемнадцатый': 18, 'восемнадцатую': 18, 'восемнадцатой': 18,
+    'девятнадцатое': 19, 'девятнадцатый': 19, 'девятнадцатую': 19, 'девятнадцатой': 19,
+    'двадцатое': 20, 'двадцатый': 20, 'двадцатую': 20, 'двадцатой': 20
+}
+from morphology import MORPH_AVAILABLE, get_morph_analyzer
+from metrics import STAGE_SECONDS
+from index_snapshot import DeleteIndex, PostingMap, read_snapshot, write_snapshot
+from async_logging import setup_logging
+from recipe_store import (LAZY_RECIPE_FIELDS, RecipeStore, encode_store, is_recipe_store,
+                          recipes_data_error, write_atomic)
+
+logger = logging.getLogger(__name__)
+
+
+class LemmaCache:
+    """Потокобезопасный LRU-кэш нормальных форм слов с ограничением по размеру"""
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, word: str) -> Optional[str]:
+        """Возвращает лемму из кэша или None"""
+        with self._lock:
+            lemma = self._data.get(word)
+            if lemma is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(word)
+            self.hits += 1
+            return lemma
+
+    def put(self, word: str, lemma: str):
+        """Сохраняет лемму, вытесняя самые давно использованные слова"""
+        with self._lock:
+            self._data[word] = lemma
+            self._data.move_to_end(word)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Очищает кэш и счетчики"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша для мониторинга"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# Общий кэш лемм для всех экземпляров бота: переживает перезагрузку рецептов
+LEMMA_CACHE = LemmaCache()
+
+# Поколение индекса: увеличивается при каждой (пере)загрузке рецептов
+_index_generations = itertools.count(1)
+_index_generation_lock = threading.Lock()
+
+
+def next_index_generation() -> int:
+    """Выдает номер нового поколения поискового индекса"""
+    with _index_generation_lock:
+        return next(_index_generations)
+
+
+# Снимок поискового индекса на диске (формат в index_snapshot.py): поле -> вид хранения
+INDEX_SNAPSHOT_MAGIC = b'RCPIDX'
+INDEX_SNAPSHOT_VERSION = 10
+INDEX_SNAPSHOT_FIELDS = {
+    'all_recipe_words': 'set',
+    'title_postings': 'postings', 'body_postings': 'postings',
+    'bm25_term_slices': 'json', 'bm25_doc_ids': 'array', 'bm25_weighted_tf': 'array', 'bm25_idf': 'json',
+    'fuzzy_deletes': 'deletes',
+    'facet_minutes': 'array', 'facet_temperature': 'array',
+    'facet_mode_bits': 'arrays', 'facet_tag_bits': 'arrays', 'facet_tag_lemmas': 'json',
+    'ingredient_ids': 'json', 'recipe_ingredient_offsets': 'array', 'recipe_ingredient_values': 'array',
+    'ingredient_posting_offsets': 'array', 'ingredient_posting_values': 'array',
+    'recipe_required_counts': 'array',
+    'tfidf_weights': 'array', 'tfidf_term_bounds': 'array', 'tfidf_posting_terms': 'array',
+    'tfidf_doc_order': 'array', 'tfidf_doc_offsets': 'array',
+    'similar_recipes': 'array',
+}
+
+# Исправление опечаток и ошибок распознавания речи (словарь удалений SymSpell)
+FUZZY_MAX_DISTANCE = 2
+
+
+def fuzzy_budget(word: str) -> int:
+    """Допустимое число правок для слова: короткие слова не исправляем"""
+    if len(word) < 4:
+        return 0
+    if len(word) < 6:
+        return 1
+    return FUZZY_MAX_DISTANCE
+
+
+def word_deletes(word: str, max_distance: int) -> set:
+    """Все варианты слова с удалением до max_distance букв"""
+    deletes = set()
+    level = {word}
+    for _ in range(max_distance):
+        level = {variant[:i] + variant[i + 1:] for variant in level for i in range(len(variant))}
+        deletes.update(level)
+    return deletes
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Расстояние Дамерау-Левенштейна (с перестановкой соседних букв) с ранним выходом"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Общие начало и конец слов на расстояние не влияют
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return max(len(a), len(b))
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Длина общего начала двух слов"""
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+# Фасеты: режимы Грандшефа, время приготовления, температура и категории
+KNOWN_MODES = ('AIR CRISP', 'DEEP FRY', 'SMART COOK', 'DEHYDRATE', 'MANUAL', 'ROAST', 'BAKE', 'GRILL', 'BBQ', 'PIZZA', 'STEAM')
+MODE_RE = re.compile('|'.join(re.escape(mode) for mode in KNOWN_MODES + ('MUNUAL',)))
+# Кириллические буквы, которые в поле mode часто стоят вместо латинских
+MODE_LOOKALIKES = str.maketrans('АВЕКМНОРСТХ', 'ABEKMHOPCTX')
+# Русские названия режимов в запросе: "в режиме гриль"
+MODE_ALIASES = {
+    'роаст': 'ROAST', 'роуст': 'ROAST', 'бейк': 'BAKE', 'выпекание': 'BAKE', 'гриль': 'GRILL',
+    'барбекю': 'BBQ', 'пицца': 'PIZZA', 'пар': 'STEAM', 'пару': 'STEAM', 'мануал': 'MANUAL',
+    'ручной': 'MANUAL', 'фритюр': 'DEEP FRY', 'дегидратор': 'DEHYDRATE', 'сушка': 'DEHYDRATE',
+    'аэрогриль': 'AIR CRISP', 'аэрофритюр': 'AIR CRISP',
+}
+MODE_ALIAS_RE = re.compile(r'\bв?\s*режиме?\s+(' + '|'.join(MODE_ALIASES) + r')\b')
+TIME_VALUE_RE = re.compile(r'(\d+)(?:\s*[-–]\s*(\d+))?\s*(ч|мин)')
+TIME_LIMIT_RE = re.compile(
+    r'\b(?P<op>до|не больше|не более|не дольше|меньше|менее|за|от|больше|более|дольше|свыше)\s+'
+    r'(?:(?P<value>\d+)\s*(?P<unit>минут\w*|мин\w*|час\w*|ч\b)|(?P<word>полчаса|полтора часа|часа|час)\b)'
+)
+# Диапазон "от 30 до 60 минут", "от 30 минут до 1 часа": единица нижней границы необязательна
+TIME_UNIT_PATTERN = r'(?:минут\w*|мин\w*|час\w*|ч\b)'
+TIME_RANGE_RE = re.compile(
+    rf'\bот\s+(?P<low>\d+)\s*(?P<low_unit>{TIME_UNIT_PATTERN})?\s+до\s+(?P<high>\d+)\s*(?P<unit>{TIME_UNIT_PATTERN})'
+)
+TIME_WORDS = {'полчаса': 30, 'полтора часа': 90, 'часа': 60, 'час': 60}
+QUICK_RE = re.compile(r'\bбыстр\w*')
+QUICK_MAX_MINUTES = 30
+TEMPERATURE_LIMIT_RE = re.compile(r'(?:\b(?P<op>до|не выше|от|выше|при)\s+)?(?P<value>\d{2,3})\s*(?:°\s*c?|градус\w*)')
+TEMPERATURE_RANGE_RE = re.compile(r'\bот\s+(?P<low>\d{2,3})\s+до\s+(?P<high>\d{2,3})\s*(?:°\s*c?|градус\w*)')
+TAG_RE = re.compile(r'\b(?:из\s+)?(?:категори\w*|раздел\w*|тег\w*)\s+(\w+)')
+
+
+def parse_modes(text: Optional[str]) -> List[str]:
+    """Выделяет режимы Грандшефа из поля mode ("BAKEROASTBAKE" -> BAKE, ROAST)"""
+    if not text:
+        return []
+    modes = MODE_RE.findall(str(text).upper().translate(MODE_LOOKALIKES))
+    return sorted({'MANUAL' if mode == 'MUNUAL' else mode for mode in modes})
+
+
+def parse_minutes(text: Optional[str]) -> float:
+    """Переводит время приготовления в минуты ("15-20 минут" -> 20, "2 часа 10 минут" -> 130)"""
+    if not text or len(text) > 40:
+        return math.nan
+    total = 0
+    for start, end, unit in TIME_VALUE_RE.findall(text.lower()):
+        # Для диапазона берем верхнюю границу, чтобы фильтр "до N минут" не обманывал
+        value = int(end or start)
+        total += value * 60 if unit == 'ч' else value
+    return float(total) if total else math.nan
+
+
+def parse_temperature(text: Optional[str]) -> float:
+    """Переводит температуру в градусы Цельсия ("180 °C" -> 180)"""
+    match = re.search(r'\d+', text or '')
+    if not match or not 40 <= int(match.group()) <= 300:
+        return math.nan
+    return float(match.group())
+
+
+# Поиск по имеющимся продуктам: "что приготовить из курицы, картошки и сметаны"
+INGREDIENT_QUERY_RE = re.compile(
+    r'^(?:(?:что|чего)\s+(?:можно\s+)?(?:приготовить|сделать)\s+из|у меня (?:есть|остались|осталось)|'
+    r'из того,? что есть:?)\s+(?P<items>.+)$'
+)
+# Название ингредиента заканчивается на количестве, тире или пояснении
+INGREDIENT_NAME_RE = re.compile(r'^[^—–:(\d]*?(?=\s[-—–]|[—–:(\d]|-\d|$)')
+# Слова-меры и уточнения, которые не являются ингредиентом
+INGREDIENT_SKIP_WORDS = {
+    'щепотка', 'микс', 'смесь', 'филе', 'веточка', 'зубчик', 'штука', 'пучок', 'стакан', 'ложка',
+    'упаковка', 'пачка', 'кусок', 'кусочек', 'лист', 'вкус', 'жарка', 'смазывание', 'форма',
+}
+# Прилагательные, по которым в списке ингредиентов узнается продукт ("куриное филе")
+INGREDIENT_ADJECTIVES = {'куриный': 'курица', 'индюшиный': 'индейка', 'телячий': 'телятина', 'бараний': 'баранина'}
+# Продукты, которые есть почти у всех: их отсутствие не считаем недостающим ингредиентом
+PANTRY_INGREDIENTS = {'соль', 'перец', 'вода', 'масло', 'сахар', 'специя', 'приправа'}
+
+
+# Похожие рецепты: сколько соседей хранить и до какого размера корпуса считать таблицу сразу
+SIMILAR_TOP_K = 10
+SIMILAR_PRECOMPUTE_LIMIT = 5000
+SIMILAR_RE = re.compile(r'\bпохож\w*')
+
+# Этапы построения бота по порядку (для отчета о готовности при запуске)
+BUILD_STAGES = ('recipes', 'morphology', 'snapshot', 'postings', 'bm25f', 'fuzzy', 'facets',
+                'ingredients', 'similar', 'save', 'ready')
+
+# Версия курсора поиска, который передается через state.session Алисы
+SESSION_CURSOR_VERSION = 1
+# Фасеты, которые может нести курсор: числовые ограничения и наборы значений
+CURSOR_NUMBER_FACETS = ('max_minutes', 'min_minutes', 'temperature', 'max_temperature', 'min_temperature')
+CURSOR_SET_FACETS = ('modes', 'tags')
+
+
+def is_cursor_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def cursor_facet(name: Any, value: Any) -> Tuple[str, Any]:
+    """Проверяет фасет из курсора клиента и приводит его к виду ключа запроса"""
+    if name in CURSOR_NUMBER_FACETS and is_cursor_int(value):
+        return name, value
+    if name in CURSOR_SET_FACETS and isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return name, tuple(value)
+    raise ValueError(f"недопустимый фасет в курсоре: {name!r}")
+
+
+# Режимы ранжирования: три уровня совпадения (как раньше) или BM25F по полям рецепта
+RANKING_MODES = ('levels', 'bm25f')
+
+# Поля BM25F и их веса/нормализация длины
+BM25F_FIELDS = ('title', 'ingredients', 'tags', 'description')
+BM25F_WEIGHTS = {'title': 3.0, 'ingredients': 1.5, 'tags': 1.0, 'description': 0.5}
+BM25F_B = {'title': 0.5, 'ingredients': 0.75, 'tags': 0.3, 'description': 0.75}
+BM25F_K1 = 1.2
+
+
+class SearchCursor:
+    """Ленивый курсор по результатам поиска: ранжирует только запрошенные страницы"""
+
+    def __init__(self, recipes: List[Dict[str, Any]], candidates: np.ndarray, scores: np.ndarray):
+        # candidates - номера рецептов по возрастанию, scores - их релевантность
+        self.recipes = recipes
+        self.candidates = candidates
+        self.scores = scores
+        self._ranked = np.zeros(0, dtype=np.int64)
+        self._remaining = np.arange(len(candidates))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def __iter__(self):
+        return iter(self[:len(self)])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            self._rank_until(stop)
+            return [self._item(position) for position in self._ranked[start:stop:step]]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("SearchCursor index out of range")
+        self._rank_until(key + 1)
+        return self._item(self._ranked[key])
+
+    def _item(self, position: int) -> Tuple[Dict[str, Any], float]:
+        return self.recipes[self.candidates[position]], float(self.scores[position])
+
+    def _rank_until(self, count: int):
+        """Доранжирует результаты, пока их не станет хотя бы count (без полной сортировки)"""
+        with self._lock:
+            need = count - len(self._ranked)
+            remaining = self._remaining
+            if need <= 0 or not len(remaining):
+                return
+            if need < len(remaining):
+                # Отбираем need лучших за O(n): все строго выше порога плюс часть равных порогу
+                scores = self.scores[remaining]
+                threshold = np.partition(scores, len(scores) - need)[len(scores) - need]
+                keep = scores <= threshold
+                above = np.flatnonzero(~keep)
+                # При равном score раньше идет рецепт, стоящий раньше в корпусе
+                ties = np.flatnonzero(scores == threshold)[:need - len(above)]
+                keep[ties] = False
+                chosen = remaining[np.concatenate((above, ties))]
+                self._remaining = remaining[keep]
+            else:
+                chosen = remaining
+                self._remaining = remaining[:0]
+            order = np.lexsort((self.candidates[chosen], -self.scores[chosen]))
+            self._ranked = np.concatenate((self._ranked, chosen[order]))
+
+
+class QueryCacheEntry:
+    """Результат поиска в кэше: курсор по рецептам и уже отрисованные страницы списка"""
+
+    def __init__(self, cursor: 'SearchCursor'):
+        self.cursor = cursor
+        self.pages = {}
+        self.memory_bytes = cursor.candidates.nbytes + cursor.scores.nbytes
+
+    def add_page(self, page: int, text: str):
+        self.pages[page] = text
+        self.memory_bytes += sys.getsizeof(text)
+
+
+class QueryResultCache:
+    """LRU-кэш результатов поиска по каноническому набору терминов.
+
+    Хранит и пустые результаты (негативное кэширование). Записи относятся
+    к одному поколению индекса: при появлении нового поколения кэш сбрасывается.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_generation(self, generation: int) -> bool:
+        """Сбрасывает кэш при новом поколении; False - запрос от устаревшего индекса"""
+        if generation > self.generation:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.generation = generation
+        return generation == self.generation
+
+    def get(self, generation: int, key: tuple) -> Optional[QueryCacheEntry]:
+        with self._lock:
+            entry = self._data.get(key) if self._check_generation(generation) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, generation: int, key: tuple, cursor: 'SearchCursor') -> QueryCacheEntry:
+        entry = QueryCacheEntry(cursor)
+        with self._lock:
+            if not self._check_generation(generation):
+                return entry
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def add_page(self, entry: QueryCacheEntry, page: int, text: str):
+        with self._lock:
+            entry.add_page(page, text)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша для мониторинга"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'generation': self.generation,
+                'entries': len(self._data),
+                'negative_entries': sum(1 for entry in self._data.values() if not len(entry.cursor)),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / total if total else 0.0,
+                'memory_bytes': sum(entry.memory_bytes for entry in self._data.values()),
+            }
+
+
+# Общий кэш результатов поиска для всех пользователей
+QUERY_CACHE = QueryResultCache()
+
+
+# Основные поля записи рецепта; редкие поля парсеров уходят в extra
+RECIPE_FIELDS = ('title', 'ingredients', 'mode', 'temperature', 'time', 'tags', 'for_airfryer', 'description')
+_MISSING = object()
+
+
+class RecipeRecord:
+    """Компактная запись рецепта со слотами вместо словаря.
+    
+    Повторяющиеся строки (категории, режимы, время, температура) интернированы,
+    шаги и исходный текст не хранятся в памяти и читаются из RecipeStore по номеру.
+    Поддерживает чтение как словарь: get, [], in, keys.
+    """
+    __slots__ = RECIPE_FIELDS + ('extra', 'store', 'number')
+
+    def __init__(self, data: Dict[str, Any], store: RecipeStore, number: int):
+        for field in RECIPE_FIELDS:
+            value = data.get(field, _MISSING)
+            if isinstance(value, str) and field != 'title':
+                value = sys.intern(value)
+            elif isinstance(value, list):
+                value = tuple(sys.intern(item) if field == 'tags' and isinstance(item, str) else item
+                              for item in value)
+            setattr(self, field, value)
+        extra = {key: value for key, value in data.items()
+                 if key not in RECIPE_FIELDS and key not in LAZY_RECIPE_FIELDS}
+        self.extra = extra or None
+        self.store = store
+        self.number = number
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in RECIPE_FIELDS:
+            value = getattr(self, key)
+        elif key in LAZY_RECIPE_FIELDS:
+            value = self.store.body(self.number).get(key, _MISSING)
+        elif self.extra:
+            value = self.extra.get(key, _MISSING)
+        else:
+            value = _MISSING
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> List[str]:
+        keys = [field for field in RECIPE_FIELDS if getattr(self, field) is not _MISSING]
+        return keys + list(self.store.body(self.number)) + list(self.extra or ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Полный рецепт в виде словаря (с подгруженными большими полями)"""
+        return self.store.get(self.number)
+
+
+def open_recipe_store(file_path: str, strict: bool = False) -> RecipeStore:
+    """Открывает рецепты как бинарное хранилище.
+    
+    Для recipes.json рядом держится его копия в формате хранилища (recipes.json.store)
+    с хэшем исходного файла: пока JSON не менялся, при запуске он не разбирается.
+    С strict=True пустой или не того вида файл (например, недописанный парсером)
+    отклоняется с ValueError - проверка идет по уже разобранным данным.
+    """
+    if is_recipe_store(file_path):
+        store = RecipeStore(file_path)
+        if strict and not len(store):
+            store.close()
+            raise ValueError("хранилище пустое")
+        return store
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    content_hash = hashlib.sha256(raw).digest()
+    store_path = f"{file_path}.store"
+    store = RecipeStore.open_matching(store_path, content_hash)
+    if store is not None:
+        return store
+    data = json.loads(raw.decode('utf-8'))
+    del raw
+    error = recipes_data_error(data) if strict else None
+    if error:
+        raise ValueError(error)
+    encoded = encode_store(data if isinstance(data, list) else [data], content_hash)
+    try:
+        write_atomic(store_path, encoded)
+        return RecipeStore(store_path)
+    except OSError as e:
+        # Каталог только для чтения - держим хранилище в памяти
+        logger.warning("Не удалось сохранить хранилище рецептов: %s", e)
+        return RecipeStore(data=encoded)
+
+
+def load_recipe_records(file_path: str, strict: bool = False) -> Tuple[List[RecipeRecord], bytes]:
+    """Загружает рецепты в компактные записи и возвращает их вместе с хэшем содержимого"""
+    store = open_recipe_store(file_path, strict)
+    records = [RecipeRecord(head, store, number) for number, head in enumerate(store.heads())]
+    return records, store.content_hash
+
+
+class ConversationSession:
+    """Состояние диалога одного пользователя Алисы"""
+
+    # Сколько последних открытых рецептов помнить
+    PREVIOUS_RECIPES_LIMIT = 20
+
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        self.last_search_results = []
+        self.last_shown_recipe = None
+        # Неотправленные части длинного ответа: вебхук выдает их по команде "далее"
+        self.pending_parts = []
+        self.state = {
+            'previous_recipes': deque(maxlen=self.PREVIOUS_RECIPES_LIMIT),
+            'current_intent': None,
+            'search_query': None,
+            'search_trace': None,
+            'waiting_for_selection': False,
+            'current_page': 0,
+            'all_search_results': [],
+            'query_cache_entry': None,
+            'query_key': None,
+            'last_shown_recipe_ref': None
+        }
+
+
+class SessionStore:
+    """Хранилище сессий по session_id Алисы с TTL и вытеснением давно неактивных.
+
+    Ограничение памяти задается числом сессий: курсоры с результатами поиска
+    общие с кэшем запросов, поэтому сессия занимает примерно постоянный объем.
+    """
+
+    def __init__(self, ttl: float = 1800, max_sessions: int = 10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, session_id: str) -> ConversationSession:
+        """Возвращает сессию пользователя, создавая новую при необходимости"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_access > self.ttl:
+                del self._sessions[session_id]
+                self.expirations += 1
+                session = None
+            if session is None:
+                session = self._sessions[session_id] = ConversationSession(session_id)
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return session
+
+    def drop(self, session_id: str):
+        """Удаляет сессию (конец диалога)"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict(self, now: float):
+        # Сессии упорядочены по последнему обращению: устаревшие и лишние - в начале
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_access > self.ttl:
+                self.expirations += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evictions += 1
+            else:
+                break
+            del self._sessions[oldest_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика сессий для мониторинга"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl': self.ttl,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+            }
+
+
+class SmartRecipeBot:
+    def __init__(self, recipes_file: str = "recipes.json", lemma_cache: Optional[LemmaCache] = None,
+                 ranking_mode: str = 'levels', query_cache: Optional[QueryResultCache] = None,
+                 session_store: Optional[SessionStore] = None,
+                 progress: Optional[Callable[[str], Any]] = None, strict: bool = False):
+        if ranking_mode not in RANKING_MODES:
+            raise ValueError(f"Неизвестный режим ранжирования: {ranking_mode}")
+        self.ranking_mode = ranking_mode
+        self.lemma_cache = lemma_cache if lemma_cache is not None else LEMMA_CACHE
+        self.query_cache = query_cache if query_cache is not None else QUERY_CACHE
+        self.correction_cache = LemmaCache(maxsize=10000)
+        self.index_generation = 0
+        self.recipes_file = recipes_file
+        self.recipes_hash = None
+        self.progress = progress
+        self.report_progress('recipes')
+        self.recipes = self.load_recipes(recipes_file, strict)
+        # Номер рецепта в корпусе по объекту рецепта (для "похожих рецептов")
+        self.recipe_numbers = {id(recipe): i for i, recipe in enumerate(self.recipes)}
+        self.conversation_context = []
+        # Состояние диалогов хранится отдельно от неизменяемого индекса:
+        # сессия привязывается к потоку на время обработки сообщения
+        self.session_store = session_store if session_store is not None else SessionStore()
+        self.default_session = ConversationSession()
+        self.local = threading.local()
+
+        # Инициализация pymorphy3
+        self.report_progress('morphology')
+        if MORPH_AVAILABLE:
+            # Один анализатор на процесс: перезагрузка не грузит словари заново
+            self.morph = get_morph_analyzer()
+            logger.info("pymorphy3 загружен для морфологического анализа")
+        else:
+            self.morph = None
+            logger.warning("Использую упрощенный анализ без pymorphy3")
+
+        # Словарь синонимов для основных ингредиентов
+        self.synonyms = {
+            'картофель': ['картошка', 'картошечка', 'картофельный'],
+            'картошка': ['картофель', 'картошечка', 'картофельный'],
+            'гречка': ['гречневая', 'гречневый', 'гречиха'],
+            'гречневая': ['гречка', 'гречневый', 'гречиха'],
+            'рыба': ['рыбный', 'рыбка', 'рыбешка'],
+            'говядина': ['говяжий', 'говядинка'],
+            'свинина': ['свиной', 'свининка'],
+            # Убрали проблемные синонимы для риса
+            'помидор': ['томат', 'томатный'],
+            'огурец': ['огурчик', 'огурцовый'],
+            'морковь': ['морковка', 'морковный'],
+            'лук': ['луковый', 'луковица'],
+            'чеснок': ['чесночный'],
+            'перец': ['перцевый'],
+            'капуста': ['капустный'],
+            'сыр': ['сырный'],
+            'яйцо': ['яичный', 'яйца'],
+            'молоко': ['молочный'],
+            'сметана': ['сметанный'],
+            'творог': ['творожный'],
+            'мука': ['мучной'],
+            'сахар': ['сахарный'],
+            'масло': ['масляный'],
+            'соль': ['соленый'],
+            'шоколад': ['шоколадный'],
+            'мед': ['медовый'],
+            'орех': ['ореховый'],
+            'яблоко': ['яблочный'],
+            'груша': ['грушевый'],
+            'вишня': ['вишневый'],
+            'клубника': ['клубничный'],
+            'малина': ['малиновый'],
+        }
+
+        # Черный список для проблемных комбинаций
+        self.blacklisted_combinations = {
+            'рис': ['рисовый', 'рисовая', 'рисовое', 'рисовом']
+        }
+        self.compile_synonym_classes()
+
+        logger.info("Инициализирую кулинарного помощника...")
+        self.prepare_search_index()
+        self.report_progress('ready')
+        logger.info("Помощник готов!")
+
+    def report_progress(self, stage: str):
+        """Сообщает наблюдателю о начале этапа построения (см. BUILD_STAGES)"""
+        if self.progress is not None:
+            self.progress(stage)
+
+    def compile_synonym_classes(self):
+        """Собирает синонимы и черный список в замкнутые классы эквивалентности лемм"""
+        # Формы из черного списка никогда не объединяются со своим базовым словом
+        blocked = {}
+        for base_word, forms in self.blacklisted_combinations.items():
+            blocked[base_word] = set(forms) | {self.normalize_word(form) for form in forms}
+
+        parent = {}
+
+        def find(word):
+            parent.setdefault(word, word)
+            while parent[word] != word:
+                parent[word] = parent[parent[word]]
+                word = parent[word]
+            return word
+
+        for base_word, synonym_list in self.synonyms.items():
+            find(base_word)
+            for synonym in synonym_list:
+                for variant in (synonym, self.normalize_word(synonym)):
+                    if variant in blocked.get(base_word, ()) or base_word in blocked.get(variant, ()):
+                        continue
+                    # Корнем класса остается слово, встреченное в словаре раньше
+                    root, other = find(base_word), find(variant)
+                    if root != other:
+                        parent[other] = root
+
+        classes = {}
+        for word in parent:
+            classes.setdefault(find(word), set()).add(word)
+
+        # Лемма -> ключ класса (для списков вхождений) и лемма -> все слова класса
+        self.synonym_class_key = {}
+        self.synonym_classes = {}
+        for root, members in classes.items():
+            members = frozenset(members)
+            for word in members:
+                self.synonym_class_key[word] = root
+                self.synonym_classes[word] = members
+
+    def synonym_class(self, word: str) -> str:
+        """Ключ класса синонимов для нормализованного слова"""
+        return self.synonym_class_key.get(word, word)
+
+    @property
+    def session(self) -> ConversationSession:
+        """Сессия, обрабатываемая в текущем потоке (без session_id - общая для консольного чата)"""
+        return getattr(self.local, 'session', None) or self.default_session
+
+    @property
+    def session_state(self) -> Dict[str, Any]:
+        return self.session.state
+
+    @property
+    def last_search_results(self) -> List[Tuple[Dict[str, Any], float]]:
+        return self.session.last_search_results
+
+    @last_search_results.setter
+    def last_search_results(self, results: List[Tuple[Dict[str, Any], float]]):
+        self.session.last_search_results = results
+
+    @property
+    def last_shown_recipe(self) -> Optional[str]:
+        return self.session.last_shown_recipe
+
+    @last_shown_recipe.setter
+    def last_shown_recipe(self, title: Optional[str]):
+        self.session.last_shown_recipe = title
+
+    @contextmanager
+    def bound_session(self, session: ConversationSession):
+        """Привязывает сессию к текущему потоку"""
+        previous = getattr(self.local, 'session', None)
+        self.local.session = session
+        try:
+            yield session
+        finally:
+            self.local.session = previous
+
+    @contextmanager
+    def stage(self, name: str):
+        """Замеряет этап обработки сообщения (для /metrics), метка - намерение текущего сообщения"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, name,
+                                  self.session_state['current_intent'] or 'other')
+
+    def load_recipes(self, file_path: str, strict: bool = False) -> List[RecipeRecord]:
+        """Загружает рецепты из JSON файла.
+        
+        С strict=True ошибка загрузки пробрасывается: перезагрузка оставит прежний индекс.
+        """
+        try:
+            records, self.recipes_hash = load_recipe_records(file_path, strict)
+            logger.info("Загружено %d рецептов", len(records))
+            return records
+        except Exception as e:
+            if strict:
+                raise
+            logger.error("Ошибка загрузки: %s", e)
+            return []
+
+    def prepare_search_index(self):
+        """Загружает поисковый индекс из снимка на диске или строит его заново"""
+        self.report_progress('snapshot')
+        if not self.load_index_snapshot():
+            self.build_search_index()
+            self.report_progress('save')
+            self.save_index_snapshot()
+        self.index_generation = next_index_generation()
+
+    def index_snapshot_path(self) -> str:
+        """Путь к снимку индекса рядом с файлом рецептов"""
+        return f"{self.recipes_file}.idx"
+
+    def index_snapshot_key(self) -> Optional[bytes]:
+        """Ключ снимка: содержимое файла рецептов, словарь синонимов и режим анализа"""
+        if self.recipes_hash is None:
+            return None
+        key = hashlib.sha256(self.recipes_hash)
+        key.update(json.dumps([self.synonyms, self.blacklisted_combinations, MORPH_AVAILABLE],
+                              ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        return key.digest()
+
+    def load_index_snapshot(self) -> bool:
+        """Загружает индекс из снимка, если он построен для того же содержимого рецептов"""
+        key = self.index_snapshot_key()
+        path = self.index_snapshot_path()
+        if key is None or not os.path.exists(path):
+            return False
+        try:
+            payload = read_snapshot(path, INDEX_SNAPSHOT_MAGIC, INDEX_SNAPSHOT_VERSION, key, INDEX_SNAPSHOT_FIELDS)
+        except Exception as e:
+            logger.warning("Не удалось загрузить снимок индекса: %s", e)
+            return False
+        if payload is None:
+            return False
+        for field in INDEX_SNAPSHOT_FIELDS:
+            setattr(self, field, payload[field])
+        self.similar_ready = np.full(len(self.recipes), len(self.recipes) <= SIMILAR_PRECOMPUTE_LIMIT)
+        logger.info("Поисковый индекс загружен из снимка %s", path)
+        return True
+
+    def save_index_snapshot(self):
+        """Сохраняет построенный индекс рядом с файлом рецептов"""
+        key = self.index_snapshot_key()
+        if key is None:
+            return
+        payload = {field: getattr(self, field) for field in INDEX_SNAPSHOT_FIELDS}
+        try:
+            write_snapshot(self.index_snapshot_path(), INDEX_SNAPSHOT_MAGIC, INDEX_SNAPSHOT_VERSION, key,
+                           INDEX_SNAPSHOT_FIELDS, payload)
+        except Exception as e:
+            logger.warning("Не удалось сохранить снимок индекса: %s", e)
+
+    def build_search_index(self):
+        """Подготавливает поисковый индекс с нормализованными словами"""
+        logger.info("Анализирую рецепты для поискового индекса...")
+        self.report_progress('postings')
+        
+        # Собираем все уникальные слова из рецептов в нормальной форме
+        self.all_recipe_words = set()
+        # Инвертированный индекс: лемма -> список номеров рецептов (по возрастанию)
+        self.title_postings = {}
+        self.body_postings = {}
+        # Частоты классов синонимов по полям рецепта для BM25F
+        field_counts = []
+        
+        for i, recipe in enumerate(self.recipes):
+            title = recipe.get('title', '').lower()
+            ingredients = ' '.join([str(ing).lower() for ing in recipe.get('ingredients', [])])
+            tags = ' '.join(recipe.get('tags', [])).lower()
+            description = recipe.get('description', '').lower()
+            
+            # Нормализуем слова для поиска (каждое поле отдельно)
+            normalized_fields = [self.normalize_text(field) for field in (title, ingredients, tags, description)]
+            normalized_text = ' '.join(field for field in normalized_fields if field)
+            
+            field_words = [re.findall(r'\b\w+\b', field) for field in normalized_fields]
+            field_counts.append([Counter(self.synonym_class(word) for word in words) for words in field_words])
+            
+            # Собираем все нормализованные слова из рецептов
+            body_words = frozenset(re.findall(r'\b\w+\b', normalized_text))
+            title_words = frozenset(field_words[0])
+            self.all_recipe_words.update(body_words)
+            
+            # Заполняем списки вхождений по классам синонимов:
+            # body - весь текст рецепта, title - только название
+            for class_key in {self.synonym_class(word) for word in body_words}:
+                self.body_postings.setdefault(class_key, []).append(i)
+            for class_key in {self.synonym_class(word) for word in title_words}:
+                self.title_postings.setdefault(class_key, []).append(i)
+        
+        # Списки вхождений хранятся одним массивом, как и в снимке на диске
+        self.body_postings = PostingMap.from_lists(self.body_postings)
+        self.title_postings = PostingMap.from_lists(self.title_postings)
+        
+        # Добавляем синонимы в список слов для поиска
+        for word in list(self.all_recipe_words):
+            self.all_recipe_words.update(self.synonym_classes.get(word, ()))
+        
+        self.report_progress('bm25f')
+        self.build_bm25f_index(field_counts)
+        self.report_progress('fuzzy')
+        self.build_fuzzy_index()
+        self.report_progress('facets')
+        self.build_facet_index()
+        self.report_progress('ingredients')
+        self.build_ingredient_index()
+        self.report_progress('similar')
+        self.build_similarity_index()
+        
+        logger.info("Проанализировано %d уникальных нормализованных слов", len(self.all_recipe_words))
+
+    def build_bm25f_index(self, field_counts: List[List[Counter]]):
+        """Строит матрицу термин-документ для BM25F в сжатом построчном виде (CSR)"""
+        n_docs = len(field_counts)
+        n_fields = len(BM25F_FIELDS)
+        
+        # Длины полей и нормализация длины по каждому полю
+        lengths = np.zeros((n_docs, n_fields), dtype=np.float32)
+        for doc_idx, counts in enumerate(field_counts):
+            for field_idx, counter in enumerate(counts):
+                lengths[doc_idx, field_idx] = sum(counter.values())
+        avg_lengths = np.maximum(lengths.mean(axis=0), 1.0) if n_docs else np.ones(n_fields, dtype=np.float32)
+        b = np.array([BM25F_B[field] for field in BM25F_FIELDS], dtype=np.float32)
+        weights = np.array([BM25F_WEIGHTS[field] for field in BM25F_FIELDS], dtype=np.float32)
+        length_norm = 1.0 - b + b * lengths / avg_lengths
+        
+        # Собираем вхождения по классам: класс -> [(рецепт, частоты по полям)]
+        postings = {}
+        for doc_idx, counts in enumerate(field_counts):
+            for field_idx, counter in enumerate(counts):
+                for class_key, tf in counter.items():
+                    row = postings.setdefault(class_key, {}).setdefault(doc_idx, [0] * n_fields)
+                    row[field_idx] = tf
+        
+        self.bm25_term_slices = {}
+        self.bm25_idf = {}
+        doc_ids = []
+        field_tf = []
+        for class_key, docs in postings.items():
+            start = len(doc_ids)
+            for doc_idx in sorted(docs):
+                doc_ids.append(doc_idx)
+                field_tf.append(docs[doc_idx])
+            self.bm25_term_slices[class_key] = (start, len(doc_ids))
+            df = len(docs)
+            self.bm25_idf[class_key] = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        
+        self.bm25_doc_ids = np.array(doc_ids, dtype=np.int32)
+        field_tf = np.array(field_tf, dtype=np.float32).reshape(-1, n_fields)
+        # Взвешенная частота BM25F: sum_f w_f * tf_f / (1 - b_f + b_f * len_f / avglen_f)
+        if len(doc_ids):
+            self.bm25_weighted_tf = (field_tf / length_norm[self.bm25_doc_ids]) @ weights
+        else:
+            self.bm25_weighted_tf = np.zeros(0, dtype=np.float32)
+
+    def normalize_text(self, text: str) -> str:
+        """Приводит текст к нормальной форме"""
+        if not self.morph:
+            return text
+            
+        words = re.findall(r'\b\w+\b', text)
+        normalized_words = []
+        
+        for word in words:
+            if len(word) > 2:  # Игнорируем короткие слова
+                normalized_words.append(self.lemmatize(word))
+        
+        return ' '.join(normalized_words)
+
+    def lemmatize(self, word: str) -> str:
+        """Возвращает нормальную форму слова через общий кэш лемм"""
+        normal_form = self.lemma_cache.get(word)
+        if normal_form is None:
+            normal_form = self.morph.parse(word)[0].normal_form
+            self.lemma_cache.put(word, normal_form)
+        return normal_form
+
+    def normalize_word(self, word: str) -> str:
+        """Приводит одно слово к нормальной форме"""
+        if not self.morph or len(word) <= 2:
+            return word
+            
+        try:
+            return self.lemmatize(word)
+        except:
+            return word
+
+    def expand_with_synonyms(self, word: str) -> List[str]:
+        """Расширяет слово синонимами"""
+        normalized_word = self.normalize_word(word)
+        
+        # Классы синонимов уже замкнуты и учитывают черный список (рис без "рисовый")
+        synonyms = self.synonym_classes.get(normalized_word, frozenset())
+        return [normalized_word] + sorted(synonyms - {normalized_word})
+    def extract_search_terms(self, query: str) -> List[str]:
+        """Извлекает и нормализует поисковые термины с учетом синонимов"""
+        query_lower = query.lower()
+        
+        # Стоп-слова
+        stop_words = {
+            'привет', 'пока', 'спасибо', 'пожалуйста', 'давай', 'хочу', 
+            'найди', 'покажи', 'рецепт', 'сделать', 'приготовить', 'можно',
+            'что', 'как', 'где', 'когда', 'почему', 'это', 'то', 'такой',
+            'чтобы', 'ты', 'мне', 'для', 'меня', 'подскажи', 'чтото', 'что-то',
+            'нибудь', 'что-нибудь', 'найди', 'найти', 'ищи', 'поиск', 'рецепты',
+            'блюда', 'блюдо', 'чего', 'чем', 'чего-нибудь', 'чего-то', 'чтото',
+            'что-то', 'то', 'со', 'из', 'для', 'на', 'в', 'с', 'и', 'или', 'у',
+            'чего', 'чем', 'какой', 'какая', 'какое', 'какие', 'как', 'такой',
+            'грандшеф', 'гранд', 'шеф', 'давай', 'хочу', 'чтото', 'что-то',
+            'есть'
+        }
+        
+        # Извлекаем слова из запроса и нормализуем их
+        query_words = re.findall(r'\b\w+\b', query_lower)
+        
+        # Нормализуем слова и фильтруем
+        search_terms = []
+        corrections = {}
+        dropped = []
+        for word in query_words:
+            if len(word) > 2 and word not in stop_words:
+                normalized_word = self.normalize_word(word)
+                # Расширяем синонимами
+                word_variants = self.expand_with_synonyms(normalized_word)
+                
+                # Проверяем, есть ли хотя бы один вариант в рецептах
+                for variant in word_variants:
+                    if variant in self.all_recipe_words:
+                        search_terms.append(variant)
+                        break
+                else:
+                    # Слова нет в рецептах - возможно, опечатка или ошибка распознавания речи
+                    correction = self.correct_word(word, normalized_word)
+                    if correction:
+                        search_terms.append(correction)
+                        corrections[word] = correction
+                    else:
+                        dropped.append(word)
+        
+        self.session_state['search_trace'] = {
+            'query': query,
+            'terms': search_terms,
+            'corrections': corrections,
+            'dropped': dropped,
+        }
+        if corrections:
+            logger.debug("Исправлены слова: %s", corrections, extra={'event': 'search.corrections'})
+        logger.debug("Нормализованные поисковые термины: %s", search_terms, extra={'event': 'search.terms'})
+        return search_terms
+
+    def term_postings(self, term: str, postings: PostingMap) -> set:
+        """Возвращает номера рецептов, содержащих термин или его синонимы"""
+        recipe_ids = postings.get(self.synonym_class(term))
+        return set() if recipe_ids is None else set(recipe_ids.tolist())
+
+    def find_matching_recipes(self, search_terms: List[str]) -> List[Tuple[Dict[str, Any], float]]:
+        """Находит рецепты, соответствующие поисковым терминам с правильной сортировкой"""
+        return list(self.search_cursor(search_terms))
+
+    def search_cursor(self, search_terms: List[str], facets: Optional[Dict[str, Any]] = None) -> SearchCursor:
+        """Возвращает курсор по найденным рецептам, ранжирующий результаты постранично"""
+        logger.debug("Ищу рецепты с точными словами: %s", search_terms, extra={'event': 'search.exact'})
+        
+        if not search_terms:
+            if facets:
+                # Запрос только из ограничений: все рецепты, прошедшие фильтры
+                candidates = np.flatnonzero(self.facet_mask(facets))
+                return SearchCursor(self.recipes, candidates, np.ones(len(candidates)))
+            candidates, scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+        elif self.ranking_mode == 'bm25f':
+            candidates, scores = self.bm25f_scores(search_terms)
+        else:
+            candidates, scores = self.level_scores(search_terms)
+        
+        if facets:
+            keep = self.facet_mask(facets)[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+        return SearchCursor(self.recipes, candidates, scores)
+
+    def level_scores(self, search_terms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Находит рецепты со всеми терминами и оценивает их по трем уровням совпадения"""
+        # Пересекаем списки вхождений: рецепт должен содержать все термины
+        body_sets = [self.term_postings(term, self.body_postings) for term in search_terms]
+        candidates = set.intersection(*sorted(body_sets, key=len))
+        
+        # Считаем, сколько терминов встречается в названии каждого кандидата
+        title_matches = dict.fromkeys(candidates, 0)
+        for term in search_terms:
+            for recipe_idx in self.term_postings(term, self.title_postings) & candidates:
+                title_matches[recipe_idx] += 1
+        
+        candidates = np.array(sorted(candidates), dtype=np.int64)
+        matched_in_title = np.array([title_matches[idx] for idx in candidates], dtype=np.int64)
+        
+        # Базовый score в зависимости от уровня совпадения:
+        # 1.0 - все термины в названии, 0.8 - часть терминов в названии, 0.6 - только в рецепте
+        scores = np.where(matched_in_title == len(search_terms), 1.0,
+                          np.where(matched_in_title > 0, 0.8, 0.6))
+        return candidates, scores
+
+    def build_facet_index(self):
+        """Разбирает режим, время, температуру и категории в колонки и битовые множества"""
+        n_recipes = len(self.recipes)
+        self.facet_minutes = np.array([parse_minutes(recipe.get('time')) for recipe in self.recipes], dtype=np.float32)
+        self.facet_temperature = np.array([parse_temperature(recipe.get('temperature')) for recipe in self.recipes],
+                                          dtype=np.float32)
+        
+        mode_masks = {}
+        tag_masks = {}
+        for i, recipe in enumerate(self.recipes):
+            for mode in parse_modes(recipe.get('mode')):
+                mode_masks.setdefault(mode, np.zeros(n_recipes, dtype=bool))[i] = True
+            for tag in recipe.get('tags', []):
+                tag_masks.setdefault(tag.lower(), np.zeros(n_recipes, dtype=bool))[i] = True
+        
+        # Битовые множества по значениям: 1 бит на рецепт
+        self.facet_mode_bits = {mode: np.packbits(mask) for mode, mask in mode_masks.items()}
+        self.facet_tag_bits = {tag: np.packbits(mask) for tag, mask in tag_masks.items()}
+        
+        # Лемма -> категории, в названии которых она есть ("десерт" -> "десерты_и_сладости")
+        self.facet_tag_lemmas = {}
+        for tag in tag_masks:
+            for word in re.findall(r'[^\W_]+', tag):
+                if len(word) > 2:
+                    self.facet_tag_lemmas.setdefault(self.normalize_word(word), []).append(tag)
+
+    def canonical_ingredient(self, ingredient: str, pos_cache: Dict[str, Tuple[str, bool]]) -> Optional[str]:
+        """Приводит строку ингредиента к классу синонимов главного существительного"""
+        match = INGREDIENT_NAME_RE.match(ingredient.lower().strip())
+        words = [word for word in re.findall(r'[^\W\d_]+', match.group(0) if match else '') if len(word) > 2]
+        preferred = fallback = None
+        for word in words:
+            if word not in pos_cache:
+                if self.morph:
+                    parsed = self.morph.parse(word)[0]
+                    pos_cache[word] = (self.lemmatize(word), parsed.tag.POS == 'NOUN')
+                else:
+                    pos_cache[word] = (word, True)
+            lemma, is_noun = pos_cache[word]
+            lemma = INGREDIENT_ADJECTIVES.get(lemma, lemma)
+            if lemma in INGREDIENT_SKIP_WORDS:
+                continue
+            if is_noun:
+                return self.synonym_class(lemma)
+            # Прилагательное, указывающее на продукт ("куриное" -> курица), точнее прочих уточнений
+            if preferred is None and (lemma in self.synonym_class_key or lemma in INGREDIENT_ADJECTIVES.values()):
+                preferred = lemma
+            fallback = fallback or lemma
+        key = preferred or fallback
+        return self.synonym_class(key) if key else None
+
+    def build_ingredient_index(self):
+        """Строит индексы рецепт -> ингредиенты и ингредиент -> рецепты"""
+        pos_cache = {}
+        self.ingredient_ids = {}
+        recipe_ingredients = []
+        for recipe in self.recipes:
+            ids = set()
+            for ingredient in recipe.get('ingredients', []):
+                key = self.canonical_ingredient(str(ingredient), pos_cache)
+                if key:
+                    ids.add(self.ingredient_ids.setdefault(key, len(self.ingredient_ids)))
+            recipe_ingredients.append(sorted(ids))
+        
+        # Рецепт -> ингредиенты в сжатом построчном виде
+        lengths = [len(ids) for ids in recipe_ingredients]
+        self.recipe_ingredient_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self.recipe_ingredient_values = np.array([i for ids in recipe_ingredients for i in ids], dtype=np.int32)
+        
+        # Ингредиент -> рецепты: та же матрица, транспонированная сортировкой по ингредиенту
+        recipe_numbers = np.repeat(np.arange(len(recipe_ingredients)), lengths)
+        order = np.argsort(self.recipe_ingredient_values, kind='stable')
+        self.ingredient_posting_values = recipe_numbers[order].astype(np.int32)
+        counts = np.bincount(self.recipe_ingredient_values, minlength=len(self.ingredient_ids))
+        self.ingredient_posting_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        
+        # Сколько ингредиентов нужно купить, если дома нет ничего, кроме базовых продуктов
+        pantry = np.zeros(len(self.ingredient_ids), dtype=bool)
+        for key, ingredient_id in self.ingredient_ids.items():
+            pantry[ingredient_id] = key in PANTRY_INGREDIENTS
+        self.recipe_required_counts = np.add.reduceat(
+            np.append(~pantry[self.recipe_ingredient_values], False).astype(np.int32),
+            self.recipe_ingredient_offsets[:-1]) if len(recipe_ingredients) else np.zeros(0, dtype=np.int32)
+        self.recipe_required_counts[np.diff(self.recipe_ingredient_offsets) == 0] = 0
+
+    def build_similarity_index(self):
+        """Строит разреженную TF-IDF матрицу по спискам вхождений BM25F и таблицу похожих рецептов"""
+        n_recipes = len(self.recipes)
+        # Границы списка вхождений каждого термина и номер термина для каждого вхождения
+        self.tfidf_term_bounds = np.array(list(self.bm25_term_slices.values()), dtype=np.int64).reshape(-1, 2)
+        lengths = self.tfidf_term_bounds[:, 1] - self.tfidf_term_bounds[:, 0]
+        self.tfidf_posting_terms = np.repeat(np.arange(len(lengths)), lengths).astype(np.int32)
+        
+        # Вес вхождения: log(1 + взвешенная частота) * idf, затем L2-нормировка по рецепту
+        idf = np.array(list(self.bm25_idf.values()), dtype=np.float32)
+        weights = np.log1p(self.bm25_weighted_tf) * idf[self.tfidf_posting_terms]
+        norms = np.sqrt(np.bincount(self.bm25_doc_ids, weights=weights ** 2, minlength=n_recipes))
+        norms[norms == 0] = 1.0
+        self.tfidf_weights = (weights / norms[self.bm25_doc_ids]).astype(np.float32)
+        
+        # Доступ к строке рецепта: вхождения, отсортированные по номеру рецепта
+        self.tfidf_doc_order = np.argsort(self.bm25_doc_ids, kind='stable')
+        counts = np.bincount(self.bm25_doc_ids, minlength=n_recipes)
+        self.tfidf_doc_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        
+        # Для небольшого корпуса таблица соседей считается сразу, для большого - по запросу
+        self.similar_recipes = np.full((n_recipes, SIMILAR_TOP_K), -1, dtype=np.int32)
+        self.similar_ready = np.zeros(n_recipes, dtype=bool)
+        if n_recipes <= SIMILAR_PRECOMPUTE_LIMIT:
+            for recipe_idx in range(n_recipes):
+                self.similar_recipes[recipe_idx] = self.compute_similar(recipe_idx)
+            self.similar_ready[:] = True
+
+    def compute_similar(self, recipe_idx: int) -> np.ndarray:
+        """Ближайшие соседи рецепта по косинусной мере: одно разреженное умножение матрицы на вектор"""
+        row = self.tfidf_doc_order[self.tfidf_doc_offsets[recipe_idx]:self.tfidf_doc_offsets[recipe_idx + 1]]
+        bounds = self.tfidf_term_bounds[self.tfidf_posting_terms[row]]
+        # Все вхождения терминов рецепта одним массивом
+        lengths = bounds[:, 1] - bounds[:, 0]
+        postings = np.repeat(bounds[:, 0] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        similarity = np.bincount(self.bm25_doc_ids[postings],
+                                 weights=self.tfidf_weights[postings] * np.repeat(self.tfidf_weights[row], lengths),
+                                 minlength=len(self.recipes))
+        
+        # Сам рецепт и его дубликаты с тем же названием не предлагаем
+        title = self.recipes[recipe_idx].get('title', '').lower()
+        similarity[recipe_idx] = 0
+        neighbours = np.full(SIMILAR_TOP_K, -1, dtype=np.int32)
+        found = 0
+        for candidate in np.argsort(-similarity, kind='stable'):
+            if similarity[candidate] <= 0 or found == SIMILAR_TOP_K:
+                break
+            if self.recipes[candidate].get('title', '').lower() != title:
+                neighbours[found] = candidate
+                found += 1
+        return neighbours
+
+    def similar_to(self, recipe_idx: int) -> np.ndarray:
+        """Похожие рецепты из таблицы (досчитывает строку, если ее еще нет)"""
+        if not self.similar_ready[recipe_idx]:
+            self.similar_recipes[recipe_idx] = self.compute_similar(recipe_idx)
+            self.similar_ready[recipe_idx] = True
+        neighbours = self.similar_recipes[recipe_idx]
+        return neighbours[neighbours >= 0]
+
+    def similar_search(self, recipe_idx: int) -> List[Tuple[Dict[str, Any], float]]:
+        """Показывает рецепты, похожие на последний открытый"""
+        self.session_state['search_query'] = f"похожие: {self.recipes[recipe_idx].get('title', '')}"
+        self.session_state['waiting_for_selection'] = False
+        return self.start_results(('similar', (recipe_idx,), ()))
+
+    def extract_ingredient_query(self, message: str) -> Optional[List[str]]:
+        """Распознает запрос "что приготовить из ..." и возвращает ключи ингредиентов"""
+        match = INGREDIENT_QUERY_RE.match(message.lower().strip())
+        if not match:
+            return None
+        keys = []
+        for word in re.findall(r'[^\W\d_]+', match.group('items')):
+            if len(word) <= 2:
+                continue
+            key = self.synonym_class(self.normalize_word(word))
+            if key not in self.ingredient_ids:
+                correction = self.correct_word(word, self.normalize_word(word))
+                key = self.synonym_class(correction) if correction else key
+            if key in self.ingredient_ids and key not in keys:
+                keys.append(key)
+        return keys
+
+    def ingredient_coverage_cursor(self, ingredient_keys: List[str]) -> SearchCursor:
+        """Ранжирует рецепты по доле имеющихся ингредиентов и числу недостающих"""
+        logger.debug("Ищу рецепты из ингредиентов: %s", ingredient_keys, extra={'event': 'search.ingredients'})
+        user_ids = [self.ingredient_ids[key] for key in ingredient_keys if key not in PANTRY_INGREDIENTS]
+        if not user_ids:
+            return SearchCursor(self.recipes, np.zeros(0, dtype=np.int64), np.zeros(0))
+        
+        # Пересечение множеств для всех рецептов сразу: считаем попадания по спискам вхождений
+        postings = np.concatenate([
+            self.ingredient_posting_values[self.ingredient_posting_offsets[i]:self.ingredient_posting_offsets[i + 1]]
+            for i in user_ids
+        ])
+        have = np.bincount(postings, minlength=len(self.recipes))
+        candidates = np.flatnonzero(have)
+        have = have[candidates]
+        required = np.maximum(self.recipe_required_counts[candidates], have)
+        coverage = have / required
+        missing = required - have
+        
+        # Сначала полнота покрытия, затем меньше недостающих, затем больше использованных продуктов
+        scores = np.round(coverage, 4) * 1e6 - np.minimum(missing, 999) * 1e3 + np.minimum(have, 999)
+        return SearchCursor(self.recipes, candidates.astype(np.int64), scores)
+
+    def ingredient_search(self, ingredient_keys: List[str]) -> List[Tuple[Dict[str, Any], float]]:
+        """Поиск рецептов по имеющимся продуктам"""
+        self.session_state['search_query'] = ', '.join(ingredient_keys)
+        self.session_state['waiting_for_selection'] = False
+        self.session_state['search_trace'] = {'query': ', '.join(ingredient_keys), 'ingredients': ingredient_keys}
+        return self.start_results(('coverage', tuple(sorted(ingredient_keys)), ()))
+
+    def extract_facets(self, query: str) -> Tuple[Dict[str, Any], str]:
+        """Выделяет из запроса ограничения по режиму, времени, температуре и категории.
+        
+        Возвращает фасеты и запрос без распознанных ограничений.
+        """
+        query = query.lower()
+        facets = {}
+        
+        def add_limit(name, value, keep):
+            facets[name] = keep(facets[name], value) if name in facets else value
+        
+        def time_limit(match):
+            if match.group('word'):
+                minutes = TIME_WORDS[match.group('word')]
+            else:
+                minutes = to_minutes(match.group('value'), match.group('unit'))
+            if match.group('op') in ('от', 'больше', 'более', 'дольше', 'свыше'):
+                add_limit('min_minutes', minutes, max)
+            else:
+                add_limit('max_minutes', minutes, min)
+            return ' '
+        
+        def to_minutes(value, unit):
+            return int(value) * 60 if unit.startswith('ч') else int(value)
+        
+        def time_range(match):
+            # Без своей единицы нижняя граница берет единицу верхней: "от 1 до 2 часов"
+            add_limit('min_minutes', to_minutes(match.group('low'), match.group('low_unit') or match.group('unit')), max)
+            add_limit('max_minutes', to_minutes(match.group('high'), match.group('unit')), min)
+            return ' '
+        
+        def temperature_range(match):
+            add_limit('min_temperature', int(match.group('low')), max)
+            add_limit('max_temperature', int(match.group('high')), min)
+            return ' '
+        
+        def temperature_limit(match):
+            value = int(match.group('value'))
+            if match.group('op') in ('до', 'не выше'):
+                add_limit('max_temperature', value, min)
+            elif match.group('op') in ('от', 'выше'):
+                add_limit('min_temperature', value, max)
+            else:
+                facets['temperature'] = value
+            return ' '
+        
+        def tag_filter(match):
+            tags = self.facet_tag_lemmas.get(self.normalize_word(match.group(1)))
+            if not tags:
+                return match.group(0)
+            facets['tags'] = tuple(sorted(set(facets.get('tags', ())) | set(tags)))
+            return ' '
+        
+        def mode_filter(mode):
+            facets['modes'] = tuple(sorted(set(facets.get('modes', ())) | {mode}))
+            return ' '
+        
+        # Диапазоны раньше одиночных границ: иначе "от 30" осталось бы в тексте запроса
+        query = TIME_RANGE_RE.sub(time_range, query)
+        query = TIME_LIMIT_RE.sub(time_limit, query)
+        query = TEMPERATURE_RANGE_RE.sub(temperature_range, query)
+        query = TEMPERATURE_LIMIT_RE.sub(temperature_limit, query)
+        query = TAG_RE.sub(tag_filter, query)
+        query = MODE_ALIAS_RE.sub(lambda match: mode_filter(MODE_ALIASES[match.group(1)]), query)
+        query = re.sub('|'.join(re.escape(mode.lower()) for mode in KNOWN_MODES),
+                       lambda match: mode_filter(match.group(0).upper()), query)
+        if QUICK_RE.search(query):
+            add_limit('max_minutes', QUICK_MAX_MINUTES, min)
+            query = QUICK_RE.sub(' ', query)
+        
+        return facets, ' '.join(query.split())
+
+    def facet_mask(self, facets: Dict[str, Any]) -> np.ndarray:
+        """Маска рецептов, удовлетворяющих всем фасетам (побитовое И)"""
+        n_recipes = len(self.recipes)
+        bits = np.full((n_recipes + 7) // 8, 0xFF, dtype=np.uint8)
+        empty = np.zeros_like(bits)
+        
+        # Внутри одного фасета значения объединяются по ИЛИ, между фасетами - по И
+        for name, bitsets in (('modes', self.facet_mode_bits), ('tags', self.facet_tag_bits)):
+            if name in facets:
+                allowed = empty
+                for value in facets[name]:
+                    allowed = allowed | bitsets.get(value, empty)
+                bits &= allowed
+        mask = np.unpackbits(bits, count=n_recipes).astype(bool)
+        
+        # Неизвестные время и температура (NaN) не проходят числовые фильтры
+        with np.errstate(invalid='ignore'):
+            if 'max_minutes' in facets:
+                mask &= self.facet_minutes <= facets['max_minutes']
+            if 'min_minutes' in facets:
+                mask &= self.facet_minutes >= facets['min_minutes']
+            if 'temperature' in facets:
+                mask &= self.facet_temperature == facets['temperature']
+            if 'max_temperature' in facets:
+                mask &= self.facet_temperature <= facets['max_temperature']
+            if 'min_temperature' in facets:
+                mask &= self.facet_temperature >= facets['min_temperature']
+        return mask
+
+    def build_fuzzy_index(self):
+        """Строит словарь удалений SymSpell по словарю лемм рецептов"""
+        self.fuzzy_deletes = DeleteIndex.build(
+            (variant, word)
+            for word in self.all_recipe_words
+            for variant in word_deletes(word, FUZZY_MAX_DISTANCE) | {word})
+
+    def correct_word(self, word: str, normalized_word: str) -> Optional[str]:
+        """Находит ближайшую известную лемму для слова, которого нет в рецептах"""
+        cached = self.correction_cache.get(word)
+        if cached is not None:
+            return cached or None
+        
+        # Настоящие слова языка не исправляем: "торт" не должен стать "сорт"
+        if self.morph and self.morph.word_is_known(word):
+            self.correction_cache.put(word, '')
+            return None
+        best = None
+        for form in {word, normalized_word}:
+            budget = fuzzy_budget(form)
+            if not budget:
+                continue
+            candidates = set()
+            for variant in word_deletes(form, budget) | {form}:
+                candidates.update(self.fuzzy_deletes.get(variant, ()))
+            for candidate in candidates:
+                distance = edit_distance(form, candidate, budget)
+                if distance > budget:
+                    continue
+                # Ближайшее слово; при равенстве - с более длинным общим началом с тем, что
+                # сказал пользователь ("пицу" -> "пицца", а не "птица"), затем более частое
+                frequency = len(self.body_postings.get(self.synonym_class(candidate), ()))
+                rank = (distance, -common_prefix_length(word, candidate), -frequency, candidate)
+                if best is None or rank < best:
+                    best = rank
+        correction = best[-1] if best else None
+        # Словарь рецептов у каждого поколения свой, поэтому кэш исправлений хранится в боте
+        self.correction_cache.put(word, correction or '')
+        return correction
+
+    def bm25f_scores(self, search_terms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Считает BM25F только для рецептов, содержащих все термины"""
+        # Списки вхождений терминов, начиная с самого короткого
+        term_slices = []
+        for term in search_terms:
+            class_key = self.synonym_class(term)
+            start, end = self.bm25_term_slices.get(class_key, (0, 0))
+            term_slices.append((end - start, start, end, self.bm25_idf.get(class_key, 0.0)))
+        term_slices.sort()
+        
+        candidates = None
+        scores = None
+        for _, start, end, idf in term_slices:
+            doc_ids = self.bm25_doc_ids[start:end]
+            weighted_tf = self.bm25_weighted_tf[start:end]
+            if candidates is None:
+                # Самый редкий термин задает кандидатов, остальные только отсекают их
+                candidates = doc_ids.astype(np.int64)
+                term_tf = weighted_tf
+                scores = np.zeros(len(candidates), dtype=np.float32)
+            else:
+                # Семантика И: двоичный поиск кандидатов в отсортированном списке вхождений
+                positions = np.searchsorted(doc_ids, candidates)
+                positions[positions == len(doc_ids)] = 0
+                found = doc_ids[positions] == candidates if len(doc_ids) else np.zeros(len(candidates), dtype=bool)
+                candidates, scores = candidates[found], scores[found]
+                term_tf = weighted_tf[positions[found]]
+            scores += idf * term_tf / (BM25F_K1 + term_tf)
+            if not len(candidates):
+                break
+        return candidates, scores
+
+    def smart_search(self, query: str) -> List[Tuple[Dict[str, Any], float]]:
+        """Умный поиск рецептов с морфологическим анализом"""
+        logger.debug("Анализирую запрос: '%s'", query, extra={'event': 'search.query'})
+
+        # Намерение - метка для метрик этапов
+        paging = any(word in query.lower() for word in ['еще', 'дальше', 'следующие', 'покажи еще'])
+        self.session_state['current_intent'] = 'page' if paging else 'search'
+
+        # Поиск по имеющимся продуктам: "что приготовить из курицы, картошки и сметаны"
+        with self.stage('parse'):
+            ingredient_keys = self.extract_ingredient_query(query)
+        # Если ни один продукт не распознан, ищем по тексту запроса, как обычно
+        if ingredient_keys:
+            with self.stage('search'):
+                return self.ingredient_search(ingredient_keys)
+
+        # Ограничения по режиму, времени, температуре и категории ищем до разбора слов
+        with self.stage('parse'):
+            facets, text_query = self.extract_facets(query)
+            search_terms = self.extract_search_terms(text_query)
+        self.session_state['search_trace']['facets'] = facets
+        logger.debug("Поисковые термины: %s, фильтры: %s", search_terms, facets, extra={'event': 'search.facets'})
+
+        self.session_state['search_query'] = query
+        self.session_state['waiting_for_selection'] = False
+
+        # Обработка смены темы
+        if paging:
+            if self.session_state['all_search_results']:
+                self.session_state['current_page'] += 1
+                current_page = self.session_state['current_page']
+                all_results = self.session_state['all_search_results']
+                
+                start_idx = current_page * 5
+                end_idx = start_idx + 5
+                
+                if start_idx < len(all_results):
+                    # Курсор досчитывает ранжирование только для новой страницы
+                    with self.stage('search'):
+                        page_results = all_results[start_idx:end_idx]
+                    logger.debug("Показываю страницу %d", current_page + 1, extra={'event': 'search.page'})
+                    return page_results
+                else:
+                    logger.debug("Больше нет результатов", extra={'event': 'search.page'})
+                    return []
+            else:
+                return []
+
+        # Новый поиск: сначала смотрим в кэш по каноническому набору терминов
+        with self.stage('search'):
+            return self.start_results(self.canonical_query(search_terms, facets))
+
+    def start_results(self, cache_key: tuple, page: int = 0) -> List[Tuple[Dict[str, Any], float]]:
+        """Берет результаты поиска из кэша (или считает их) и возвращает страницу"""
+        cache_entry = self.query_cache.get(self.index_generation, cache_key)
+        if cache_entry is None:
+            # Курсор ранжирует только показываемые страницы
+            cache_entry = self.query_cache.put(self.index_generation, cache_key, self.cursor_for_key(cache_key))
+        results = cache_entry.cursor
+        
+        # Сохраняем все результаты для пагинации
+        self.session_state['all_search_results'] = results
+        self.session_state['query_cache_entry'] = cache_entry
+        self.session_state['query_key'] = cache_key
+        self.session_state['current_page'] = page
+
+        logger.debug("Найдено %d рецептов", len(results), extra={'event': 'search.results'})
+        return results[page * 5:page * 5 + 5] if results else []
+
+    def cursor_for_key(self, cache_key: tuple) -> SearchCursor:
+        """Строит курсор результатов по каноническому ключу запроса"""
+        kind, terms, facets = cache_key
+        if kind == 'coverage':
+            return self.ingredient_coverage_cursor(list(terms))
+        if kind == 'similar':
+            neighbours = self.similar_to(terms[0])
+            # Порядок таблицы сохраняется через убывающий score
+            scores = np.arange(len(neighbours), 0, -1, dtype=np.float64)
+            return SearchCursor(self.recipes, neighbours.astype(np.int64), scores)
+        return self.search_cursor(list(terms), dict(facets))
+
+    def cursor_index_id(self) -> Optional[str]:
+        """Идентификатор набора рецептов в курсоре; None, если рецепты не загрузились"""
+        return self.recipes_hash.hex()[:16] if self.recipes_hash is not None else None
+
+    def export_cursor(self) -> Optional[Dict[str, Any]]:
+        """Компактный курсор диалога для state.session Алисы.
+        
+        Хранит канонический ключ запроса, хеш рецептов, страницу и номер открытого рецепта:
+        этого достаточно, чтобы любой процесс продолжил "покажи еще" или выбор из списка.
+        """
+        query_key = self.session_state.get('query_key')
+        shown_generation, shown_idx = self.session_state['last_shown_recipe_ref'] or (None, None)
+        if shown_generation != self.index_generation:
+            shown_idx = None
+        index_id = self.cursor_index_id()
+        if index_id is None or (query_key is None and shown_idx is None):
+            return None
+        cursor = {'v': SESSION_CURSOR_VERSION, 'ix': index_id}
+        if query_key is not None:
+            kind, terms, facets = query_key
+            cursor['q'] = [kind, list(terms), [[name, list(value) if isinstance(value, tuple) else value]
+                                               for name, value in facets]]
+            cursor['p'] = self.session_state['current_page']
+            cursor['w'] = int(self.session_state['waiting_for_selection'])
+        if shown_idx is not None:
+            cursor['r'] = shown_idx
+        return cursor
+
+    def restore_cursor(self, cursor: Dict[str, Any]) -> bool:
+        """Восстанавливает состояние диалога из курсора, пришедшего от Алисы"""
+        # Курсор от другого набора рецептов или другой версии формата не используем
+        index_id = self.cursor_index_id()
+        if index_id is None or not isinstance(cursor, dict) or cursor.get('v') != SESSION_CURSOR_VERSION \
+                or cursor.get('ix') != index_id:
+            return False
+        # Курсор приходит от клиента: проверяем типы до того, как он попадет в поиск
+        try:
+            query_key = None
+            if 'q' in cursor:
+                kind, terms, facets = cursor['q']
+                if not isinstance(terms, list) or not isinstance(facets, list):
+                    return False
+                if kind == 'similar':
+                    if len(terms) != 1 or not is_cursor_int(terms[0]) or not 0 <= terms[0] < len(self.recipes):
+                        return False
+                elif kind in ('coverage', self.ranking_mode):
+                    if not all(isinstance(term, str) for term in terms):
+                        return False
+                    if kind == 'coverage' and not all(key in self.ingredient_ids for key in terms):
+                        return False
+                else:
+                    return False
+                query_key = (kind, tuple(terms), tuple(cursor_facet(name, value) for name, value in facets))
+                page = max(int(cursor.get('p', 0)), 0)
+            shown_idx = cursor.get('r')
+            if shown_idx is not None and not (is_cursor_int(shown_idx) and 0 <= shown_idx < len(self.recipes)):
+                return False
+            if query_key is not None:
+                self.last_search_results = self.start_results(query_key, page)
+        except (TypeError, ValueError, IndexError):
+            return False
+        
+        if query_key is not None:
+            self.session_state['waiting_for_selection'] = bool(cursor.get('w'))
+        self.session_state['last_shown_recipe_ref'] = (self.index_generation, shown_idx) if shown_idx is not None else None
+        return True
+
+    def canonical_query(self, search_terms: List[str], facets: Optional[Dict[str, Any]] = None) -> tuple:
+        """Канонический ключ запроса: режим ранжирования, отсортированные классы синонимов и фасеты"""
+        return (self.ranking_mode,
+                tuple(sorted({self.synonym_class(term) for term in search_terms})),
+                tuple(sorted((facets or {}).items())))
+
+    def generate_response(self, query: str, found_recipes: List[Tuple[Dict[str, Any], float]]) -> str:
+        """Генерирует ответ"""
+        self.last_search_results = found_recipes
+
+        if not found_recipes:
+            search_terms = self.extract_search_terms(query)
+            if search_terms:
+                return f"Не нашла рецептов, содержащих: {', '.join(search_terms)}"
+            else:
+                return "Не нашла подходящих рецептов. Попробуйте другие слова."
+
+        # Всегда показываем список, даже если один рецепт
+        total_results = len(self.session_state['all_search_results'])
+        current_page = self.session_state['current_page']
+        shown_count = len(found_recipes)
+        
+        # ПРАВИЛЬНО вычисляем номера для текущей страницы
+        start_number = current_page * 5 + 1
+        end_number = start_number + shown_count - 1
+        
+        return f"Нашла {total_results} рецептов (показано {start_number}-{end_number}):"
+
+    def format_recipe_response(self, recipe: Dict[str, Any]) -> str:
+        """Форматирует полный рецепт"""
+        response = f"\n\n{recipe.get('title', 'Рецепт')}\n"
+
+        if recipe.get('description'):
+            response += f"{recipe['description']}\n\n"
+
+        if recipe.get('temperature'):
+            response += f"Температура: {recipe['temperature']}\n"
+        if recipe.get('time'):
+            response += f"Время: {recipe['time']}\n"
+
+        if recipe.get('ingredients'):
+            response += "\nИнгредиенты:\n"
+            for ingredient in recipe['ingredients']:
+                response += f"  - {ingredient}\n"
+
+        # Шаги читаются с диска только здесь, при показе рецепта
+        steps = recipe.get('steps')
+        if steps:
+            response += "\nПриготовление:\n"
+            for i, step in enumerate(steps, 1):
+                clean_step = re.sub(r'[▪️️♨️🔥]', '', step).strip()
+                if clean_step:
+                    response += f"  {i}. {clean_step}\n"
+
+        if recipe.get('tags'):
+            response += f"\nКатегории: {', '.join(recipe['tags'])}\n"
+        return response
+
+    def list_response(self, query: str, recipes: List[Tuple[Dict[str, Any], float]]) -> str:
+        """Ответ со списком найденных рецептов"""
+        with self.stage('format'):
+            return f"{self.generate_response(query, recipes)}{self.format_recipe_list(recipes)}"
+
+    def format_recipe_list(self, recipes: List[Tuple[Dict[str, Any], float]]) -> str:
+        """Форматирует список рецептов"""
+        if not recipes:
+            return ""
+
+        # Если только один рецепт, все равно показываем список для выбора
+        recipes_to_show = recipes
+        self.session_state['waiting_for_selection'] = True
+        current_page = self.session_state['current_page']
+        
+        # Страница списка зависит только от запроса и номера страницы - берем готовую из кэша
+        cache_entry = self.session_state.get('query_cache_entry')
+        if cache_entry is None or cache_entry.cursor is not self.session_state['all_search_results']:
+            return self.render_recipe_list(recipes_to_show, current_page)
+        page_text = cache_entry.pages.get(current_page)
+        if page_text is None:
+            page_text = self.render_recipe_list(recipes_to_show, current_page)
+            self.query_cache.add_page(cache_entry, current_page, page_text)
+        return page_text
+
+    def render_recipe_list(self, recipes_to_show: List[Tuple[Dict[str, Any], float]], current_page: int) -> str:
+        """Отрисовывает страницу списка рецептов"""
+        response = []
+        for i, (recipe, score) in enumerate(recipes_to_show, 1):
+            title = recipe.get('title', 'Рецепт без названия')
+            time_info = f" ({recipe['time']})" if recipe.get('time') else ""
+            
+            # ВАЖНО: Используем глобальный номер, а не локальный для страницы
+            global_index = i + 5 * current_page
+            response.append(f"{global_index}. {title}{time_info}")
+
+        total_results = len(self.session_state['all_search_results'])
+        
+        pagination_info = f"\n\nСтраница {current_page + 1} из {((total_results - 1) // 5) + 1}"
+        navigation_info = "\nУкажите номер рецепта 1, 2, 3... или название для выбора. Напишите 'другой рецепт' для нового поиска."
+        
+        return "\n" + "\n".join(response) + pagination_info + navigation_info
+
+    def is_selection_from_list(self, message: str) -> bool:
+        """Проверяет, является ли сообщение выбором из списка"""
+        if not self.last_search_results or not self.session_state['waiting_for_selection']:
+            return False
+            
+        message_lower = message.lower().strip()
+        
+        # Игнорируем команды поиска при выборе из списка
+        search_commands = ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']
+        if any(message_lower.startswith(cmd) for cmd in search_commands):
+            return False
+            
+        # Убираем мешающие слова типа "давай", "покажи", "хочу" и т.д.
+        filter_words = ['давай', 'покажи', 'хочу', 'выбери', 'можно']
+        clean_message = message_lower
+        for word in filter_words:
+            clean_message = clean_message.replace(word, '').strip()
+        
+        # Если после очистки сообщение пустое, используем оригинальное
+        if not clean_message:
+            clean_message = message_lower
+            
+        # Получаем все результаты для проверки глобальных номеров
+        all_results = self.session_state['all_search_results']
+        
+        # Проверяем номер (цифры) - теперь проверяем глобальные номера
+        if clean_message.isdigit():
+            number = int(clean_message)
+            return 1 <= number <= len(all_results)
+        
+        # Проверяем словесные обозначения номеров (локальные на странице)
+        number_words = NUMBER_WORDS
+        
+        if clean_message in number_words:
+            number = number_words[clean_message]
+            return 1 <= number <= len(self.last_search_results)
+            
+        # Проверяем по названию (среди всех результатов)
+        for recipe, score in all_results:
+            title = recipe.get('title', '').lower()
+            
+            # Точное совпадение или частичное
+            if clean_message == title or clean_message in title:
+                return True
+                
+        return False
+
+    def select_recipe(self, selection: str) -> Optional[Dict[str, Any]]:
+        """Выбирает рецепт по номеру или названию"""
+        if not self.last_search_results:
+            return None
+
+        selection_lower = selection.lower().strip()
+
+        # Убираем мешающие слова типа "давай", "покажи", "хочу" и т.д.
+        filter_words = ['давай', 'покажи', 'хочу', 'выбери', 'можно']
+        clean_selection = selection_lower
+        for word in filter_words:
+            clean_selection = clean_selection.replace(word, '').strip()
+        
+        # Если после очистки сообщение пустое, используем оригинальное
+        if not clean_selection:
+            clean_selection = selection_lower
+
+        # Словарь словесных обозначений номеров
+        number_words = NUMBER_WORDS
+
+        # Получаем все результаты поиска и текущую страницу
+        all_results = self.session_state['all_search_results']
+        current_page = self.session_state['current_page']
+        
+        # Выбор по номеру (цифры) - теперь работаем с глобальными номерами
+        if clean_selection.isdigit():
+            selected_number = int(clean_selection)
+            
+            # Проверяем, что номер в пределах общего количества результатов
+            if 1 <= selected_number <= len(all_results):
+                # Находим рецепт по глобальному номеру
+                recipe, score = all_results[selected_number - 1]
+                self.session_state['previous_recipes'].append(recipe.get('title'))
+                self.session_state['waiting_for_selection'] = False
+                return recipe
+
+        # Выбор по словесному номеру - теперь работаем с локальными номерами на странице
+        if clean_selection in number_words:
+            local_number = number_words[clean_selection]
+            # Проверяем, что локальный номер в пределах текущей страницы
+            if 1 <= local_number <= len(self.last_search_results):
+                recipe, score = self.last_search_results[local_number - 1]
+                self.session_state['previous_recipes'].append(recipe.get('title'))
+                self.session_state['waiting_for_selection'] = False
+                return recipe
+
+        # Выбор по названию (ищем среди всех результатов)
+        for recipe, score in all_results:
+            title = recipe.get('title', '').lower()
+            
+            # Точное совпадение или частичное
+            if clean_selection == title or clean_selection in title:
+                self.session_state['previous_recipes'].append(recipe.get('title'))
+                self.session_state['waiting_for_selection'] = False
+                return recipe
+
+        return None
+
+    def process_message(self, message: str, session_id: Optional[str] = None) -> str:
+        """Обрабатывает сообщение пользователя в его сессии"""
+        if session_id is None:
+            return self.respond(message)
+        session = self.session_store.get(session_id)
+        # Блокируется только сессия пользователя: разные пользователи обрабатываются параллельно
+        with session.lock, self.bound_session(session):
+            return self.respond(message)
+
+    def process_alice_message(self, message: str, session_id: str,
+                              cursor: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[Dict[str, Any]], str]:
+        """Обрабатывает сообщение с курсором из state.session и возвращает ответ, новый курсор
+        и намерение сообщения (search, page, select, similar, other) для метрик.
+        
+        Курсор клиента главнее памяти процесса: предыдущее сообщение могло попасть в другой процесс.
+        """
+        session = self.session_store.get(session_id)
+        with session.lock, self.bound_session(session):
+            if cursor and cursor != self.export_cursor():
+                self.restore_cursor(cursor)
+            response = self.respond(message)
+            return response, self.export_cursor(), self.session_state['current_intent']
+
+    def respond(self, message: str) -> str:
+        """Обрабатывает сообщение пользователя"""
+        self.session_state['current_intent'] = 'other'
+        if not message.strip():
+            return "Пожалуйста, опишите, что вы хотите приготовить."
+
+        message_lower = message.lower().strip()
+
+        # Выход из режима выбора по фразе "другой рецепт"
+        if self.session_state['waiting_for_selection'] and any(word in message_lower for word in ['другой', 'новый', 'искать', 'поиск', 'найди']):
+            self.session_state['waiting_for_selection'] = False
+            self.session_state['all_search_results'] = []
+            self.session_state['query_key'] = None
+            # Если начинается с команды поиска - выполняем поиск
+            if any(message_lower.startswith(cmd) for cmd in ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']):
+                clean_query = message_lower
+                for cmd in ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']:
+                    clean_query = clean_query.replace(cmd, '').strip()
+                
+                recipes = self.smart_search(clean_query)
+                if recipes:
+                    return self.list_response(clean_query, recipes)
+                else:
+                    return "Не нашла подходящих рецептов. Попробуйте другие слова."
+            else:
+                return "Хорошо, давайте поищем другой рецепт. Напишите что вы хотите приготовить."
+
+        # Если в режиме выбора - проверяем выбор
+        if self.session_state['waiting_for_selection'] and self.is_selection_from_list(message):
+            self.session_state['current_intent'] = 'select'
+            selected_recipe = self.select_recipe(message)
+            if selected_recipe:
+                self.last_shown_recipe = selected_recipe.get('title')
+                # Номер рецепта действителен только для текущего поколения индекса
+                self.session_state['last_shown_recipe_ref'] = (self.index_generation,
+                                                               self.recipe_numbers.get(id(selected_recipe)))
+                with self.stage('format'):
+                    return self.format_recipe_response(selected_recipe)
+            else:
+                return "Рецепт не найден. Выберите номер или название из списка."
+
+        # Похожие рецепты на последний открытый
+        shown_generation, shown_idx = self.session_state['last_shown_recipe_ref'] or (None, None)
+        if SIMILAR_RE.search(message_lower) and shown_idx is not None \
+                and shown_generation == self.index_generation:
+            self.session_state['current_intent'] = 'similar'
+            with self.stage('search'):
+                recipes = self.similar_search(shown_idx)
+            if recipes:
+                return self.list_response(message_lower, recipes)
+            return "Не нашла похожих рецептов. Попробуйте новый поиск."
+
+        # Простые команды
+        if message_lower in ['привет', 'здравствуйте', 'начать']:
+            return "Привет! Я ваш кулинарный помощник. Для поиска рецептов начните сообщение со слов: найди, грандшеф найди, или просто укажите что вы хотите приготовить."
+        
+        if message_lower in ['пока', 'выход', 'до свидания']:
+            return "До свидания! Приятного аппетита!"
+
+        # Проверяем, содержит ли запрос команду для поиска
+        search_commands = ['найди', 'грандшеф найди', 'грандшеф', 'поиск', 'ищи']
+        has_search_command = any(message_lower.startswith(cmd) for cmd in search_commands)
+        
+        # Запрос с ограничениями ("быстрые рецепты до 30 минут") или списком продуктов тоже считаем поиском
+        if not has_search_command and (self.extract_facets(message_lower)[0] or
+                                       self.extract_ingredient_query(message_lower) is not None):
+            has_search_command = True
+        
+        # Если нет команды поиска и не в режиме выбора - подсказка
+        if not has_search_command and not self.session_state['waiting_for_selection']:
+            return "Для поиска рецептов начните сообщение со слов: 'найди', 'грандшеф найди' или укажите что вы хотите приготовить."
+
+        # Убираем команды поиска из запроса для чистого анализа
+        clean_query = message_lower
+        for cmd in search_commands:
+            clean_query = clean_query.replace(cmd, '').strip()
+
+        # Поиск рецептов
+        recipes = self.smart_search(clean_query)
+        if recipes:
+            return self.list_response(clean_query, recipes)
+        else:
+            return "Не нашла подходящих рецептов. Попробуйте другие слова."
+
+    def run_chat(self):
+        """Запускает интерактивный чат"""
+        print("\n" + "=" * 60)
+        print("КУЛИНАРНЫЙ ПОМОЩНИК - УМНЫЙ ПОИСК РЕЦЕПТОВ")
+        print("=" * 60)
+        print(f"Загружено рецептов: {len(self.recipes)}")
+        if MORPH_AVAILABLE:
+            print("Использую морфологический анализ для поиска")
+            print("Понимает разные формы слов: курицу, курицей, курочка -> курица")
+        print("\nИНСТРУКЦИЯ:")
+        print("1. Для поиска начните сообщение с: 'найди', 'грандшеф найди'")
+        print("2. Примеры: 'найди курицу с картошкой', 'грандшеф найди шоколадный торт'")
+        print("3. При выборе из списка можно:")
+        print("   - Указать номер рецепта (1, 2, 3...)")
+        print("   - Написать название рецепта (без 'найди')")
+        print("   - Написать 'другой рецепт' или 'найди ...' для нового поиска")
+        print("4. Для продолжения поиска: 'покажи еще'")
+        print("=" * 60)
+        print("Начните с команды 'найди' и укажите что хотите приготовить...")
+
+        while True:
+            try:
+                user_input = input("\nВы: ").strip()
+
+                if user_input.lower() in ['пока', 'выход', 'до свидания', 'закончить']:
+                    print(f"\nБот: До свидания! Приятного аппетита!")
+                    break
+
+                response = self.process_message(user_input)
+                print(f"\nБот: {response}")
+
+            except KeyboardInterrupt:
+                print(f"\nБот: До свидания! Приятного аппетита!")
+                break
+            except Exception as e:
+                print(f"\nБот: Извините, произошла ошибка. Попробуйте еще раз.")
+                logger.error("Error: %s", e)
+
+if __name__ == "__main__":
+    setup_logging()
+    bot = SmartRecipeBot("recipes.json")
     bot.run_chat()
\ No newline at end of file
@@ -0,0 +1,111 @@
+# bench_logging.py - влияние логирования на задержку вебхука
+"""
+Прогоняет диалоги через вебхук (Flask test client) при разных настройках логирования.
+Каждый режим запускается в отдельном процессе, потому что логирование настраивается
+один раз на процесс. Медленный приемник (--sink-delay-ms) изображает stdout под journald,
+который не успевает забирать записи.
+
+    sync     все диагностики (DEBUG) пишутся в потоке запроса, как раньше print()
+    async    все диагностики через очередь и отдельный поток записи
+    sampled  то же, поисковые события с долей 1%
+    info     настройка по умолчанию: INFO, итоговая строка о запросе с долей 10%
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+MODES = ('sync', 'async', 'sampled', 'info')
+DIALOG = ['найди курицу', 'покажи еще', '1', 'далее', 'найди рис', 'второй', 'похожие рецепты']
+
+
+class SlowSink:
+    """Поток вывода, каждая запись в который занимает delay секунд"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.devnull = open(os.devnull, 'w', encoding='utf-8')
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.devnull.write(text)
+
+    def flush(self):
+        self.devnull.flush()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_mode(mode, dialogs, sink_delay):
+    """Выполняется в дочернем процессе: печатает JSON с задержками в миллисекундах"""
+    from async_logging import setup_logging
+
+    sink = SlowSink(sink_delay)
+    if mode == 'async':
+        setup_logging('DEBUG', sample_rates={}, stream=sink)
+    elif mode == 'sampled':
+        setup_logging('DEBUG', sample_rates={'search': 0.01, 'webhook.request': 0.1}, stream=sink)
+    elif mode == 'info':
+        setup_logging('INFO', stream=sink)
+
+    import app11
+
+    if mode == 'sync':
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+
+    while not app11.bot.ready:
+        time.sleep(0.05)
+    client = app11.app.test_client()
+    latencies = []
+    for number in range(dialogs):
+        state = None
+        for command in DIALOG:
+            body = {'request': {'command': command, 'type': 'SimpleUtterance'},
+                    'session': {'session_id': f"bench-{number}", 'new': False}, 'version': '1.0'}
+            if state:
+                body['state'] = {'session': state}
+            start = time.perf_counter()
+            response = client.post('/webhook', json=body).get_json()
+            latencies.append((time.perf_counter() - start) * 1000)
+            state = response.get('session_state')
+    print(json.dumps(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк логирования вебхука")
+    parser.add_argument('--dialogs', type=int, default=200)
+    parser.add_argument('--sink-delay-ms', type=float, default=0.2,
+                        help="время одной записи в приемник логов")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.dialogs, args.sink_delay_ms / 1000)
+        return
+
+    print(f"Диалогов: {args.dialogs} x {len(DIALOG)} запросов, запись в приемник {args.sink_delay_ms} мс")
+    for mode in args.modes:
+        output = subprocess.run([sys.executable, __file__, '--mode', mode, '--dialogs', str(args.dialogs),
+                                 '--sink-delay-ms', str(args.sink_delay_ms)],
+                                capture_output=True, text=True, check=True).stdout
+        latencies = json.loads(output.strip().splitlines()[-1])
+        print(f"  {mode:8s} p50 {percentile(latencies, 0.5):7.3f} мс  p95 {percentile(latencies, 0.95):7.3f} мс  "
+              f"p99 {percentile(latencies, 0.99):7.3f} мс")
+
+
+if __name__ == '__main__':
+    main()
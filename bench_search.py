@@ -0,0 +1,108 @@
+# bench_search.py - микро-бенчмарк поиска рецептов
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from be11 import SmartRecipeBot, RANKING_MODES, load_recipe_records
+
+# Типичные запросы пользователей Алисы
+QUERIES = [
+    'курицу', 'курицу с картошкой', 'рис', 'десерты', 'пиццу', 'шоколадный торт',
+    'картофель', 'гречку', 'рыбу', 'сыр', 'помидоры', 'творожную запеканку',
+    'яблоко', 'мясо', 'грудку',
+]
+
+
+def make_corpus(recipes_file, scale):
+    """Размножает рецепты в scale раз во временный файл и возвращает путь к нему"""
+    if scale <= 1:
+        return recipes_file
+    with open(recipes_file, 'r', encoding='utf-8') as f:
+        recipes = json.load(f)
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(recipes * scale, f, ensure_ascii=False)
+    return path
+
+
+def build_bot(recipes_file, ranking_mode):
+    """Создает бота без отладочного вывода"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SmartRecipeBot(recipes_file, ranking_mode=ranking_mode)
+
+
+def bench_ranking(bot, rounds, top_k=None):
+    """Возвращает среднее время поиска на запрос в миллисекундах.
+
+    Без top_k ранжируются все найденные рецепты, иначе только первая страница курсора.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        terms = [bot.extract_search_terms(query) for query in QUERIES]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for query_terms in terms:
+                if top_k is None:
+                    bot.find_matching_recipes(query_terms)
+                else:
+                    bot.search_cursor(query_terms)[:top_k]
+        elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (rounds * len(terms))
+
+
+def traced_bytes(load):
+    """Память, которую удерживает результат load() (по tracemalloc)"""
+    tracemalloc.start()
+    result = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def bench_memory(recipes_file):
+    """Сравнивает память под рецепты: словари из json.load и компактные записи"""
+    with open(recipes_file, 'r', encoding='utf-8') as f:
+        count = len(json.load(f))
+
+    def load_dicts():
+        with open(recipes_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    for name, load in (('dict', load_dicts), ('records', lambda: load_recipe_records(recipes_file))):
+        current, peak = traced_bytes(load)
+        print(f"  {name:8s} {current / 2 ** 20:7.2f} МБ ({current / count:7.0f} байт/рецепт), пик {peak / 2 ** 20:7.2f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк ранжирования рецептов")
+    parser.add_argument('--recipes', default='recipes.json')
+    parser.add_argument('--scale', type=int, default=1, help="во сколько раз размножить корпус")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--memory', action='store_true', help="измерить память под рецепты")
+    args = parser.parse_args()
+
+    recipes_file = make_corpus(args.recipes, args.scale)
+    try:
+        print(f"Корпус: {recipes_file} (x{args.scale}), запросов: {len(QUERIES)}, повторов: {args.rounds}")
+        if args.memory:
+            bench_memory(recipes_file)
+        for mode in RANKING_MODES:
+            bot = build_bot(recipes_file, mode)
+            full = bench_ranking(bot, args.rounds)
+            top = bench_ranking(bot, args.rounds, top_k=5)
+            print(f"  {mode:8s} {len(bot.recipes):7d} рецептов: все {full:8.3f} мс/запрос, топ-5 {top:8.3f} мс/запрос")
+    finally:
+        if recipes_file != args.recipes:
+            os.remove(recipes_file)
+            for suffix in ('.idx', '.store'):
+                if os.path.exists(f"{recipes_file}{suffix}"):
+                    os.remove(f"{recipes_file}{suffix}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# bench_store.py - сравнение загрузки recipes.json и бинарного хранилища
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+
+from recipe_store import RecipeStore, encode_store, write_atomic
+
+
+def make_files(recipes_file, size, directory):
+    """Готовит JSON (с отступами, как у парсеров) и хранилище на size рецептов"""
+    with open(recipes_file, 'r', encoding='utf-8') as f:
+        recipes = json.load(f)
+    recipes = [dict(recipes[i % len(recipes)], title=f"{recipes[i % len(recipes)].get('title', '')} #{i}")
+               for i in range(size)]
+    json_path = os.path.join(directory, f"recipes_{size}.json")
+    store_path = os.path.join(directory, f"recipes_{size}.bin")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(recipes, f, ensure_ascii=False, indent=2)
+    write_atomic(store_path, encode_store(recipes))
+    return json_path, store_path
+
+
+def timed(action):
+    """Время выполнения action в секундах (результат сразу освобождается)"""
+    gc.collect()
+    start = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - start
+    del result
+    return elapsed
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bench_size(recipes_file, size, directory, lookups):
+    json_path, store_path = make_files(recipes_file, size, directory)
+    try:
+        print(f"{size} рецептов: JSON {os.path.getsize(json_path) / 2 ** 20:.1f} МБ, "
+              f"хранилище {os.path.getsize(store_path) / 2 ** 20:.1f} МБ")
+        print(f"  {'json.load':24s}{timed(lambda: load_json(json_path)):8.3f} с")
+        print(f"  {'хранилище, все поля':24s}{timed(lambda: list(RecipeStore(store_path))):8.3f} с")
+        print(f"  {'хранилище, для индекса':24s}{timed(lambda: RecipeStore(store_path).heads()):8.3f} с")
+
+        store = RecipeStore(store_path)
+        numbers = [random.randrange(size) for _ in range(lookups)]
+        elapsed = timed(lambda: [store.get(number) for number in numbers])
+        print(f"  {'рецепт по номеру':24s}{elapsed * 1e6 / lookups:8.1f} мкс")
+        store.close()
+    finally:
+        os.remove(json_path)
+        os.remove(store_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк загрузки рецептов: json.load против хранилища")
+    parser.add_argument('--recipes', default='recipes.json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--lookups', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            bench_size(args.recipes, size, directory, args.lookups)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# index_snapshot.py - снимок поискового индекса без pickle с массивами прямо из mmap
+"""
+Формат файла (числа little-endian):
+
+    заголовок   магия, версия u16, ключ 32 байта, длина описания u64
+    описание    JSON: для каждого поля его вид и данные либо ссылки на массивы
+    массивы     сырые данные NumPy, каждый выровнен на 64 байта
+
+Массивы при загрузке не копируются: np.frombuffer смотрит прямо в отображенный файл
+(ACCESS_COPY - запись в массив остается в памяти процесса и не трогает файл).
+Разбирается только JSON со словарями и списками ключей. Код из файла не исполняется,
+поэтому подмененный снимок может испортить поиск, но не выполнить что-то в процессе.
+
+Виды полей:
+    array      np.ndarray
+    json       словари и списки из строк и чисел (кортежи читаются списками)
+    set        множество строк
+    arrays     словарь строка -> np.ndarray
+    postings   PostingMap - строка -> массив номеров
+    deletes    DeleteIndex - словарь удалений SymSpell
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_HEADER = struct.Struct('<6sH32sQ')
+ARRAY_ALIGNMENT = 64
+# Только числовые типы: описание из файла не может запросить объектные массивы
+ALLOWED_DTYPE_KINDS = 'biuf'
+
+
+def stable_hash(text: str) -> int:
+    """64-битный хэш строки, одинаковый во всех процессах (hash() рандомизирован)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class PostingMap:
+    """Строка -> массив номеров в сжатом виде (ключи, смещения, значения).
+
+    Заменяет словарь списков: один массив вместо тысяч списков, который
+    грузится из снимка без разбора.
+    """
+
+    def __init__(self, keys: List[str], offsets: np.ndarray, values: np.ndarray):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.offsets = offsets
+        self.values = values
+
+    @classmethod
+    def from_lists(cls, lists: Dict[str, List[int]], dtype=np.int32) -> 'PostingMap':
+        keys = list(lists)
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(lists[key]) for key in keys])
+        values = np.fromiter((value for key in keys for value in lists[key]), dtype=dtype, count=int(offsets[-1]))
+        return cls(keys, offsets, values)
+
+    def get(self, key: str, default=None) -> Optional[np.ndarray]:
+        i = self.index.get(key)
+        if i is None:
+            return default
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        postings = self.get(key)
+        if postings is None:
+            raise KeyError(key)
+        return postings
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+
+class DeleteIndex:
+    """Словарь удалений SymSpell: вариант слова -> слова словаря.
+
+    Варианты хранятся 64-битными хэшами в отсортированном массиве. Совпадение хэшей
+    у разных вариантов только добавляет кандидатов, а их все равно проверяет
+    расстояние редактирования.
+    """
+
+    def __init__(self, words: List[str], hashes: np.ndarray, offsets: np.ndarray, values: np.ndarray):
+        self.words = words
+        self.hashes = hashes
+        self.offsets = offsets
+        self.values = values
+
+    @classmethod
+    def build(cls, pairs: Iterable[Tuple[str, str]]) -> 'DeleteIndex':
+        """Строит индекс из пар (вариант, слово)"""
+        word_ids = {}
+        buckets = {}
+        for variant, word in pairs:
+            word_id = word_ids.setdefault(word, len(word_ids))
+            buckets.setdefault(stable_hash(variant), []).append(word_id)
+        hashes = np.array(sorted(buckets), dtype=np.uint64)
+        offsets = np.zeros(len(hashes) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(buckets[int(value)]) for value in hashes])
+        values = np.fromiter((word_id for value in hashes for word_id in buckets[int(value)]),
+                             dtype=np.int32, count=int(offsets[-1]))
+        return cls(list(word_ids), hashes, offsets, values)
+
+    def get(self, variant: str, default=()) -> List[str]:
+        key = np.uint64(stable_hash(variant))
+        i = int(np.searchsorted(self.hashes, key))
+        if i == len(self.hashes) or self.hashes[i] != key:
+            return default
+        return [self.words[word_id] for word_id in self.values[self.offsets[i]:self.offsets[i + 1]].tolist()]
+
+
+class SnapshotWriter:
+    """Собирает описание полей и выровненные массивы"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def array(self, value: np.ndarray) -> Dict[str, Any]:
+        value = np.ascontiguousarray(value)
+        if value.dtype.kind not in ALLOWED_DTYPE_KINDS:
+            raise ValueError(f"тип {value.dtype} нельзя сохранить в снимок")
+        padding = -self.size % ARRAY_ALIGNMENT
+        self.chunks.append(b'\0' * padding)
+        offset = self.size + padding
+        data = value.tobytes()
+        self.chunks.append(data)
+        self.size = offset + len(data)
+        return {'o': offset, 't': value.dtype.str, 's': list(value.shape)}
+
+    def encode(self, kind: str, value: Any) -> Any:
+        if kind == 'array':
+            return self.array(value)
+        if kind == 'json':
+            return value
+        if kind == 'set':
+            return sorted(value)
+        if kind == 'arrays':
+            return {key: self.array(item) for key, item in value.items()}
+        if kind == 'postings':
+            return {'keys': value.keys, 'offsets': self.array(value.offsets), 'values': self.array(value.values)}
+        if kind == 'deletes':
+            return {'words': value.words, 'hashes': self.array(value.hashes),
+                    'offsets': self.array(value.offsets), 'values': self.array(value.values)}
+        raise ValueError(f"неизвестный вид поля {kind}")
+
+
+def write_snapshot(path: str, magic: bytes, version: int, key: bytes,
+                   kinds: Dict[str, str], fields: Dict[str, Any]):
+    """Записывает снимок атомарно: временный файл и os.replace"""
+    writer = SnapshotWriter()
+    description = json.dumps({name: writer.encode(kinds[name], fields[name]) for name in kinds},
+                             ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # Массивы начинаются с выровненной позиции после заголовка и описания
+    data_start = SNAPSHOT_HEADER.size + len(description)
+    data_start += -data_start % ARRAY_ALIGNMENT
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(magic, version, key, len(description)))
+            f.write(description)
+            f.write(b'\0' * (data_start - SNAPSHOT_HEADER.size - len(description)))
+            for chunk in writer.chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SnapshotReader:
+    def __init__(self, buffer, data_start: int):
+        self.buffer = buffer
+        self.data_start = data_start
+
+    def array(self, ref: Dict[str, Any]) -> np.ndarray:
+        dtype = np.dtype(ref['t'])
+        if dtype.kind not in ALLOWED_DTYPE_KINDS:
+            raise ValueError(f"недопустимый тип массива {dtype}")
+        shape = tuple(int(size) for size in ref['s'])
+        count = int(np.prod(shape, dtype=np.int64))
+        offset = self.data_start + int(ref['o'])
+        if offset < self.data_start or offset + count * dtype.itemsize > len(self.buffer):
+            raise ValueError("массив выходит за пределы снимка")
+        return np.frombuffer(self.buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def decode(self, kind: str, value: Any) -> Any:
+        if kind == 'array':
+            return self.array(value)
+        if kind == 'json':
+            return value
+        if kind == 'set':
+            return set(value)
+        if kind == 'arrays':
+            return {key: self.array(item) for key, item in value.items()}
+        if kind == 'postings':
+            return PostingMap(value['keys'], self.array(value['offsets']), self.array(value['values']))
+        if kind == 'deletes':
+            return DeleteIndex(value['words'], self.array(value['hashes']),
+                               self.array(value['offsets']), self.array(value['values']))
+        raise ValueError(f"неизвестный вид поля {kind}")
+
+
+def read_snapshot(path: str, magic: bytes, version: int, key: bytes,
+                  kinds: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Читает снимок; None, если он от другой версии формата или другого содержимого.
+
+    Ошибки формата (обрезанный или испорченный файл) пробрасываются вызывающему.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(SNAPSHOT_HEADER.size)
+        if len(header) < SNAPSHOT_HEADER.size:
+            raise ValueError("снимок обрезан")
+        file_magic, file_version, file_key, description_length = SNAPSHOT_HEADER.unpack(header)
+        if file_magic != magic or file_version != version or file_key != key:
+            return None
+        description = json.loads(f.read(description_length))
+        # Отображение живет, пока на него ссылаются массивы
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    data_start = SNAPSHOT_HEADER.size + description_length
+    data_start += -data_start % ARRAY_ALIGNMENT
+    reader = SnapshotReader(buffer, data_start)
+    return {name: reader.decode(kind, description[name]) for name, kind in kinds.items()}
@@ -0,0 +1,357 @@
+# loadtest.py - нагрузочный тест и воспроизведение диалогов с Алисой
+"""
+Источники диалогов:
+    --capture FILE   JSONL с запросами вебхука: строки записи app11 (RECIPE_CAPTURE_FILE,
+                     поле "request" с телом запроса Алисы) или сами тела запросов. Запросы
+                     группируются по session_id и воспроизводятся в исходном порядке.
+    --synthetic N    N диалогов: поиск -> "покажи еще" -> выбор -> "далее"
+
+Цели:
+    по умолчанию     app11.app в этом процессе через Flask test client
+    --url URL        HTTP, например http://127.0.0.1:5001/webhook (waitress)
+
+Каждый поток ведет --interleave диалогов одновременно и чередует их реплики, как
+Алиса с разными пользователями. state.session берется из ответов текущего прогона,
+а не из записи: курсор из записи относится к другому индексу.
+
+Сравнение сборок:
+    python loadtest.py --synthetic 200 --builds ../build-a ../build-b
+    python loadtest.py --capture captured.jsonl --save before.json
+    python loadtest.py --capture captured.jsonl --baseline before.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Реплики в порядке проверки вебхуком
+NEXT_COMMANDS = ('далее', 'продолжи', 'следующая часть')
+PAGE_COMMANDS = ('покажи еще', 'еще', 'дальше', 'следующие')
+EXIT_COMMANDS = ('пока', 'выход', 'закончить')
+START_COMMANDS = ('помощь', 'что ты умеешь', 'help')
+RESET_COMMANDS = ('другой рецепт', 'новый поиск', 'сброс')
+SELECT_WORDS = ('первый', 'первое', 'первую', 'второй', 'второе', 'вторую', 'третий', 'третье',
+                'третью', 'четвертый', 'четвертое', 'четвертую', 'пятый', 'пятое', 'пятую')
+SYNTHETIC_QUERIES = [
+    'найди курицу', 'найди курицу с картошкой', 'найди рис', 'найди десерты', 'найди пиццу',
+    'найди шоколадный торт', 'найди картофель', 'найди гречку', 'найди рыбу', 'найди сыр',
+    'грандшеф найди творожную запеканку', 'найди мясо', 'быстрые рецепты до 30 минут',
+    'что приготовить из курицы и сметаны',
+]
+ERROR_TEXT = "Извините, произошла ошибка"
+# Сколько ждать построения индекса в процессе (секунды)
+READY_TIMEOUT = 300
+
+
+def classify(payload: Dict[str, Any]) -> str:
+    """Намерение реплики по тексту - так же, как его различает вебхук"""
+    command = payload.get('request', {}).get('command', '').strip().lower()
+    if payload.get('session', {}).get('new') or command in START_COMMANDS:
+        return 'start'
+    if command in EXIT_COMMANDS:
+        return 'exit'
+    if not command or command in RESET_COMMANDS:
+        return 'other'
+    if command in NEXT_COMMANDS:
+        return 'next'
+    if command in PAGE_COMMANDS:
+        return 'page'
+    if command.isdigit() or command in SELECT_WORDS:
+        return 'select'
+    if 'похож' in command:
+        return 'similar'
+    return 'search'
+
+
+def alice_payload(command: str, session_id: str, new: bool = False) -> Dict[str, Any]:
+    return {
+        'meta': {'locale': 'ru-RU', 'timezone': 'UTC', 'client_id': 'loadtest'},
+        'request': {'command': command, 'original_utterance': command, 'type': 'SimpleUtterance'},
+        'session': {'session_id': session_id, 'message_id': 0, 'new': new,
+                    'user_id': 'loadtest', 'skill_id': 'loadtest'},
+        'version': '1.0'
+    }
+
+
+def synthetic_dialogs(count: int, seed: int) -> List[List[Dict[str, Any]]]:
+    """Диалоги поиск -> "покажи еще" -> выбор -> "далее" (иногда "похожие рецепты")"""
+    rng = random.Random(seed)
+    dialogs = []
+    for number in range(count):
+        session_id = f"loadtest-{seed}-{number}"
+        commands = [rng.choice(SYNTHETIC_QUERIES)]
+        if rng.random() < 0.5:
+            commands.append(rng.choice(PAGE_COMMANDS[:2]))
+        commands.append(rng.choice([str(rng.randint(1, 5)), rng.choice(SELECT_WORDS)]))
+        commands.extend(['далее'] * rng.randint(1, 2))
+        if rng.random() < 0.3:
+            commands.append('похожие рецепты')
+        dialogs.append([alice_payload(command, session_id) for command in commands])
+    return dialogs
+
+
+def load_capture(paths: List[str]) -> List[List[Dict[str, Any]]]:
+    """Читает записанные запросы и группирует их в диалоги по session_id.
+    
+    Файлы воркеров (captured.<pid>.jsonl) сливаются по времени записи: реплики
+    одной сессии могли попасть в разные процессы.
+    """
+    entries = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+    entries.sort(key=lambda entry: entry.get('ts', 0))
+
+    sessions = OrderedDict()
+    for entry in entries:
+        # Строка записи app11 хранит тело запроса в "request"; иначе строка и есть тело
+        payload = entry['request'] if 'request' in (entry.get('request') or {}) else entry
+        if 'request' not in payload:
+            continue
+        session_id = payload.get('session', {}).get('session_id', 'default')
+        sessions.setdefault(session_id, []).append(payload)
+    return list(sessions.values())
+
+
+class InProcessTarget:
+    """app11.app через Flask test client (по клиенту на поток)"""
+
+    def __init__(self):
+        import app11
+        # До фоновой загрузки индекса (старые сборки) бот готов сразу после импорта
+        deadline = time.monotonic() + READY_TIMEOUT
+        while not getattr(app11.bot, 'ready', True):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"индекс не построен за {READY_TIMEOUT} с")
+            time.sleep(0.05)
+        self.app = app11.app
+        self.local = threading.local()
+
+    def send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.post('/webhook', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response.get_json()
+
+
+class HttpTarget:
+    """Вебхук по HTTP с keep-alive соединением на поток"""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = parts.path or '/webhook'
+        self.local = threading.local()
+
+    def send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        for attempt in range(2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # Сервер закрыл соединение - переподключаемся один раз
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            return json.loads(data)
+
+
+def replay(target, dialogs: List[List[Dict[str, Any]]], concurrency: int, interleave: int) -> Dict[str, Any]:
+    """Воспроизводит диалоги и возвращает задержки по намерениям"""
+    pending = list(reversed(dialogs))
+    pending_lock = threading.Lock()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    results_lock = threading.Lock()
+
+    def next_dialog():
+        with pending_lock:
+            return iter(pending.pop()) if pending else None
+
+    def worker():
+        # [реплики диалога, state.session из последнего ответа]
+        active = []
+        while True:
+            while len(active) < interleave:
+                dialog = next_dialog()
+                if dialog is None:
+                    break
+                active.append([dialog, None])
+            if not active:
+                return
+            for entry in list(active):
+                payload = next(entry[0], None)
+                if payload is None:
+                    active.remove(entry)
+                    continue
+                payload = dict(payload)
+                if entry[1]:
+                    payload['state'] = {'session': entry[1]}
+                else:
+                    payload.pop('state', None)
+                intent = classify(payload)
+                start = time.perf_counter()
+                try:
+                    response = target.send(payload)
+                    failed = ERROR_TEXT in response.get('response', {}).get('text', '')
+                except Exception:
+                    response, failed = {}, True
+                elapsed = (time.perf_counter() - start) * 1000
+                entry[1] = response.get('session_state')
+                with results_lock:
+                    latencies[intent].append(elapsed)
+                    if failed:
+                        errors[intent] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+    return summarize(latencies, errors, duration)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], duration: float) -> Dict[str, Any]:
+    everything = [value for values in latencies.values() for value in values]
+    intents = {}
+    for intent, values in sorted(latencies.items()) + [('all', everything)]:
+        if not values:
+            continue
+        intents[intent] = {
+            'count': len(values),
+            'errors': errors.get(intent, 0) if intent != 'all' else sum(errors.values()),
+            'p50_ms': round(percentile(values, 0.50), 3),
+            'p95_ms': round(percentile(values, 0.95), 3),
+            'p99_ms': round(percentile(values, 0.99), 3),
+        }
+    return {'requests': len(everything), 'duration_sec': round(duration, 3),
+            'throughput_rps': round(len(everything) / duration, 1) if duration else None, 'intents': intents}
+
+
+def print_report(result: Dict[str, Any], title: str = ''):
+    print(f"{title}{result['requests']} запросов за {result['duration_sec']:.2f} с, "
+          f"{result['throughput_rps']} запросов/с")
+    print(f"  {'намерение':10s}{'запросов':>9s}{'ошибок':>8s}{'p50 мс':>10s}{'p95 мс':>10s}{'p99 мс':>10s}")
+    for intent, row in result['intents'].items():
+        print(f"  {intent:10s}{row['count']:9d}{row['errors']:8d}"
+              f"{row['p50_ms']:10.3f}{row['p95_ms']:10.3f}{row['p99_ms']:10.3f}")
+
+
+def print_comparison(results: List[Dict[str, Any]], names: List[str]):
+    """Таблица сборок рядом: пропускная способность и перцентили по намерениям"""
+    base = results[0]
+    print(f"  {'':18s}" + ''.join(f"{name[-14:]:>16s}" for name in names))
+    print(f"  {'запросов/с':18s}" + ''.join(f"{result['throughput_rps']:16.1f}" for result in results))
+    intents = [intent for intent in base['intents'] if all(intent in result['intents'] for result in results)]
+    for intent in intents:
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            base_value = base['intents'][intent][metric]
+            cells = [f"{base_value:16.3f}"]
+            for result in results[1:]:
+                value = result['intents'][intent][metric]
+                change = f"{(value - base_value) / base_value * 100:+.0f}%" if base_value else ''
+                cells.append(f"{value:9.3f} {change:>6s}")
+            print(f"  {intent + ' ' + metric[:3]:18s}" + ''.join(cells))
+
+
+def run_builds(builds: List[str], argv: List[str]) -> List[Dict[str, Any]]:
+    """Запускает тот же прогон для каждой сборки в отдельном процессе"""
+    results = []
+    for build in builds:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--root', build, '--json'] + argv,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест вебхука Алисы")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--capture', nargs='+', help="JSONL с записанными запросами (один или несколько)")
+    source.add_argument('--synthetic', type=int, help="число синтетических диалогов")
+    parser.add_argument('--url', help="вебхук по HTTP вместо app11 в этом процессе")
+    parser.add_argument('--concurrency', type=int, default=4, help="число потоков")
+    parser.add_argument('--interleave', type=int, default=4, help="диалогов одновременно на поток")
+    parser.add_argument('--repeat', type=int, default=1, help="сколько раз проиграть диалоги")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="сохранить результат в JSON")
+    parser.add_argument('--baseline', help="сравнить с сохраненным результатом")
+    parser.add_argument('--builds', nargs='+', help="каталоги сборок для сравнения (в процессе)")
+    parser.add_argument('--root', help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.builds:
+        # Передаем дочерним процессам все аргументы, кроме списка сборок
+        passthrough = list(argv if argv is not None else sys.argv[1:])
+        start = passthrough.index('--builds')
+        end = start + 1
+        while end < len(passthrough) and not passthrough[end].startswith('--'):
+            end += 1
+        passthrough = passthrough[:start] + passthrough[end:]
+        if args.capture:
+            passthrough = [os.path.abspath(arg) if arg in args.capture else arg for arg in passthrough]
+        results = run_builds(args.builds, passthrough)
+        for build, result in zip(args.builds, results):
+            print_report(result, f"{build}: ")
+        print_comparison(results, args.builds)
+        return
+
+    if args.root:
+        os.chdir(args.root)
+        sys.path.insert(0, os.path.abspath('.'))
+
+    dialogs = load_capture(args.capture) if args.capture else synthetic_dialogs(args.synthetic, args.seed)
+    if args.repeat > 1:
+        # Повторы - отдельные сессии, чтобы состояние не переходило между проходами
+        dialogs = [[dict(payload, session=dict(payload.get('session', {}),
+                                               session_id=f"{payload.get('session', {}).get('session_id')}-{number}"))
+                    for payload in dialog] for number in range(args.repeat) for dialog in dialogs]
+    target = HttpTarget(args.url) if args.url else InProcessTarget()
+    result = replay(target, dialogs, args.concurrency, args.interleave)
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    print_report(result)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print_comparison([baseline, result], [args.baseline, 'текущий'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# morphology.py - общий морфологический анализатор для всех экземпляров бота
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pymorphy3
+    MORPH_AVAILABLE = True
+except ImportError:
+    logger.warning("pymorphy3 не установлен. Установите: pip install pymorphy3")
+    MORPH_AVAILABLE = False
+
+_morph = None
+_morph_lock = threading.Lock()
+_morph_stats = {'load_time_sec': None, 'rss_delta_bytes': None}
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Резидентная память процесса в байтах (None, если узнать нельзя)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # На Linux ru_maxrss в килобайтах, на macOS в байтах; это пик, а не текущее значение
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def get_morph_analyzer():
+    """Возвращает общий для процесса MorphAnalyzer, создавая его при первом обращении.
+
+    Словари pymorphy3 занимают десятки мегабайт, поэтому перезагрузка рецептов
+    и оба движка (be1, be11) используют один экземпляр.
+    """
+    global _morph
+    if _morph is not None or not MORPH_AVAILABLE:
+        return _morph
+    with _morph_lock:
+        if _morph is None:
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            morph = pymorphy3.MorphAnalyzer()
+            _morph_stats['load_time_sec'] = round(time.perf_counter() - start, 3)
+            rss_after = current_rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                _morph_stats['rss_delta_bytes'] = rss_after - rss_before
+            _morph = morph
+            logger.info("pymorphy3: словари загружены за %.2f с, память +%.1f МБ",
+                        _morph_stats['load_time_sec'], (_morph_stats['rss_delta_bytes'] or 0) / 2 ** 20)
+    return _morph
+
+
+def morph_stats() -> Dict[str, Any]:
+    """Время загрузки и прирост памяти от анализатора"""
+    return dict(_morph_stats, available=MORPH_AVAILABLE, loaded=_morph is not None,
+                rss_bytes=current_rss_bytes())
@@ -0,0 +1,231 @@
+# recipe_store.py - общий загрузчик рецептов и бинарное хранилище с доступом по номеру
+"""
+Формат хранилища (все числа little-endian):
+
+    заголовок   RCPBIN, версия u16, число рецептов u32, хэш содержимого 32 байта
+    смещения    (число рецептов + 1) x u64 - начало каждой записи и конец последней
+    записи      длина головы u32, голова (компактный JSON без больших полей),
+                тело (компактный JSON с шагами и исходным текстом)
+
+Голову читают при запуске для построения индекса, тело - только при показе рецепта.
+Запуск: python recipe_store.py recipes.json recipes.bin (и обратно).
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+STORE_MAGIC = b'RCPBIN'
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct('<6sHI32s')
+RECORD_HEAD = struct.Struct('<I')
+
+# Большие поля, которые нужны только при показе рецепта
+LAZY_RECIPE_FIELDS = ('steps', 'raw_text')
+
+
+def is_recipe_store(path: str) -> bool:
+    """Проверяет по сигнатуре, что файл - бинарное хранилище, а не JSON"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(STORE_MAGIC)) == STORE_MAGIC
+    except OSError:
+        return False
+
+
+def recipes_data_error(recipes: Any) -> Optional[str]:
+    """Причина, по которой разобранный JSON нельзя загрузить как рецепты; None, если можно"""
+    if not isinstance(recipes, list) or not recipes:
+        return "ожидается непустой список рецептов"
+    if not all(isinstance(recipe, dict) for recipe in recipes):
+        return "каждый рецепт должен быть объектом"
+    return None
+
+
+def encode_store(recipes: List[Dict[str, Any]], content_hash: Optional[bytes] = None) -> bytes:
+    """Кодирует рецепты в формат хранилища.
+
+    content_hash - хэш исходного файла, если хранилище служит его копией;
+    без него берется хэш самих записей.
+    """
+    records = []
+    for recipe in recipes:
+        head = json.dumps({key: value for key, value in recipe.items() if key not in LAZY_RECIPE_FIELDS},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        body = json.dumps({key: recipe[key] for key in LAZY_RECIPE_FIELDS if key in recipe},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        records.append(RECORD_HEAD.pack(len(head)) + head + body)
+    payload = b''.join(records)
+    if content_hash is None:
+        content_hash = hashlib.sha256(payload).digest()
+
+    offsets = array('Q', [STORE_HEADER.size + (len(records) + 1) * 8])
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    return STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(records), content_hash) + offsets.tobytes() + payload
+
+
+def write_atomic(path: str, data: bytes):
+    """Записывает файл целиком через временный файл и os.replace.
+
+    Читатели никогда не видят недописанный файл, а уже открытые дескрипторы
+    продолжают указывать на прежнюю версию.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class RecipeStore:
+    """Хранилище рецептов с доступом к любой записи за O(1) по номеру.
+
+    Читает файл через pread по сохраненному дескриптору, поэтому замена файла
+    новой версией не мешает работе с уже открытой.
+    """
+
+    def __init__(self, path: Optional[str] = None, data: Optional[bytes] = None):
+        self.path = path
+        self.fd = None
+        self.data = data
+        if path is not None:
+            self.fd = os.open(path, os.O_RDONLY)
+            size = os.fstat(self.fd).st_size
+        else:
+            size = len(data)
+        try:
+            header = self.read(0, STORE_HEADER.size)
+            if len(header) < STORE_HEADER.size:
+                raise ValueError("файл хранилища обрезан")
+            magic, version, count, self.content_hash = STORE_HEADER.unpack(header)
+            if magic != STORE_MAGIC or version != STORE_VERSION:
+                raise ValueError(f"неподдерживаемый формат хранилища: {magic!r} v{version}")
+            self.offsets = array('Q')
+            self.offsets.frombytes(self.read(STORE_HEADER.size, (count + 1) * self.offsets.itemsize))
+            if len(self.offsets) != count + 1 or self.offsets[-1] != size:
+                raise ValueError("файл хранилища обрезан")
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def open_matching(cls, path: str, content_hash: bytes) -> Optional['RecipeStore']:
+        """Открывает хранилище, если оно построено для того же содержимого"""
+        try:
+            store = cls(path)
+        except (OSError, ValueError):
+            return None
+        if store.content_hash != content_hash:
+            store.close()
+            return None
+        return store
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self.fd is not None:
+            return os.pread(self.fd, length, offset)
+        return self.data[offset:offset + length]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def record(self, number: int) -> Tuple[bytes, bytes]:
+        """Голова и тело записи в виде байтов JSON"""
+        start, end = self.offsets[number], self.offsets[number + 1]
+        raw = self.read(start, end - start)
+        head_end = RECORD_HEAD.size + RECORD_HEAD.unpack_from(raw)[0]
+        return raw[RECORD_HEAD.size:head_end], raw[head_end:]
+
+    def body(self, number: int) -> Dict[str, Any]:
+        """Большие поля рецепта (шаги, исходный текст)"""
+        start, end = self.offsets[number], self.offsets[number + 1]
+        head_length = RECORD_HEAD.unpack(self.read(start, RECORD_HEAD.size))[0]
+        return json.loads(self.read(start + RECORD_HEAD.size + head_length,
+                                    end - start - RECORD_HEAD.size - head_length))
+
+    def get(self, number: int) -> Dict[str, Any]:
+        """Полный рецепт: сначала короткие поля, затем большие"""
+        head, body = self.record(number)
+        recipe = json.loads(head)
+        recipe.update(json.loads(body))
+        return recipe
+
+    __getitem__ = get
+
+    def heads(self) -> List[Dict[str, Any]]:
+        """Короткие поля всех рецептов - все, что нужно для построения индекса"""
+        if not len(self):
+            return []
+        if self.fd is not None:
+            with mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ) as buffer:
+                return self.parse_heads(buffer)
+        return self.parse_heads(self.data)
+
+    def parse_heads(self, buffer) -> List[Dict[str, Any]]:
+        parts = []
+        for number in range(len(self)):
+            start = self.offsets[number]
+            head_length = RECORD_HEAD.unpack_from(buffer, start)[0]
+            parts.append(buffer[start + RECORD_HEAD.size:start + RECORD_HEAD.size + head_length])
+        # Один разбор массива быстрее, чем отдельный json.loads на каждую запись
+        return json.loads(b'[' + b','.join(parts) + b']')
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for number in range(len(self)):
+            yield self.get(number)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __del__(self):
+        self.close()
+
+
+def load_recipes(path: str) -> List[Dict[str, Any]]:
+    """Загружает список рецептов из JSON или бинарного хранилища.
+
+    Ошибки чтения и разбора пробрасываются вызывающему.
+    """
+    if is_recipe_store(path):
+        store = RecipeStore(path)
+        try:
+            return list(store)
+        finally:
+            store.close()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def save_recipes(path: str, recipes: List[Dict[str, Any]]):
+    """Сохраняет рецепты в формате файла (.bin или уже существующее хранилище - бинарный,
+    иначе JSON с отступами, как раньше). Запись атомарная."""
+    if path.endswith('.bin') or is_recipe_store(path):
+        write_atomic(path, encode_store(recipes))
+    else:
+        write_atomic(path, json.dumps(recipes, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвертер рецептов между JSON и бинарным хранилищем")
+    parser.add_argument('source', help="recipes.json или хранилище")
+    parser.add_argument('target', help="файл .bin для хранилища, иначе JSON")
+    args = parser.parse_args()
+
+    recipes = load_recipes(args.source)
+    save_recipes(args.target, recipes)
+    print(f"Сохранено {len(recipes)} рецептов: {args.source} -> {args.target} "
+          f"({os.path.getsize(args.source) / 2 ** 20:.2f} МБ -> {os.path.getsize(args.target) / 2 ** 20:.2f} МБ)")
+
+
+if __name__ == '__main__':
+    main()
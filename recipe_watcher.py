@@ -0,0 +1,166 @@
+# recipe_watcher.py - слежение за файлом рецептов без опроса на каждом запросе
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Маски событий inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def load_inotify():
+    """Функции inotify из libc или None, если платформа их не поддерживает"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class RecipeFileWatcher:
+    """Фоновый поток, который следит за файлом рецептов.
+
+    Использует inotify на каталоге файла (ловит и перезапись, и замену через rename),
+    а без inotify - редкий опрос os.stat. Серия записей склеивается: перезагрузка
+    запускается, когда файл не менялся debounce секунд. Содержимое проверяет сама
+    перезагрузка, разбирая файл один раз.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[float], Any], debounce: float = 1.0,
+                 poll_interval: float = 2.0, use_inotify: bool = True):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_signature = self.file_signature()
+        self.stats_data = {'events': 0, 'triggered': 0}
+
+    def file_signature(self) -> Optional[Tuple[int, int]]:
+        """Время изменения и размер файла (None, если файла нет)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        """Запускает поток наблюдения"""
+        self.thread = threading.Thread(target=self.run, name="recipe-watcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def run(self):
+        fd = self.open_inotify() if self.use_inotify else None
+        if fd is None:
+            self.backend = 'poll'
+            self.run_polling()
+        else:
+            self.backend = 'inotify'
+            try:
+                self.run_inotify(fd)
+            finally:
+                os.close(fd)
+
+    def open_inotify(self) -> Optional[int]:
+        libc = load_inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"inotify unavailable: {os.strerror(ctypes.get_errno())}, falling back to polling")
+            return None
+        directory = os.path.dirname(self.path).encode()
+        if libc.inotify_add_watch(fd, directory, WATCH_MASK) < 0:
+            logger.warning(f"inotify watch failed: {os.strerror(ctypes.get_errno())}, falling back to polling")
+            os.close(fd)
+            return None
+        return fd
+
+    def read_events(self, fd: int) -> bool:
+        """Читает накопившиеся события и сообщает, касались ли они файла рецептов"""
+        name = os.path.basename(self.path).encode()
+        touched = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                event_name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0')
+                offset += INOTIFY_EVENT.size + length
+                # При переполнении очереди события потеряны - перепроверяем файл
+                if event_name == name or mask & IN_Q_OVERFLOW:
+                    touched = True
+
+    def run_inotify(self, fd: int):
+        pending_since = None
+        while not self.stop_event.is_set():
+            if pending_since is None:
+                timeout = 1.0
+            else:
+                timeout = max(pending_since + self.debounce - time.monotonic(), 0)
+            readable, _, _ = select.select([fd], [], [], min(timeout, 1.0))
+            if readable and self.read_events(fd):
+                self.stats_data['events'] += 1
+                # Каждая новая запись отодвигает перезагрузку
+                pending_since = time.monotonic()
+            elif pending_since is not None and time.monotonic() - pending_since >= self.debounce:
+                pending_since = None
+                self.check_file()
+
+    def run_polling(self):
+        seen = self.last_signature
+        pending_since = None
+        while not self.stop_event.wait(self.poll_interval if pending_since is None else self.debounce):
+            signature = self.file_signature()
+            if signature != seen:
+                self.stats_data['events'] += 1
+                seen = signature
+                pending_since = time.monotonic()
+            elif pending_since is not None:
+                pending_since = None
+                self.check_file()
+
+    def check_file(self):
+        """Запускает перезагрузку для успокоившегося файла.
+        
+        Недописанный файл отклонит перезагрузка и оставит текущий индекс; следующая запись
+        в файл снова разбудит наблюдателя.
+        """
+        signature = self.file_signature()
+        if signature is None or signature == self.last_signature:
+            return
+        self.last_signature = signature
+        self.stats_data['triggered'] += 1
+        logger.info("Recipe file changed, starting reload")
+        self.on_change(signature[0] / 1e9)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.stats_data, backend=self.backend, debounce=self.debounce)
@@ -0,0 +1,159 @@
+# request_capture.py - выборочная запись запросов вебхука для воспроизведения в loadtest.py
+"""
+Включается переменной RECIPE_CAPTURE_FILE (например captured.jsonl):
+
+    RECIPE_CAPTURE_SAMPLE     доля записываемых запросов, по умолчанию 0.1
+    RECIPE_CAPTURE_MAX_BYTES  размер файла до ротации, по умолчанию 50 МБ
+    RECIPE_CAPTURE_BACKUPS    сколько старых файлов хранить (.1, .2, ...), по умолчанию 5
+    RECIPE_CAPTURE_SALT       соль для обезличенных идентификаторов; без нее случайная на запуск
+
+Строка файла: {"ts", "latency_ms", "intent", "status", "request", "response"}.
+Поток запроса только кладет в очередь исходный запрос и байты ответа; обезличивание,
+разбор ответа, сериализация и ротация выполняются потоком записи.
+Воркеры run_waitress пишут каждый в свой файл (captured.<pid>.jsonl), чтобы не
+ротировать один файл из нескольких процессов.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+from typing import Any, Dict, Optional
+
+from async_logging import LazyQueueHandler
+
+CAPTURE_QUEUE_SIZE = 10000
+# Поля с идентификаторами пользователя и устройства: заменяются хэшем, чтобы реплики
+# одной сессии оставались связанными
+HASHED_FIELDS = ('session_id', 'user_id', 'application_id')
+# Поля, которые не нужны для воспроизведения и могут содержать личные данные
+DROPPED_FIELDS = ('nlu', 'user', 'access_token')
+# Телефоны, почта и длинные номера в тексте реплик
+PII_PATTERNS = (
+    (re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+'), '<email>'),
+    (re.compile(r'\+?\d[\d\s()-]{6,}\d'), '<number>'),
+)
+
+
+def scrub_text(text: str) -> str:
+    for pattern, replacement in PII_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class CaptureFormatter(logging.Formatter):
+    """Превращает запись захвата в обезличенную JSON-строку"""
+
+    def __init__(self, salt: bytes):
+        super().__init__()
+        self.salt = salt
+
+    def anonymize(self, value: str) -> str:
+        return hashlib.sha256(self.salt + str(value).encode('utf-8')).hexdigest()[:16]
+
+    def scrub(self, value: Any, key: str = '') -> Any:
+        if isinstance(value, dict):
+            return {name: self.scrub(item, name) for name, item in value.items() if name not in DROPPED_FIELDS}
+        if isinstance(value, list):
+            return [self.scrub(item) for item in value]
+        if key in HASHED_FIELDS and value is not None:
+            return self.anonymize(value)
+        if key in ('command', 'original_utterance') and isinstance(value, str):
+            return scrub_text(value)
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        # RotatingFileHandler форматирует запись дважды: для проверки размера и для записи
+        line = getattr(record, 'capture_line', None)
+        if line is None:
+            line = record.capture_line = self.format_entry(record.msg)
+        return line
+
+    def format_entry(self, entry: Dict[str, Any]) -> str:
+        try:
+            response = json.loads(entry['response'])
+        except ValueError:
+            response = None
+        return json.dumps({
+            'ts': round(entry['ts'], 3),
+            'latency_ms': round(entry['latency'] * 1000, 3),
+            'intent': entry['intent'],
+            'status': entry['status'],
+            'request': self.scrub(entry['request']),
+            'response': response
+        }, ensure_ascii=False)
+
+
+class RequestCapture:
+    """Фоновая запись выборки запросов и ответов вебхука в JSONL с ротацией по размеру"""
+
+    def __init__(self, path: str, sample_rate: float = 0.1, max_bytes: int = 50 * 2 ** 20,
+                 backup_count: int = 5, salt: Optional[bytes] = None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.formatter = CaptureFormatter(salt or os.urandom(16))
+        self.captured = 0
+        self.start(path)
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self.after_fork)
+
+    @classmethod
+    def from_env(cls) -> Optional['RequestCapture']:
+        """Захват по настройкам окружения; None, если он не включен"""
+        path = os.environ.get('RECIPE_CAPTURE_FILE')
+        if not path:
+            return None
+        salt = os.environ.get('RECIPE_CAPTURE_SALT')
+        return cls(path,
+                   sample_rate=float(os.environ.get('RECIPE_CAPTURE_SAMPLE', 0.1)),
+                   max_bytes=int(os.environ.get('RECIPE_CAPTURE_MAX_BYTES', 50 * 2 ** 20)),
+                   backup_count=int(os.environ.get('RECIPE_CAPTURE_BACKUPS', 5)),
+                   salt=salt.encode('utf-8') if salt else None)
+
+    def start(self, path: str):
+        self.file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8', delay=True)
+        self.file_handler.setFormatter(self.formatter)
+        self.queue_handler = LazyQueueHandler(queue.Queue(CAPTURE_QUEUE_SIZE))
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, self.file_handler)
+        self.listener.start()
+
+    def after_fork(self):
+        # Поток записи остался в родителе; у воркера свой файл, своя очередь и свой поток
+        base, ext = os.path.splitext(self.path)
+        self.captured = 0
+        self.start(f"{base}.{os.getpid()}{ext}")
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, ts: float, latency: float, intent: str, status: int,
+               request_payload: Dict[str, Any], response_body: bytes):
+        """Ставит пару запрос-ответ в очередь записи (вызывается в потоке запроса)"""
+        self.captured += 1
+        self.queue_handler.enqueue(logging.makeLogRecord({'msg': {
+            'ts': ts, 'latency': latency, 'intent': intent, 'status': status,
+            'request': request_payload, 'response': response_body
+        }}))
+
+    def stop(self):
+        """Дописывает очередь и закрывает файл"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.file_handler.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'file': self.file_handler.baseFilename,
+            'sample_rate': self.sample_rate,
+            'captured': self.captured,
+            'queued': self.queue_handler.queue.qsize(),
+            'dropped': self.queue_handler.dropped
+        }
@@ -1,19 +1,145 @@
-# run_waitress.py - БЕЗ ИЗМЕНЕНИЙ!
-from waitress import serve
-from app11 import app
-import logging
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-if __name__ == '__main__':
-    logger.info("Starting Waitress on port 5000...")
-    serve(
-    app,
-    host='127.0.0.1',  # Только локальный!
-    port=5001,         # <-- ИЗМЕНИТЕ НА 5001
-    threads=6,
-    connection_limit=1000,
-    channel_timeout=180,
-    ident='YandexRecipeBot'
-	)
+# run_waitress.py - запуск через waitress: один процесс или несколько воркеров
+import argparse
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+from waitress import serve, create_server
+from app11 import app, bot
+import logging
+
+# Логирование настраивает app11 (асинхронная запись, см. async_logging)
+logger = logging.getLogger(__name__)
+
+HOST = '127.0.0.1'  # Только локальный!
+PORT = 5001
+SERVER_OPTIONS = {
+    'connection_limit': 1000,
+    'channel_timeout': 180,
+    'ident': 'YandexRecipeBot'
+}
+# Сколько старый воркер дорабатывает запросы после замены (Алиса ждет ответ 3 секунды)
+WORKER_GRACE = 10
+
+
+def run_worker(sock, threads):
+    """Процесс-воркер: обслуживает общий слушающий сокет индексом, полученным от родителя"""
+    bot.after_fork()
+    server = create_server(app, sockets=[sock], threads=threads, **SERVER_OPTIONS)
+
+    def shutdown(signum, frame):
+        # Перестаем принимать соединения и даем закончить начатые запросы
+        server.close()
+        threading.Timer(WORKER_GRACE, os._exit, (0,)).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    server.run()
+
+
+def spawn_workers(sock, count, threads):
+    """Запускает воркеров fork'ом после загрузки индекса.
+
+    Возвращает None, если сейчас идет перестройка индекса - тогда fork откладывается,
+    чтобы воркеры не унаследовали захваченные потоком перезагрузки блокировки.
+    """
+    with bot.reload_lock:
+        if bot.reload_thread is not None:
+            return None
+        # Объекты индекса переносим в постоянное поколение: сборщик мусора в воркерах не трогает
+        # их заголовки, и страницы памяти остаются общими (copy-on-write)
+        gc.collect()
+        gc.freeze()
+        pids = []
+        for _ in range(count):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    run_worker(sock, threads)
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+    logger.info(f"Started workers {pids} for index generation "
+                f"{bot.bot.index_generation if bot.bot else None}")
+    return pids
+
+
+def serve_workers(workers, threads):
+    """Главный процесс: держит сокет и индекс, следит за файлом рецептов и заменяет
+    воркеров после каждой перезагрузки индекса."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(1024)
+
+    stopping = []
+    reload_requests = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+    # POST /reload-recipes в воркере передается сюда сигналом
+    signal.signal(signal.SIGHUP, lambda signum, frame: reload_requests.append(signum))
+
+    # Воркеры запускаются, как только закончится первая загрузка (пока она идет, соединения
+    # ждут в очереди сокета). Если она не удалась, воркеры сообщают, что рецепты не загрузились,
+    # а /ready показывает ошибку; после исправления файла их заменят воркеры с индексом.
+    served_bot = not_served = object()
+    pids = []
+    while not stopping:
+        if reload_requests:
+            reload_requests.clear()
+            bot.load_recipes()
+        current_bot = bot.bot
+        if current_bot is not served_bot:
+            new_pids = spawn_workers(sock, workers, threads)
+            if new_pids is not None:
+                for pid in pids:
+                    os.kill(pid, signal.SIGTERM)
+                pids, served_bot = new_pids, current_bot
+                # Прежние объекты индекса больше не нужны главному процессу
+                gc.unfreeze()
+        # Собираем завершившихся воркеров и перезапускаем упавших
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in pids:
+                logger.error(f"Worker {pid} exited with status {status}, restarting")
+                pids.remove(pid)
+                restarted = spawn_workers(sock, 1, threads)
+                if restarted is None:
+                    # Идет перестройка: после нее заменятся все воркеры
+                    served_bot = not_served
+                else:
+                    pids.extend(restarted)
+        time.sleep(0.5)
+
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Кулинарный помощник на waitress")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="число процессов; больше одного - fork после загрузки индекса")
+    parser.add_argument('--threads', type=int, default=6, help="потоков на процесс")
+    args = parser.parse_args()
+
+    logger.info(f"Starting Waitress on port {PORT} ({args.workers} workers x {args.threads} threads)...")
+    if args.workers > 1:
+        serve_workers(args.workers, args.threads)
+    else:
+        serve(
+        app,
+        host=HOST,
+        port=PORT,
+        threads=args.threads,
+        **SERVER_OPTIONS
+        )
@@ -0,0 +1,18 @@
+# conftest.py - общие фикстуры тестов: модули лежат в корне репозитория
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import be11  # noqa: E402
+
+RECIPES_FILE = os.path.join(ROOT, 'recipes.json')
+
+
+@pytest.fixture(scope='session')
+def bot():
+    """Бот на рецептах из репозитория: строится один раз на все тесты"""
+    return be11.SmartRecipeBot(RECIPES_FILE)
@@ -0,0 +1,44 @@
+# test_facets.py - ограничения по времени, температуре, режиму и категории
+import math
+
+import pytest
+
+import be11
+
+
+@pytest.mark.parametrize('query, facets, text', [
+    ('найди курицу до 30 минут', {'max_minutes': 30}, 'найди курицу'),
+    ('пирог за полчаса', {'max_minutes': 30}, 'пирог'),
+    ('больше часа', {'min_minutes': 60}, ''),
+    ('быстрые рецепты до 30 минут', {'max_minutes': 30}, 'рецепты'),
+    ('найди курицу от 30 до 60 минут', {'min_minutes': 30, 'max_minutes': 60}, 'найди курицу'),
+    ('курица от 30 минут до 1 часа', {'min_minutes': 30, 'max_minutes': 60}, 'курица'),
+    ('рагу от 1 до 2 часов', {'min_minutes': 60, 'max_minutes': 120}, 'рагу'),
+    ('при 180 градусах', {'temperature': 180}, ''),
+    ('до 170 градусов', {'max_temperature': 170}, ''),
+    ('пирог от 160 до 200 градусов', {'min_temperature': 160, 'max_temperature': 200}, 'пирог'),
+    ('курица bake', {'modes': ('BAKE',)}, 'курица'),
+    ('курица в режиме гриль', {'modes': ('GRILL',)}, 'курица'),
+    ('категория птица', {'tags': ('птица',)}, ''),
+])
+def test_extract_facets(bot, query, facets, text):
+    assert bot.extract_facets(query) == (facets, text)
+
+
+@pytest.mark.parametrize('text, minutes', [('15-20 минут', 20), ('2 часа 10 минут', 130), ('по вкусу', math.nan)])
+def test_parse_minutes(text, minutes):
+    value = be11.parse_minutes(text)
+    assert value == minutes or (math.isnan(minutes) and math.isnan(value))
+
+
+def test_parse_modes():
+    assert be11.parse_modes('BAKEROASTBAKE') == ['BAKE', 'ROAST']
+    # Кириллические буквы вместо латинских
+    assert be11.parse_modes('ВАКЕ') == ['BAKE']
+
+
+def test_results_respect_time_range(bot):
+    results = bot.smart_search('курица от 30 до 60 минут')
+    assert results
+    for recipe, _ in results:
+        assert 30 <= be11.parse_minutes(recipe['time']) <= 60
@@ -0,0 +1,47 @@
+# test_ingredient_search.py - поиск "что приготовить из ..." по покрытию ингредиентов
+import json
+
+import pytest
+
+import be11
+
+
+def make_recipe(title, ingredients):
+    return {'title': title, 'ingredients': ingredients, 'mode': 'BAKE', 'temperature': '180°C',
+            'time': '30 минут', 'steps': ['Запечь'], 'tags': ['Птица']}
+
+
+@pytest.fixture
+def small_bot(tmp_path):
+    recipes = [
+        make_recipe('Половина', ['Курица 1 шт', 'Сметана 100 г', 'Картофель 3 шт', 'Лук 1 шт']),
+        make_recipe('Одна курица', ['Курица 1 шт', 'Соль']),
+        make_recipe('Рис', ['Рис 200 г']),
+        make_recipe('Полный', ['Курица 500 г', 'Сметана 200 г']),
+    ]
+    path = tmp_path / 'recipes.json'
+    path.write_text(json.dumps(recipes, ensure_ascii=False), encoding='utf-8')
+    return be11.SmartRecipeBot(str(path), query_cache=be11.QueryResultCache())
+
+
+@pytest.mark.parametrize('message, keys', [
+    ('что приготовить из курицы и сметаны', ['курица', 'сметана']),
+    ('у меня есть курица, сметана', ['курица', 'сметана']),
+    ('найди есть ли рецепт пиццы', None),
+])
+def test_extract_ingredient_query(small_bot, message, keys):
+    assert small_bot.extract_ingredient_query(message) == keys
+
+
+def test_full_coverage_comes_first(small_bot):
+    cursor = small_bot.ingredient_coverage_cursor(['курица', 'сметана'])
+    # Полное покрытие раньше частичного; при равном покрытии - больше использованных продуктов.
+    # Соль не считается недостающей, рецепт без нужных продуктов не попадает в выдачу
+    assert [recipe['title'] for recipe, _ in cursor] == ['Полный', 'Одна курица', 'Половина']
+
+
+def test_coverage_is_not_increasing(bot):
+    keys = bot.extract_ingredient_query('что приготовить из курицы, картошки и сметаны')
+    scores = [score for _, score in bot.ingredient_coverage_cursor(keys)]
+    assert scores
+    assert scores == sorted(scores, reverse=True)
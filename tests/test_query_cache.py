@@ -0,0 +1,50 @@
+# test_query_cache.py - кэш результатов поиска
+import numpy as np
+
+import be11
+from conftest import RECIPES_FILE
+
+
+def make_cursor(size=0):
+    return be11.SearchCursor([], np.arange(size, dtype=np.int64), np.zeros(size))
+
+
+def test_hit_after_put_and_negative_entries():
+    cache = be11.QueryResultCache()
+    key = ('levels', ('нет такого',), ())
+    assert cache.get(1, key) is None
+    entry = cache.put(1, key, make_cursor())
+    assert cache.get(1, key) is entry
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['negative_entries']) == (1, 1, 1)
+
+
+def test_new_generation_drops_entries():
+    cache = be11.QueryResultCache()
+    key = ('levels', ('курица',), ())
+    cache.put(1, key, make_cursor(3))
+    assert cache.get(2, key) is None
+    assert cache.stats()['invalidations'] == 1
+    # Запрос от устаревшего индекса не попадает в кэш нового поколения
+    cache.put(1, key, make_cursor(3))
+    assert cache.get(2, key) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = be11.QueryResultCache(maxsize=2)
+    for name in ('a', 'b'):
+        cache.put(1, (name,), make_cursor())
+    cache.get(1, ('a',))
+    cache.put(1, ('c',), make_cursor())
+    assert cache.get(1, ('b',)) is None
+    assert cache.get(1, ('a',)) is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_word_forms_share_one_entry():
+    bot = be11.SmartRecipeBot(RECIPES_FILE, query_cache=be11.QueryResultCache())
+    first = bot.smart_search('курицу')
+    second = bot.smart_search('курицы')
+    assert [recipe['title'] for recipe, _ in first] == [recipe['title'] for recipe, _ in second]
+    stats = bot.query_cache.stats()
+    assert (stats['entries'], stats['hits']) == (1, 1)
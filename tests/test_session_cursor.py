@@ -0,0 +1,76 @@
+# test_session_cursor.py - курсор диалога в state.session Алисы
+import pytest
+
+import be11
+
+
+def make_cursor(bot, query_key, **fields):
+    return {'v': be11.SESSION_CURSOR_VERSION, 'ix': bot.cursor_index_id(), 'q': query_key, 'p': 0, 'w': 1, **fields}
+
+
+def test_search_cursor_round_trip(bot):
+    _, cursor, _ = bot.process_alice_message('найди курицу до 30 минут', 'round-trip')
+    assert cursor['q'] == ['levels', ['курица'], [['max_minutes', 30]]]
+    expected, _, _ = bot.process_alice_message('1', 'round-trip', cursor)
+    
+    # Другой процесс без памяти о диалоге выбирает из списка тот же рецепт
+    other = be11.SmartRecipeBot(bot.recipes_file)
+    response, next_cursor, intent = other.process_alice_message('1', 'round-trip', cursor)
+    assert (response, intent) == (expected, 'select')
+    assert isinstance(next_cursor['r'], int)
+
+
+def test_similar_cursor_round_trip(bot):
+    assert bot.restore_cursor(make_cursor(bot, ['similar', [0], []], r=0))
+    assert bot.session_state['last_shown_recipe_ref'] == (bot.index_generation, 0)
+
+
+def test_valid_facets_are_accepted(bot):
+    assert bot.restore_cursor(make_cursor(bot, ['levels', ['курица'], [['max_minutes', 30], ['modes', ['BAKE']]]]))
+
+
+@pytest.mark.parametrize('query_key', [
+    ['similar', [], []],
+    ['similar', [True], []],
+    ['similar', [10 ** 9], []],
+    ['levels', 'курица', []],
+    ['levels', [['x']], []],
+    ['levels', ['курица'], [['max_minutes', 'abc']]],
+    ['levels', ['курица'], [['max_minutes', 30, 1]]],
+    ['levels', ['курица'], [['modes', 5]]],
+    ['levels', ['курица'], [['bogus', 1]]],
+    ['coverage', ['нет такого'], []],
+    ['unknown', [], []],
+    5,
+    None,
+])
+def test_malformed_query_is_rejected(bot, query_key):
+    assert not bot.restore_cursor(make_cursor(bot, query_key))
+
+
+@pytest.mark.parametrize('changes', [
+    {'v': be11.SESSION_CURSOR_VERSION + 1},
+    {'ix': 'deadbeefdeadbeef'},
+    {'r': '3'},
+    {'r': -1},
+])
+def test_foreign_or_broken_cursor_is_rejected(bot, changes):
+    cursor = make_cursor(bot, ['levels', ['курица'], []])
+    cursor.update(changes)
+    assert not bot.restore_cursor(cursor)
+
+
+@pytest.mark.parametrize('name, value', [('max_minutes', 30.5), ('max_minutes', False), ('tags', [1]), ('modes', 'BAKE')])
+def test_cursor_facet_rejects_bad_values(name, value):
+    with pytest.raises(ValueError):
+        be11.cursor_facet(name, value)
+
+
+def test_cursor_facet_converts_sets():
+    assert be11.cursor_facet('modes', ['BAKE', 'GRILL']) == ('modes', ('BAKE', 'GRILL'))
+
+
+def test_bot_without_recipes_has_no_cursor(tmp_path):
+    empty = be11.SmartRecipeBot(str(tmp_path / 'missing.json'))
+    assert empty.cursor_index_id() is None
+    assert not empty.restore_cursor({'v': be11.SESSION_CURSOR_VERSION, 'ix': None, 'r': 0})
@@ -0,0 +1,32 @@
+# test_typo_correction.py - исправление опечаток через словарь удалений SymSpell
+import pytest
+
+import index_snapshot
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('курицв', 'курица'),
+    ('картошька', 'картошка'),
+    ('пицу', 'пицца'),
+    ('гречька', 'гречка'),
+    ('тварог', 'творог'),
+    ('запеканко', 'запеканка'),
+    ('яблако', 'яблоко'),
+])
+def test_misheard_word_is_corrected(bot, word, expected):
+    assert bot.correct_word(word, bot.lemmatize(word)) == expected
+
+
+@pytest.mark.parametrize('word', ['торт', 'курица'])
+def test_known_words_are_kept(bot, word):
+    assert bot.correct_word(word, bot.lemmatize(word)) is None
+
+
+def test_search_terms_use_correction(bot):
+    assert bot.extract_search_terms('найди пицу') == ['пицца']
+
+
+def test_delete_index_lookup():
+    deletes = index_snapshot.DeleteIndex.build([('сыр', 'сыр'), ('ср', 'сыр'), ('ср', 'сор')])
+    assert sorted(deletes.get('ср')) == ['сор', 'сыр']
+    assert deletes.get('нет') == ()